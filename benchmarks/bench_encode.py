@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+结果图像编码基准
+对比不同输出格式/质量/缩放设置下每帧的编码耗时和输出字节数
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到路径
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from detection_renderer import DetectionRenderer
+from output_encoder import OutputEncoder
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'}
+
+# (名称, 编码器参数)
+DEFAULT_SETTINGS = [
+    ('jpg q95 (默认)', dict(fmt='jpg')),
+    ('jpg q80', dict(fmt='jpg', quality=80)),
+    ('jpg q80 optimize', dict(fmt='jpg', quality=80, optimize=True)),
+    ('jpg q80 progressive', dict(fmt='jpg', quality=80, progressive=True)),
+    ('jpg q60', dict(fmt='jpg', quality=60)),
+    ('jpg q80 x0.5', dict(fmt='jpg', quality=80, scale=0.5)),
+    ('png c1', dict(fmt='png', quality=1)),
+    ('png c6', dict(fmt='png', quality=6)),
+    ('webp q80', dict(fmt='webp', quality=80)),
+    ('bmp', dict(fmt='bmp')),
+]
+
+def synthetic_frames(count: int, width: int, height: int) -> list:
+    """生成带渐变背景、色块和检测框标注的合成帧，比纯噪声更接近真实画面的可压缩性"""
+    rng = np.random.default_rng(0)
+    renderer = DetectionRenderer()
+    ys, xs = np.mgrid[0:height, 0:width]
+    frames = []
+    for i in range(count):
+        frame = np.stack([(xs * 255 // width + i * 10) % 256,
+                          ys * 255 // height,
+                          ((xs + ys) * 128 // (width + height) + 64)], axis=2).astype(np.uint8)
+        for _ in range(30):
+            x, y = int(rng.integers(0, width - 100)), int(rng.integers(0, height - 100))
+            color = tuple(int(c) for c in rng.integers(0, 255, 3))
+            cv2.rectangle(frame, (x, y), (x + int(rng.integers(20, 100)), y + int(rng.integers(20, 100))), color, -1)
+        frame = cv2.GaussianBlur(frame, (5, 5), 0)
+        cv2.add(frame, rng.integers(0, 12, frame.shape, dtype=np.uint8), dst=frame)  # 传感器噪声
+
+        n = 20
+        x1 = rng.integers(0, width - 200, n)
+        y1 = rng.integers(0, height - 200, n)
+        boxes = np.stack([x1, y1, x1 + rng.integers(40, 200, n), y1 + rng.integers(40, 200, n)], axis=1)
+        frames.append(renderer.draw(frame, boxes.astype(np.int32), np.round(rng.uniform(0.3, 1, n), 2),
+                                    rng.integers(0, 20, n).astype(np.int32)))
+    return frames
+
+def load_frames(folder: Path) -> list:
+    """读取文件夹中的图片"""
+    frames = []
+    for image_file in sorted(folder.iterdir()):
+        if image_file.suffix.lower() in IMAGE_EXTENSIONS:
+            image = cv2.imread(str(image_file))
+            if image is not None:
+                frames.append(image)
+    return frames
+
+def bench(name: str, encoder: OutputEncoder, frames: list, repeat: int) -> dict:
+    """测试单个编码设置"""
+    latencies, sizes = [], []
+    for _ in range(repeat):
+        for frame in frames:
+            start = time.perf_counter()
+            data = encoder.encode(frame)
+            latencies.append((time.perf_counter() - start) * 1000)
+            sizes.append(len(data))
+    latencies.sort()
+    return {
+        'setting': name,
+        'encoder': repr(encoder),
+        'kb_per_frame': round(sum(sizes) / len(sizes) / 1024, 1),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'p50_ms': round(latencies[len(latencies) // 2], 3),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+    }
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='结果图像编码基准')
+    parser.add_argument('--images', type=str, default=None, help='测试图片文件夹，默认使用合成帧')
+    parser.add_argument('--size', type=int, nargs=2, default=[1920, 1080], metavar=('W', 'H'),
+                        help='合成帧尺寸')
+    parser.add_argument('--frames', type=int, default=8, help='合成帧数量')
+    parser.add_argument('--repeat', type=int, default=5, help='每个设置遍历帧的次数')
+    parser.add_argument('--json', type=str, default=None, help='将结果保存为JSON文件')
+    args = parser.parse_args()
+
+    if args.images:
+        frames = load_frames(Path(args.images))
+        if not frames:
+            print(f"错误: 未在 {args.images} 中找到图片")
+            sys.exit(1)
+    else:
+        frames = synthetic_frames(args.frames, *args.size)
+
+    results = []
+    for name, kwargs in DEFAULT_SETTINGS:
+        try:
+            results.append(bench(name, OutputEncoder(**kwargs), frames, args.repeat))
+        except Exception as e:
+            print(f"设置 {name} 测试失败: {e}")
+
+    print(f"{'设置':<22}{'KB/帧':>10}{'均值(ms)':>12}{'P50(ms)':>12}{'P95(ms)':>12}")
+    for r in results:
+        print(f"{r['setting']:<22}{r['kb_per_frame']:>10.1f}{r['mean_ms']:>12.2f}"
+              f"{r['p50_ms']:>12.2f}{r['p95_ms']:>12.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.json}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+推理引擎对比基准
+在yolov5/data/images中的图片上依次测试各推理引擎的加载耗时与单帧延迟
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import cv2
+
+# 添加项目根目录到路径
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from inference_engines import ENGINES, STUB_ENGINE
+from yolo_predict import YOLOPredictor
+
+def load_images(folder: Path) -> list:
+    """读取文件夹中的所有图片"""
+    images = []
+    for image_file in sorted(folder.iterdir()):
+        if image_file.suffix.lower() in YOLOPredictor.IMAGE_EXTENSIONS:
+            image = cv2.imread(str(image_file))
+            if image is not None:
+                images.append(image)
+    return images
+
+def bench_engine(model_path: str, engine: str, images: list, repeat: int, imgsz: int) -> dict:
+    """测试单个引擎，返回耗时统计（毫秒）"""
+    start = time.perf_counter()
+    predictor = YOLOPredictor(model_path, imgsz=imgsz, engine=engine)
+    init_ms = (time.perf_counter() - start) * 1000
+
+    latencies = []
+    for _ in range(repeat):
+        for image in images:
+            frame_start = time.perf_counter()
+            predictor.predict_image(image).jpeg  # 包含绘制与JPEG编码
+            latencies.append((time.perf_counter() - frame_start) * 1000)
+
+    latencies.sort()
+    mean_ms = sum(latencies) / len(latencies)
+    return {
+        'engine': engine,
+        'init_ms': round(init_ms, 2),
+        'load_ms': round(predictor.load_stats['load_ms'], 2),
+        'frames': len(latencies),
+        'mean_ms': round(mean_ms, 2),
+        'p50_ms': round(latencies[len(latencies) // 2], 2),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        'fps': round(1000 / mean_ms, 2),
+    }
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='推理引擎对比基准')
+    parser.add_argument('--model', type=str, required=True, help='模型权重文件路径(.pt)')
+    parser.add_argument('--engines', type=str, nargs='+',
+                        default=[engine for engine in ENGINES if engine != STUB_ENGINE], choices=list(ENGINES),
+                        help=f'参与对比的推理引擎，默认为除 {STUB_ENGINE} 外的全部引擎；'
+                             f'{STUB_ENGINE} 为离线替身模型，需单独指定并以 --model 传入替身配置')
+    parser.add_argument('--images', type=str, default=str(ROOT / 'yolov5' / 'data' / 'images'),
+                        help='测试图片文件夹')
+    parser.add_argument('--repeat', type=int, default=10, help='每个引擎遍历图片的次数')
+    parser.add_argument('--imgsz', type=int, default=640, help='模型输入尺寸')
+    parser.add_argument('--json', type=str, default=None, help='将结果保存为JSON文件')
+    args = parser.parse_args()
+
+    images = load_images(Path(args.images))
+    if not images:
+        print(f"错误: 未在 {args.images} 中找到图片")
+        sys.exit(1)
+
+    results = []
+    for engine in args.engines:
+        print(f"\n===== 测试引擎: {engine} =====")
+        try:
+            results.append(bench_engine(args.model, engine, images, args.repeat, args.imgsz))
+        except Exception as e:
+            print(f"引擎 {engine} 测试失败: {e}")
+
+    print(f"\n{'引擎':<14}{'加载(ms)':>12}{'均值(ms)':>12}{'P50(ms)':>12}{'P95(ms)':>12}{'FPS':>10}")
+    for r in results:
+        print(f"{r['engine']:<14}{r['load_ms']:>12.1f}{r['mean_ms']:>12.2f}"
+              f"{r['p50_ms']:>12.2f}{r['p95_ms']:>12.2f}{r['fps']:>10.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.json}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+predict_image 分阶段基准
+在多种分辨率、检测框密度的合成帧上分别计时预处理、模型前向、NMS、坐标还原、绘制和编码，
+输出各阶段的 P50/P95/P99 延迟和帧率；结果JSON附带提交号与环境信息，
+可用 --compare 与之前保存的结果对比，总耗时退化超过阈值时返回非零退出码
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+
+# 添加项目根目录到路径
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from yolo_predict import Detections, YOLOPredictor
+
+STAGES = ['preprocess', 'forward', 'nms', 'postprocess', 'draw', 'encode']
+
+def parse_resolution(text: str) -> tuple:
+    """解析 '1280x720' 形式的分辨率"""
+    try:
+        width, height = (int(x) for x in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"分辨率格式应为 宽x高: {text}")
+    return width, height
+
+def synthetic_frame(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """生成带渐变背景和色块的合成帧"""
+    rng = np.random.default_rng(seed)
+    ys, xs = np.mgrid[0:height, 0:width]
+    frame = np.stack([xs * 255 // width, ys * 255 // height,
+                      (xs + ys) * 128 // (width + height) + 64], axis=2).astype(np.uint8)
+    for _ in range(20):
+        x, y = int(rng.integers(0, width - 40)), int(rng.integers(0, height - 40))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.rectangle(frame, (x, y), (x + int(rng.integers(20, 200)), y + int(rng.integers(20, 200))), color, -1)
+    return frame
+
+def synthetic_prediction(pred: torch.Tensor, density: int, imgsz: tuple, seed: int = 0) -> torch.Tensor:
+    """
+    按模型原始输出的形状构造NMS前预测：density个锚点为高置信度候选框，其余置信度为0
+
+    Args:
+        pred: 模型原始输出 [B, 锚点数, 5 + 类别数]
+        density: 候选框数量
+        imgsz: 模型输入尺寸 (高, 宽)
+    """
+    rng = np.random.default_rng(seed)
+    batch, anchors, channels = pred.shape
+    data = np.zeros((batch, anchors, channels), dtype=np.float32)
+    height, width = imgsz
+    count = min(density, anchors)
+    for b in range(batch):
+        index = rng.choice(anchors, count, replace=False)
+        data[b, index, 0] = rng.uniform(0, width, count)
+        data[b, index, 1] = rng.uniform(0, height, count)
+        data[b, index, 2] = rng.uniform(16, 128, count)
+        data[b, index, 3] = rng.uniform(16, 128, count)
+        data[b, index, 4] = rng.uniform(0.6, 1.0, count)
+        data[b, index, 5 + rng.integers(0, channels - 5, count)] = rng.uniform(0.6, 1.0, count)
+    return torch.from_numpy(data).to(pred.device)
+
+def percentile_stats(latencies: list) -> dict:
+    """返回延迟分布（毫秒）"""
+    values = np.asarray(latencies)
+    return {
+        'mean_ms': round(float(values.mean()), 3),
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+        'p99_ms': round(float(np.percentile(values, 99)), 3),
+    }
+
+def bench_case(predictor: YOLOPredictor, width: int, height: int, density: int,
+               iterations: int, warmup: int) -> dict:
+    """测试单个 (分辨率, 密度) 组合，返回各阶段耗时分布"""
+    frame = synthetic_frame(width, height)
+    with torch.no_grad():
+        raw = predictor.model(predictor._preprocess_image(frame))
+    raw = raw[0] if isinstance(raw, (list, tuple)) else raw
+    synthetic = synthetic_prediction(raw, density, predictor.imgsz)
+
+    timings = {stage: [] for stage in STAGES}
+    totals, detection_counts = [], []
+    for i in range(warmup + iterations):
+        candidates = synthetic.clone()
+        stage_ms = {}
+
+        start = time.perf_counter()
+        img_tensor = predictor._preprocess_image(frame)
+        predictor._synchronize()
+        stage_ms['preprocess'] = time.perf_counter()
+
+        with torch.no_grad():
+            predictor.model(img_tensor)
+        predictor._synchronize()
+        stage_ms['forward'] = time.perf_counter()
+
+        # NMS及之后的阶段使用构造的预测，检测框数量与模型和画面内容无关
+        per_image = predictor._non_max_suppression(candidates)
+        predictor._synchronize()
+        stage_ms['nms'] = time.perf_counter()
+
+        detections = Detections.concat([predictor._scale_detections(det, img_tensor.shape, frame.shape)
+                                        for det in per_image])
+        stage_ms['postprocess'] = time.perf_counter()
+
+        annotated = predictor._annotate(frame, detections, out=predictor.renderer.output_buffer(frame))
+        stage_ms['draw'] = time.perf_counter()
+
+        predictor.encoder.encode(annotated)
+        stage_ms['encode'] = time.perf_counter()
+
+        if i < warmup:
+            continue
+        previous = start
+        for stage in STAGES:
+            timings[stage].append((stage_ms[stage] - previous) * 1000)
+            previous = stage_ms[stage]
+        totals.append((previous - start) * 1000)
+        detection_counts.append(len(detections))
+
+    total = percentile_stats(totals)
+    return {
+        'resolution': f"{width}x{height}",
+        'density': density,
+        'detections': round(float(np.mean(detection_counts)), 1),
+        'stages': {stage: percentile_stats(timings[stage]) for stage in STAGES},
+        'total': total,
+        'fps': round(1000 / total['mean_ms'], 2),
+    }
+
+def environment(args) -> dict:
+    """记录结果对应的代码版本与运行环境，便于跨提交对比"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'torch': torch.__version__,
+        'opencv': cv2.__version__,
+        'device': str(torch.device("cuda:0" if torch.cuda.is_available() else "cpu")),
+        'model': args.model,
+        'engine': args.engine,
+        'precision': args.precision,
+        'imgsz': args.imgsz,
+        'iterations': args.iterations,
+    }
+
+def compare(results: list, baseline_path: str, max_regression: float) -> bool:
+    """与之前保存的结果对比总耗时P50，返回是否全部在允许的退化范围内"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(r['resolution'], r['density']): r for r in baseline['results']}
+    commit = baseline.get('environment', {}).get('commit')
+    print(f"\n与基线对比（{baseline_path}{f'，提交 {commit}' if commit else ''}）:")
+
+    passed = True
+    for r in results:
+        old = previous.get((r['resolution'], r['density']))
+        if old is None:
+            continue
+        change = r['total']['p50_ms'] / max(1e-9, old['total']['p50_ms']) - 1
+        status = "退化" if change > max_regression else "正常"
+        passed = passed and change <= max_regression
+        print(f"  {r['resolution']:>10} 密度{r['density']:>4}: P50 {old['total']['p50_ms']:.2f} -> "
+              f"{r['total']['p50_ms']:.2f} ms ({change * 100:+.1f}%) {status}")
+    return passed
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='predict_image 分阶段基准')
+    parser.add_argument('--model', type=str, required=True, help='模型权重文件路径(.pt)')
+    parser.add_argument('--engine', type=str, default='torch', help='推理引擎')
+    parser.add_argument('--precision', type=str, default='fp32', help='推理精度')
+    parser.add_argument('--imgsz', type=int, default=640, help='模型输入尺寸')
+    parser.add_argument('--resolutions', type=parse_resolution, nargs='+',
+                        default=[(640, 480), (1280, 720), (1920, 1080)], help='合成帧分辨率，格式 宽x高')
+    parser.add_argument('--densities', type=int, nargs='+', default=[0, 10, 100],
+                        help='每帧NMS前的高置信度候选框数量')
+    parser.add_argument('--iterations', type=int, default=100, help='每个组合的计时次数')
+    parser.add_argument('--warmup', type=int, default=10, help='每个组合计时前的预热次数')
+    parser.add_argument('--json', type=str, default=None, help='将结果保存为JSON文件')
+    parser.add_argument('--compare', type=str, default=None, help='与之前保存的JSON结果对比')
+    parser.add_argument('--max-regression', type=float, default=0.1,
+                        help='允许的总耗时P50退化比例，超过时返回非零退出码')
+    args = parser.parse_args()
+
+    predictor = YOLOPredictor(args.model, imgsz=args.imgsz, engine=args.engine, precision=args.precision)
+
+    results = []
+    for width, height in args.resolutions:
+        for density in args.densities:
+            results.append(bench_case(predictor, width, height, density, args.iterations, args.warmup))
+
+    header = ''.join(f"{stage:>12}" for stage in STAGES)
+    print(f"\n{'分辨率':<12}{'密度':>6}{'检测数':>8}{header}{'总P50':>10}{'总P99':>10}{'FPS':>9}")
+    for r in results:
+        stages = ''.join(f"{r['stages'][stage]['p50_ms']:>12.2f}" for stage in STAGES)
+        print(f"{r['resolution']:<12}{r['density']:>6}{r['detections']:>8.1f}{stages}"
+              f"{r['total']['p50_ms']:>10.2f}{r['total']['p99_ms']:>10.2f}{r['fps']:>9.1f}")
+    print("（各阶段为P50，单位ms）")
+
+    report = {'environment': environment(args), 'results': results}
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.json}")
+
+    if args.compare and not compare(results, args.compare, args.max_regression):
+        print(f"总耗时P50退化超过 {args.max_regression * 100:.0f}%")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
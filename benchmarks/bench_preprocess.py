@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+预处理内存分配基准
+在合成帧上对比逐帧新建数组/张量的旧预处理与复用缓冲区的InputBufferPool，
+统计稳态下每批次的分配次数、分配字节数和耗时
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+from torch.profiler import ProfilerActivity, profile
+
+# 添加项目根目录到路径
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from input_buffers import InputBufferPool, letterbox_geometry, letterbox_into
+
+LETTERBOX_COLOR = (114, 114, 114)
+
+def legacy_preprocess(images: list, imgsz: tuple, device: torch.device, dtype: torch.dtype) -> torch.Tensor:
+    """改造前的预处理：每帧缩放、加边框、传输、转换，再沿batch维拼接"""
+    tensors = []
+    for image in images:
+        (unpad_w, unpad_h), (top, bottom, left, right), _ = letterbox_geometry(image.shape, imgsz)
+        img = cv2.resize(image, (unpad_w, unpad_h), interpolation=cv2.INTER_LINEAR)
+        img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR)
+        tensor = torch.from_numpy(img).to(device, non_blocking=True)
+        tensor = tensor.permute(2, 0, 1).unsqueeze(0).to(dtype=dtype).div_(255.0)
+        tensors.append(tensor)
+    return torch.cat(tensors, dim=0)
+
+def pooled_preprocess(images: list, imgsz: tuple, pool: InputBufferPool) -> torch.Tensor:
+    """复用缓冲区的预处理，与YOLOPredictor._preprocess_batch一致"""
+    buffers = pool.get(len(images), *imgsz)
+    buffers.wait_host()
+    for i, image in enumerate(images):
+        geometry = letterbox_geometry(image.shape, imgsz)
+        letterbox_into(image, geometry, buffers.host[i], LETTERBOX_COLOR, previous=buffers.geometry[i])
+        buffers.geometry[i] = geometry
+    return buffers.upload()
+
+def synchronize(device: torch.device):
+    if device.type == 'cuda':
+        torch.cuda.synchronize(device)
+
+def measure(func, iterations: int, device: torch.device) -> dict:
+    """预热后测量稳态每批次的分配情况与耗时"""
+    for _ in range(3):
+        func()
+    synchronize(device)
+
+    # numpy / OpenCV 数组的分配：tracemalloc统计每批次的瞬时峰值
+    tracemalloc.start()
+    peaks = []
+    for _ in range(iterations):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        func()
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    # torch张量的分配：profiler中各算子自身申请的内存
+    with profile(activities=[ProfilerActivity.CPU], profile_memory=True) as prof:
+        for _ in range(iterations):
+            func()
+    allocs = [e.self_cpu_memory_usage for e in prof.events()
+              if e.name != '[memory]' and e.self_cpu_memory_usage > 0]
+
+    cuda_allocs = None
+    if device.type == 'cuda':
+        before = torch.cuda.memory_stats(device)['allocation.all.allocated']
+        for _ in range(iterations):
+            func()
+        synchronize(device)
+        cuda_allocs = (torch.cuda.memory_stats(device)['allocation.all.allocated'] - before) / iterations
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        synchronize(device)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    return {
+        'numpy_peak_kb': round(sum(peaks) / len(peaks) / 1024, 1),
+        'torch_cpu_allocs': round(len(allocs) / iterations, 2),
+        'torch_cpu_kb': round(sum(allocs) / iterations / 1024, 1),
+        'cuda_allocs': cuda_allocs,
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'p50_ms': round(latencies[len(latencies) // 2], 3),
+    }
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='预处理内存分配基准')
+    parser.add_argument('--size', type=int, nargs=2, default=[1920, 1080], metavar=('W', 'H'),
+                        help='合成帧尺寸')
+    parser.add_argument('--imgsz', type=int, default=640, help='模型输入尺寸')
+    parser.add_argument('--batch-size', type=int, nargs='+', default=[1, 4], help='批次大小')
+    parser.add_argument('--precision', type=str, default='fp32', choices=['fp32', 'fp16', 'bf16'],
+                        help='输入精度（fp16仅CUDA）')
+    parser.add_argument('--iterations', type=int, default=50, help='每组测量的批次数')
+    parser.add_argument('--json', type=str, default=None, help='将结果保存为JSON文件')
+    args = parser.parse_args()
+
+    device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+    dtype = {'fp32': torch.float32, 'fp16': torch.float16, 'bf16': torch.bfloat16}[args.precision]
+    imgsz = (args.imgsz, args.imgsz)
+    width, height = args.size
+    rng = np.random.default_rng(0)
+
+    results = []
+    for batch_size in args.batch_size:
+        images = [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(batch_size)]
+        pool = InputBufferPool(device, dtype)
+
+        expected = legacy_preprocess(images, imgsz, device, dtype)
+        if not torch.equal(expected, pooled_preprocess(images, imgsz, pool)):
+            raise RuntimeError(f"batch={batch_size} 时预处理结果与旧实现不一致")
+
+        results.append({
+            'batch_size': batch_size,
+            'legacy': measure(lambda: legacy_preprocess(images, imgsz, device, dtype), args.iterations, device),
+            'pooled': measure(lambda: pooled_preprocess(images, imgsz, pool), args.iterations, device),
+            'pool_allocations': pool.allocations,
+        })
+
+    print(f"设备: {device}，精度: {args.precision}，帧尺寸: {width}x{height}，输入尺寸: {args.imgsz}")
+    print(f"{'batch':>6}{'实现':>8}{'numpy峰值(KB)':>16}{'torch分配次数':>16}{'torch分配(KB)':>16}{'均值(ms)':>12}")
+    for r in results:
+        for name in ('legacy', 'pooled'):
+            m = r[name]
+            print(f"{r['batch_size']:>6}{name:>8}{m['numpy_peak_kb']:>16.1f}{m['torch_cpu_allocs']:>16.2f}"
+                  f"{m['torch_cpu_kb']:>16.1f}{m['mean_ms']:>12.3f}")
+            if m['cuda_allocs'] is not None:
+                print(f"{'':>14}CUDA分配次数/批次: {m['cuda_allocs']:.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.json}")
+
+if __name__ == '__main__':
+    main()
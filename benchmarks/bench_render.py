@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检测框绘制基准
+在合成图像和随机检测框上对比逐框计算的旧实现与DetectionRenderer，
+并校验两者输出像素一致
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到路径
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from detection_renderer import DetectionRenderer, class_color
+
+# COCO类别名称长度相近的示例名称
+CLASS_NAMES = [f"class_{i}" for i in range(80)]
+
+def legacy_draw(image: np.ndarray, boxes: np.ndarray, confidences: np.ndarray,
+                classes: np.ndarray, class_names: list) -> np.ndarray:
+    """改造前的逐框绘制实现：每个框重新取颜色、格式化标签并测量文字尺寸"""
+    annotated_image = image.copy()
+    for (x1, y1, x2, y2), conf, cls in zip(boxes.tolist(), confidences.tolist(), classes.tolist()):
+        color = class_color(cls)
+        cv2.rectangle(annotated_image, (x1, y1), (x2, y2), color, 3)
+        center_x = (x1 + x2) // 2
+        center_y = (y1 + y2) // 2
+        dark_color = tuple(int(c * 0.7) for c in color)
+        cv2.circle(annotated_image, (center_x, center_y), 4, dark_color, -1)
+        if class_names and cls < len(class_names):
+            label = f"{class_names[cls]} {conf:.2f}"
+        else:
+            label = f"cls:{cls} conf:{conf:.2f}"
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        (text_width, text_height), baseline = cv2.getTextSize(label, font, 0.8, 2)
+        padding = 5
+        label_y = max(y1 - 10, text_height + padding)
+        cv2.rectangle(annotated_image,
+                      (x1, label_y - text_height - padding),
+                      (x1 + text_width + padding * 2, label_y + baseline),
+                      color, -1)
+        brightness = sum(color) / 3
+        text_color = (0, 0, 0) if brightness > 127 else (255, 255, 255)
+        cv2.putText(annotated_image, label, (x1 + padding, label_y - padding),
+                    font, 0.8, text_color, 2)
+    return annotated_image
+
+def make_detections(num_boxes: int, width: int, height: int, num_classes: int, seed: int = 0) -> tuple:
+    """生成随机检测框，置信度保留两位小数以模拟真实标签的重复度"""
+    rng = np.random.default_rng(seed)
+    x1 = rng.integers(0, width - 20, num_boxes)
+    y1 = rng.integers(0, height - 20, num_boxes)
+    x2 = np.minimum(x1 + rng.integers(10, 200, num_boxes), width - 1)
+    y2 = np.minimum(y1 + rng.integers(10, 200, num_boxes), height - 1)
+    boxes = np.stack([x1, y1, x2, y2], axis=1).astype(np.int32)
+    confidences = np.round(rng.uniform(0.25, 1.0, num_boxes), 2).astype(np.float32)
+    classes = rng.integers(0, num_classes, num_boxes).astype(np.int32)
+    return boxes, confidences, classes
+
+def time_ms(func, repeat: int) -> list:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)
+
+def summarize(latencies: list) -> dict:
+    return {
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'p50_ms': round(latencies[len(latencies) // 2], 3),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+    }
+
+def bench(num_boxes: int, width: int, height: int, repeat: int) -> dict:
+    """对比单个框数下的绘制耗时"""
+    image = np.random.default_rng(1).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    boxes, confidences, classes = make_detections(num_boxes, width, height, len(CLASS_NAMES))
+    renderer = DetectionRenderer(CLASS_NAMES)
+
+    expected = legacy_draw(image, boxes, confidences, classes, CLASS_NAMES)
+    actual = renderer.draw(image, boxes, confidences, classes)
+    if not np.array_equal(expected, actual):
+        raise RuntimeError(f"{num_boxes}个框时绘制结果与旧实现不一致")
+
+    legacy = summarize(time_ms(lambda: legacy_draw(image, boxes, confidences, classes, CLASS_NAMES), repeat))
+    copy = summarize(time_ms(lambda: renderer.draw(image, boxes, confidences, classes), repeat))
+    reuse = summarize(time_ms(lambda: renderer.draw(image, boxes, confidences, classes,
+                                                    out=renderer.output_buffer(image)), repeat))
+    return {
+        'boxes': num_boxes,
+        'legacy': legacy,
+        'renderer': copy,
+        'renderer_reuse': reuse,
+        'speedup': round(legacy['mean_ms'] / max(1e-9, reuse['mean_ms']), 2),
+    }
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='检测框绘制基准')
+    parser.add_argument('--boxes', type=int, nargs='+', default=[0, 10, 50, 200, 500],
+                        help='每张图的检测框数量')
+    parser.add_argument('--size', type=int, nargs=2, default=[1920, 1080], metavar=('W', 'H'),
+                        help='合成图像尺寸')
+    parser.add_argument('--repeat', type=int, default=50, help='每组重复次数')
+    parser.add_argument('--json', type=str, default=None, help='将结果保存为JSON文件')
+    args = parser.parse_args()
+
+    width, height = args.size
+    results = [bench(n, width, height, args.repeat) for n in args.boxes]
+
+    print(f"{'框数':>6}{'旧实现(ms)':>14}{'新实现(ms)':>14}{'复用缓冲(ms)':>16}{'加速比':>10}")
+    for r in results:
+        print(f"{r['boxes']:>6}{r['legacy']['mean_ms']:>14.3f}{r['renderer']['mean_ms']:>14.3f}"
+              f"{r['renderer_reuse']['mean_ms']:>16.3f}{r['speedup']:>10.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.json}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+非极大值抑制（NMS）
+与yolov5.utils.general.non_max_suppression的单标签模式结果一致，
+用于没有克隆yolov5代码时（如使用离线替身模型）；安装了torchvision时使用其NMS算子
+"""
+
+from typing import List
+
+import torch
+
+try:
+    from torchvision.ops import nms as _torchvision_nms
+except ImportError:
+    _torchvision_nms = None
+
+def xywh2xyxy(x: torch.Tensor) -> torch.Tensor:
+    """(中心x, 中心y, 宽, 高) -> (x1, y1, x2, y2)"""
+    y = x.clone()
+    y[:, 0] = x[:, 0] - x[:, 2] / 2
+    y[:, 1] = x[:, 1] - x[:, 3] / 2
+    y[:, 2] = x[:, 0] + x[:, 2] / 2
+    y[:, 3] = x[:, 1] + x[:, 3] / 2
+    return y
+
+def box_iou(box: torch.Tensor, boxes: torch.Tensor) -> torch.Tensor:
+    """单个框与一组框的IOU"""
+    x1 = torch.maximum(box[0], boxes[:, 0])
+    y1 = torch.maximum(box[1], boxes[:, 1])
+    x2 = torch.minimum(box[2], boxes[:, 2])
+    y2 = torch.minimum(box[3], boxes[:, 3])
+    inter = (x2 - x1).clamp(min=0) * (y2 - y1).clamp(min=0)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / (area + areas - inter + 1e-9)
+
+def nms(boxes: torch.Tensor, scores: torch.Tensor, iou_thres: float) -> torch.Tensor:
+    """按置信度从高到低保留与已保留框IOU不超过阈值的框，返回保留框的索引"""
+    if _torchvision_nms is not None:
+        return _torchvision_nms(boxes, scores, iou_thres)
+
+    order = scores.argsort(descending=True)
+    keep = []
+    while order.numel():
+        i = order[0]
+        keep.append(i)
+        if order.numel() == 1:
+            break
+        rest = order[1:]
+        order = rest[box_iou(boxes[i], boxes[rest]) <= iou_thres]
+    return torch.stack(keep) if keep else order
+
+def non_max_suppression(prediction: torch.Tensor, conf_thres: float = 0.25, iou_thres: float = 0.45,
+                        max_det: int = 300) -> List[torch.Tensor]:
+    """
+    对模型原始输出执行NMS
+
+    Args:
+        prediction: [B, 锚点数, 5 + 类别数] (cx, cy, w, h, 目标置信度, 各类别置信度)
+        conf_thres: 置信度阈值（目标置信度与类别置信度都需高于该值）
+        iou_thres: 同类别框的IOU阈值
+        max_det: 每张图像最多保留的检测框数
+
+    Returns:
+        每张图像一个 [N, 6] 张量 (x1, y1, x2, y2, 置信度, 类别)
+    """
+    max_wh = 7680  # 按类别偏移框坐标，使不同类别的框互不抑制
+    max_nms = 30000  # 送入NMS的最大框数
+    output = [torch.zeros((0, 6), device=prediction.device)] * prediction.shape[0]
+    candidates = prediction[..., 4] > conf_thres
+
+    for index, x in enumerate(prediction):
+        x = x[candidates[index]]
+        if not x.shape[0]:
+            continue
+        x[:, 5:] *= x[:, 4:5]
+        box = xywh2xyxy(x[:, :4])
+        conf, j = x[:, 5:].max(1, keepdim=True)
+        x = torch.cat((box, conf, j.float()), 1)[conf.view(-1) > conf_thres]
+        if not x.shape[0]:
+            continue
+        x = x[x[:, 4].argsort(descending=True)[:max_nms]]
+
+        offsets = x[:, 5:6] * max_wh
+        keep = nms(x[:, :4] + offsets, x[:, 4], iou_thres)[:max_det]
+        output[index] = x[keep]
+    return output
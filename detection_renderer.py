@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检测结果绘制
+类别颜色、中心点颜色和文字颜色预先计算成查找表，标签（背景+文字）按文本渲染成贴图缓存，
+每个框的标签位置用numpy一次算出，逐框循环里只剩边框、中心点绘制和贴图拷贝
+"""
+
+import colorsys
+import threading
+from typing import Optional
+
+import cv2
+import numpy as np
+
+# 预定义一些对比度高的颜色 (BGR格式)
+BASE_COLORS = (
+    (0, 255, 0),     # 绿色
+    (255, 0, 0),     # 蓝色
+    (0, 0, 255),     # 红色
+    (255, 255, 0),   # 青色
+    (255, 0, 255),   # 品红色
+    (0, 255, 255),   # 黄色
+    (128, 0, 128),   # 紫色
+    (255, 165, 0),   # 橙色
+    (0, 128, 255),   # 橙红色
+    (255, 20, 147),  # 深粉红色
+    (0, 255, 127),   # 春绿色
+    (255, 105, 180), # 热粉红色
+    (64, 224, 208),  # 青绿色
+    (255, 69, 0),    # 红橙色
+    (50, 205, 50),   # 绿黄色
+    (138, 43, 226),  # 蓝紫色
+    (255, 140, 0),   # 深橙色
+    (72, 61, 139),   # 深板岩蓝
+    (220, 20, 60),   # 深红色
+    (0, 206, 209),   # 深青绿色
+)
+
+def class_color(class_id: int) -> tuple:
+    """为不同类别生成对比度高的颜色"""
+    if class_id < len(BASE_COLORS):
+        return BASE_COLORS[class_id]
+    # 超出预定义颜色时使用HSV色彩空间生成，黄金角度确保颜色分布均匀
+    hue = (class_id * 137.508) % 360
+    rgb = colorsys.hsv_to_rgb(hue / 360, 0.9, 0.9)  # 高饱和度和亮度
+    return (int(rgb[2] * 255), int(rgb[1] * 255), int(rgb[0] * 255))  # 转换为BGR
+
+class DetectionRenderer:
+    """
+    检测框绘制器
+
+    绘制效果与逐框计算的实现一致：类别颜色边框、调暗的中心点、
+    带背景的类别标签（文字黑白随背景亮度切换）。
+    """
+
+    FONT = cv2.FONT_HERSHEY_SIMPLEX
+    FONT_SCALE = 0.8
+    FONT_THICKNESS = 2
+    BOX_THICKNESS = 3
+    CENTER_RADIUS = 4
+    LABEL_PADDING = 5
+    # 标签贴图缓存的条目上限（类别数 × 置信度取值），单张贴图约10KB
+    LABEL_CACHE_SIZE = 2048
+
+    def __init__(self, class_names=None, num_colors: int = 80):
+        """
+        初始化绘制器
+
+        Args:
+            class_names: 类别名称（列表或 {序号: 名称} 字典），None时标签显示类别序号
+            num_colors: 颜色查找表的初始长度，遇到更大的类别序号时自动扩展
+        """
+        self.class_names = class_names
+        self._label_sprites = {}  # (标签文本, 类别) -> (标签贴图, 文字高度)
+        self._local = threading.local()  # 每个线程各自复用的输出缓冲区
+        self._build_lut(max(num_colors, len(class_names) if class_names else 0))
+
+    def _build_lut(self, size: int):
+        """生成类别颜色、中心点颜色、文字颜色查找表"""
+        colors = [class_color(i) for i in range(size)]
+        self.colors = colors
+        self.dark_colors = [tuple(int(c * 0.7) for c in color) for color in colors]
+        self.text_colors = [(0, 0, 0) if sum(color) / 3 > 127 else (255, 255, 255) for color in colors]
+
+    def _label(self, cls: int, conf: float) -> str:
+        if self.class_names and cls < len(self.class_names):
+            return f"{self.class_names[cls]} {conf:.2f}"
+        return f"cls:{cls} conf:{conf:.2f}"
+
+    def _label_sprite(self, label: str, cls: int) -> tuple:
+        """
+        返回 (标签贴图, 文字高度)，贴图为类别颜色背景上已绘制好文字的小图
+
+        贴图区域与原先的背景矩形完全相同，绘制时直接按切片拷贝，
+        避免每个框都调用getTextSize和putText。
+        """
+        key = (label, cls)
+        entry = self._label_sprites.get(key)
+        if entry is None:
+            if len(self._label_sprites) >= self.LABEL_CACHE_SIZE:
+                self._label_sprites.clear()
+            (text_width, text_height), baseline = cv2.getTextSize(label, self.FONT, self.FONT_SCALE,
+                                                                  self.FONT_THICKNESS)
+            padding = self.LABEL_PADDING
+            sprite = np.empty((text_height + padding + baseline + 1, text_width + padding * 2 + 1, 3),
+                              dtype=np.uint8)
+            sprite[:] = self.colors[cls]
+            cv2.putText(sprite, label, (padding, text_height), self.FONT, self.FONT_SCALE,
+                        self.text_colors[cls], self.FONT_THICKNESS)
+            entry = (sprite, text_height)
+            self._label_sprites[key] = entry
+        return entry
+
+    def output_buffer(self, image: np.ndarray) -> np.ndarray:
+        """返回当前线程复用的、与image同尺寸的输出缓冲区（内容未初始化，由draw拷贝原图）"""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or buffer.shape != image.shape or buffer.dtype != image.dtype:
+            buffer = np.empty_like(image)
+            self._local.buffer = buffer
+        return buffer
+
+    def draw(self, image: np.ndarray, boxes: np.ndarray, confidences: np.ndarray,
+             classes: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        绘制检测框
+
+        Args:
+            image: 原始BGR图像，不会被修改（out为image本身时除外）
+            boxes: [N, 4] 整数 x1, y1, x2, y2
+            confidences: [N] 置信度
+            classes: [N] 整数类别序号
+            out: 输出图像；None时新建拷贝，传入image本身则原地绘制，
+                 也可传入 output_buffer() 返回的复用缓冲区
+
+        Returns:
+            绘制后的图像（即out）
+        """
+        if out is None:
+            out = image.copy()
+        elif out is not image:
+            np.copyto(out, image)
+        if len(boxes) == 0:
+            return out
+
+        if len(classes) and int(classes.max()) >= len(self.colors):
+            self._build_lut(int(classes.max()) + 1)
+
+        # 中心点与标签位置一次性算出
+        boxes = np.asarray(boxes, dtype=np.int64)
+        centers = (boxes[:, :2] + boxes[:, 2:]) // 2
+        entries = [self._label_sprite(self._label(cls, conf), cls)
+                   for cls, conf in zip(classes.tolist(), confidences.tolist())]
+        text_h = np.fromiter((entry[1] for entry in entries), dtype=np.int64, count=len(entries))
+        label_y = np.maximum(boxes[:, 1] - 10, text_h + self.LABEL_PADDING)  # 确保标签不会超出图像顶部
+        label_top = label_y - text_h - self.LABEL_PADDING
+
+        height, width = out.shape[:2]
+        colors, dark_colors = self.colors, self.dark_colors
+        for box, center, top, cls, (sprite, _) in zip(boxes.tolist(), centers.tolist(),
+                                                       label_top.tolist(), classes.tolist(), entries):
+            x1, y1, x2, y2 = box
+            color = colors[cls]
+            cv2.rectangle(out, (x1, y1), (x2, y2), color, self.BOX_THICKNESS)
+            cv2.circle(out, (center[0], center[1]), self.CENTER_RADIUS, dark_colors[cls], -1)
+
+            # 标签贴图按图像边界裁剪后拷贝
+            sprite_h, sprite_w = sprite.shape[:2]
+            dst_x0, dst_y0 = max(x1, 0), max(top, 0)
+            dst_x1, dst_y1 = min(x1 + sprite_w, width), min(top + sprite_h, height)
+            if dst_x0 < dst_x1 and dst_y0 < dst_y1:
+                out[dst_y0:dst_y1, dst_x0:dst_x1] = sprite[dst_y0 - top:dst_y1 - top,
+                                                           dst_x0 - x1:dst_x1 - x1]
+        return out
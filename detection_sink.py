@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检测结果导出
+逐张图片/逐帧追加记录（来源、时间戳、推理耗时、检测框、类别、置信度）到JSONL或Parquet文件，
+记录先在内存中缓冲，攒够一批后一次性写入；之后分析检测结果无需重新推理或读取图片
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+# 文件后缀 -> 导出格式
+SINK_FORMATS = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.parquet': 'parquet'}
+
+class DetectionSink:
+    """
+    检测结果写入器
+
+    JSONL每批追加写入并flush；Parquet每批写入一个row group，close()后文件才完整。
+    add() 可在多个线程中调用。
+    """
+
+    def __init__(self, path: str, fmt: Optional[str] = None, buffer_size: int = 256,
+                 class_names: Optional[list] = None, append: bool = True):
+        """
+        初始化写入器
+
+        Args:
+            path: 输出文件路径
+            fmt: 'jsonl' 或 'parquet'，None时根据文件后缀判断
+            buffer_size: 缓冲的记录数，达到后批量写入
+            class_names: 类别名称列表，提供时每条记录附带类别名称
+            append: JSONL是否追加到已有文件；Parquet总是新建文件
+        """
+        if fmt is None:
+            fmt = SINK_FORMATS.get(os.path.splitext(path)[1].lower())
+            if fmt is None:
+                raise ValueError(f"无法根据后缀判断导出格式: {path}，可选后缀: {', '.join(SINK_FORMATS)}")
+        if fmt not in ('jsonl', 'parquet'):
+            raise ValueError(f"不支持的导出格式: {fmt}，可选: jsonl, parquet")
+
+        self.path = path
+        self.format = fmt
+        self.buffer_size = max(1, buffer_size)
+        self.class_names = class_names
+        self.records = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._file = None
+        self._parquet_writer = None
+        if fmt == 'jsonl':
+            self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+        else:
+            self._init_parquet()
+
+        # 进程退出前写出缓冲中的记录
+        atexit.register(self.close)
+
+    def _init_parquet(self):
+        """按需导入pyarrow并创建写入器"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet导出需要安装 pyarrow: pip install pyarrow")
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ('source', pa.string()),
+            ('frame', pa.int64()),
+            ('timestamp', pa.float64()),
+            ('inference_ms', pa.float64()),
+            ('width', pa.int32()),
+            ('height', pa.int32()),
+            ('num_detections', pa.int32()),
+            ('boxes', pa.list_(pa.list_(pa.float32(), 4))),
+            ('confidences', pa.list_(pa.float32())),
+            ('classes', pa.list_(pa.int32())),
+            ('labels', pa.list_(pa.string())),
+        ])
+        self._parquet_writer = pq.ParquetWriter(self.path, self._schema)
+
+    def add(self, source: str, detections, frame: Optional[int] = None,
+            timestamp: Optional[float] = None, inference_ms: Optional[float] = None,
+            shape: Optional[tuple] = None):
+        """
+        添加一条记录
+
+        Args:
+            source: 图片文件名或视频流地址
+            detections: Detections或 [N, 6] 数组 (x1, y1, x2, y2, 置信度, 类别)
+            frame: 视频帧号，图片为None
+            timestamp: Unix时间戳（秒），默认为当前时间
+            inference_ms: 推理耗时（毫秒），批量推理时为按图片数平摊后的耗时
+            shape: 原图尺寸 (高, 宽, ...)
+        """
+        data = getattr(detections, 'data', detections)
+        data = np.zeros((0, 6)) if data is None else np.asarray(data, dtype=np.float64)
+        classes = data[:, 5].astype(np.int32).tolist()
+        record = {
+            'source': str(source),
+            'frame': frame,
+            'timestamp': round(time.time() if timestamp is None else timestamp, 6),
+            'inference_ms': None if inference_ms is None else round(float(inference_ms), 3),
+            'width': None if shape is None else int(shape[1]),
+            'height': None if shape is None else int(shape[0]),
+            'num_detections': len(data),
+            'boxes': np.round(data[:, :4], 1).tolist(),
+            'confidences': np.round(data[:, 4], 4).tolist(),
+            'classes': classes,
+        }
+        if self.class_names is not None:
+            record['labels'] = [self._label(cls) for cls in classes]
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("检测结果写入器已关闭")
+            self._buffer.append(record)
+            if len(self._buffer) >= self.buffer_size:
+                self._write_buffer()
+
+    def _label(self, cls: int) -> str:
+        if cls < len(self.class_names):
+            return str(self.class_names[cls])
+        return f"cls:{cls}"
+
+    def _write_buffer(self):
+        """写出缓冲中的记录，调用方需持有锁"""
+        if not self._buffer:
+            return
+        records, self._buffer = self._buffer, []
+        if self.format == 'jsonl':
+            self._file.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records))
+            self._file.flush()
+        else:
+            columns = {name: [r.get(name) for r in records] for name in self._schema.names}
+            self._parquet_writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+        self.records += len(records)
+
+    def flush(self):
+        """立即写出缓冲中的记录"""
+        with self._lock:
+            if not self._closed:
+                self._write_buffer()
+
+    def close(self):
+        """写出剩余记录并关闭文件，可重复调用"""
+        with self._lock:
+            if self._closed:
+                return
+            self._write_buffer()
+            self._closed = True
+            if self._file is not None:
+                self._file.close()
+            if self._parquet_writer is not None:
+                self._parquet_writer.close()
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> 'DetectionSink':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def read_detections(path: str) -> List[dict]:
+    """读取导出的检测结果，返回记录列表"""
+    if path.lower().endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("读取Parquet需要安装 pyarrow: pip install pyarrow")
+        return pq.read_table(path).to_pylist()
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
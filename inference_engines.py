@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+推理引擎选择与模型转换缓存
+将.pt权重一次性导出为ONNX Runtime / OpenVINO / TorchScript格式，
+导出结果按权重文件哈希缓存，之后直接交给DetectMultiBackend加载
+"""
+
+import hashlib
+import importlib
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Optional
+
+# 添加yolov5路径到系统路径
+sys.path.append(str(Path(__file__).parent / 'yolov5'))
+
+# 引擎名称 -> (yolov5导出格式, 导出产物后缀, 运行时依赖模块)
+ENGINES = {
+    'torch': (None, None, None),
+    'onnxruntime': ('onnx', '.onnx', 'onnxruntime'),
+    'openvino': ('openvino', '_openvino_model', 'openvino'),
+    'torchscript': ('torchscript', '.torchscript', None),
+    'stub': (None, None, None),  # 离线替身模型，model_path为配置而非权重文件，见stub_backend
+}
+
+# 离线替身模型的引擎名称
+STUB_ENGINE = 'stub'
+
+# 导出缓存目录的环境变量
+CACHE_DIR_ENV = 'YOLO_ENGINE_CACHE'
+
+def default_cache_dir() -> Path:
+    """返回转换产物缓存目录"""
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if cache_dir:
+        return Path(cache_dir)
+    return Path.home() / '.cache' / 'yolo_detection_gui' / 'engines'
+
+def weights_hash(model_path: str, chunk_size: int = 1 << 20) -> str:
+    """计算权重文件的SHA256"""
+    sha = hashlib.sha256()
+    with open(model_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def check_engine_available(engine: str):
+    """检查引擎名称和运行时依赖"""
+    if engine not in ENGINES:
+        raise ValueError(f"不支持的推理引擎: {engine}，可选: {', '.join(ENGINES)}")
+
+    module_name = ENGINES[engine][2]
+    if module_name is None:
+        return
+    try:
+        importlib.import_module(module_name)
+    except ImportError:
+        raise RuntimeError(f"推理引擎 {engine} 需要安装 {module_name}: pip install {module_name}")
+
+def resolve_engine_weights(model_path: str, engine: str, imgsz: tuple, half: bool = False,
+                           cache_dir: Optional[str] = None) -> str:
+    """
+    返回可由DetectMultiBackend加载的权重路径，必要时先导出并缓存
+
+    Args:
+        model_path: 原始.pt权重路径
+        engine: 推理引擎名称，见ENGINES
+        imgsz: 导出输入尺寸 (高, 宽)
+        half: 是否导出fp16模型（仅CUDA）
+        cache_dir: 缓存目录，默认见default_cache_dir
+
+    Returns:
+        转换后的权重路径；engine为'torch'时原样返回model_path
+    """
+    check_engine_available(engine)
+    export_format, suffix, _ = ENGINES[engine]
+    if export_format is None:
+        return model_path
+
+    # 缓存键：权重内容 + 引擎 + 输入尺寸 + 精度
+    digest = weights_hash(model_path)[:16]
+    key = f"{digest}_{engine}_{imgsz[0]}x{imgsz[1]}_{'fp16' if half else 'fp32'}"
+    target_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+    target_dir = target_dir / key
+
+    stem = Path(model_path).stem
+    cached_weights = target_dir / f"{stem}.pt"
+    artifact = target_dir / f"{stem}{suffix}"
+
+    if artifact.exists():
+        print(f"使用已缓存的{engine}模型: {artifact}")
+        return str(artifact)
+
+    print(f"首次使用{engine}引擎，正在导出模型到: {target_dir}")
+    target_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(model_path, cached_weights)
+
+    # yolov5的导出脚本依赖 models / utils 顶层包，延迟导入
+    from yolov5.export import run as export_run
+    export_run(
+        weights=str(cached_weights),
+        imgsz=list(imgsz),
+        include=(export_format,),
+        half=half,
+        device='0' if half else 'cpu',
+        dynamic=engine in ('onnxruntime', 'openvino'),  # 动态batch以支持批量推理
+    )
+
+    if not artifact.exists():
+        raise RuntimeError(f"模型导出失败，未找到: {artifact}")
+
+    # 中间文件（原始权重副本）不再需要
+    cached_weights.unlink(missing_ok=True)
+    return str(artifact)
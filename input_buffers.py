@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+预处理输入缓冲区复用
+letterbox画布、（CUDA上锁页的）主机缓冲区、设备端uint8缓冲区和模型输入张量
+按 (batch, 高, 宽) 预先分配，之后每帧只做原地写入
+"""
+
+import threading
+from typing import Optional
+
+import cv2
+import numpy as np
+import torch
+
+class InputBuffers:
+    """
+    一组固定形状的预处理缓冲区
+
+    host为 [B, H, W, 3] uint8 的numpy视图，letterbox结果直接写入；
+    upload() 将其传到设备并原地转换为 [B, 3, H, W] 的模型输入。
+    """
+
+    def __init__(self, batch: int, height: int, width: int, device: torch.device,
+                 dtype: torch.dtype, memory_format: torch.memory_format):
+        use_cuda = device.type == 'cuda'
+        self.host_tensor = torch.empty((batch, height, width, 3), dtype=torch.uint8, pin_memory=use_cuda)
+        self.host = self.host_tensor.numpy()
+        self.device_u8 = torch.empty_like(self.host_tensor, device=device) if use_cuda else None
+        self.output = torch.empty((batch, 3, height, width), dtype=dtype, device=device)
+        self.output = self.output.contiguous(memory_format=memory_format)
+        # 异步拷贝完成事件：主机缓冲区在拷贝完成前不能被覆盖
+        self.copy_event = torch.cuda.Event() if use_cuda else None
+        # 各槽位上次写入的letterbox几何参数，几何不变时边框无需重新填充
+        self.geometry = [None] * batch
+
+    def wait_host(self):
+        """等待上一次主机到设备的异步拷贝完成"""
+        if self.copy_event is not None:
+            self.copy_event.synchronize()
+
+    def upload(self) -> torch.Tensor:
+        """传输到设备，HWC->CHW并归一化到[0, 1]，返回复用的输入张量"""
+        if self.device_u8 is not None:
+            self.device_u8.copy_(self.host_tensor, non_blocking=True)
+            self.copy_event.record()
+            source = self.device_u8
+        else:
+            source = self.host_tensor
+        # copy_同时完成类型转换和布局转换，channels-last时是直接的逐元素拷贝
+        self.output.copy_(source.permute(0, 3, 1, 2))
+        return self.output.div_(255.0)
+
+class InputBufferPool:
+    """
+    预处理缓冲区池
+
+    每个线程各自持有缓冲区，返回的输入张量在同一线程下一次取用前有效。
+    """
+
+    def __init__(self, device: torch.device, dtype: torch.dtype,
+                 memory_format: torch.memory_format = torch.contiguous_format, max_entries: int = 8):
+        """
+        初始化缓冲区池
+
+        Args:
+            device: 推理设备
+            dtype: 模型输入精度
+            memory_format: 模型输入内存格式
+            max_entries: 每个线程缓存的形状数量上限，超过时清空
+        """
+        self.device = device
+        self.dtype = dtype
+        self.memory_format = memory_format
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self.allocations = 0  # 新建缓冲区组的次数
+
+    def get(self, batch: int, height: int, width: int) -> InputBuffers:
+        """取出指定形状的缓冲区，不存在时分配"""
+        entries = getattr(self._local, 'entries', None)
+        if entries is None:
+            entries = self._local.entries = {}
+        key = (batch, height, width)
+        buffers = entries.get(key)
+        if buffers is None:
+            if len(entries) >= self.max_entries:
+                entries.clear()
+            buffers = InputBuffers(batch, height, width, self.device, self.dtype, self.memory_format)
+            entries[key] = buffers
+            self.allocations += 1
+        return buffers
+
+    def clear(self):
+        """释放当前线程的缓冲区"""
+        self._local.entries = {}
+
+def letterbox_geometry(shape: tuple, imgsz: tuple) -> tuple:
+    """
+    计算letterbox缩放几何参数
+
+    Args:
+        shape: 原图尺寸 (高, 宽, ...)
+        imgsz: 模型输入尺寸 (高, 宽)
+
+    Returns:
+        (缩放后尺寸(宽, 高), 边框(上, 下, 左, 右), ratio_pad ((gain, gain), (pad_w, pad_h)))
+    """
+    h0, w0 = shape[0], shape[1]
+    new_h, new_w = imgsz
+    gain = min(new_h / h0, new_w / w0)
+    unpad_w, unpad_h = int(round(w0 * gain)), int(round(h0 * gain))
+
+    # 填充均分到两侧
+    dw, dh = (new_w - unpad_w) / 2, (new_h - unpad_h) / 2
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    return (unpad_w, unpad_h), (top, bottom, left, right), ((gain, gain), (dw, dh))
+
+def letterbox_into(image: np.ndarray, geometry: tuple, canvas: np.ndarray, fill_value: tuple,
+                   previous: Optional[tuple] = None) -> np.ndarray:
+    """
+    将image按letterbox几何参数直接缩放到canvas中
+
+    Args:
+        image: 原始BGR图像
+        geometry: letterbox_geometry 的返回值
+        canvas: [H, W, 3] 目标画布
+        fill_value: 边框颜色
+        previous: 该画布上次使用的几何参数，相同时跳过边框填充
+
+    Returns:
+        canvas
+    """
+    (unpad_w, unpad_h), (top, bottom, left, right), _ = geometry
+    if geometry != previous:
+        canvas[:] = fill_value
+    region = canvas[top:top + unpad_h, left:left + unpad_w]
+    if (image.shape[1], image.shape[0]) != (unpad_w, unpad_h):
+        # 直接写入画布的切片视图，省去中间图像和copyMakeBorder
+        cv2.resize(image, (unpad_w, unpad_h), dst=region, interpolation=cv2.INTER_LINEAR)
+    else:
+        region[:] = image
+    return canvas
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多路视频流检测
+每路视频流一个抓帧线程，所有视频流共享同一个YOLOPredictor，
+各路的最新帧拼成一个批次推理，结果按视频流分发
+"""
+
+import threading
+import time
+from typing import Iterator, List, Optional
+
+from stream_capture import DROP_OLDEST, FrameGrabber
+
+def load_stream_list(path: str) -> List[str]:
+    """从文本文件读取视频流URL，每行一个，忽略空行和#开头的注释"""
+    urls = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                urls.append(line)
+    return urls
+
+class StreamStats:
+    """单路视频流的处理统计"""
+
+    def __init__(self, index: int, url: str):
+        self.index = index
+        self.url = url
+        self.processed = 0
+        self.latency_sum = 0.0
+        self.last_latency = 0.0
+        self.start_time = time.monotonic()
+
+    def update(self, latency_ms: float):
+        self.processed += 1
+        self.latency_sum += latency_ms
+        self.last_latency = latency_ms
+
+    def as_dict(self, grabber: FrameGrabber) -> dict:
+        elapsed = max(1e-6, time.monotonic() - self.start_time)
+        grabber_stats = grabber.stats()
+        return {
+            'index': self.index,
+            'url': self.url,
+            'processed': self.processed,
+            'fps': self.processed / elapsed,
+            'latency_ms': self.last_latency,
+            'mean_latency_ms': self.latency_sum / max(1, self.processed),
+            'captured': grabber_stats['captured'],
+            'dropped': grabber_stats['dropped'],
+            'depth': grabber_stats['depth'],
+            'reconnects': grabber_stats['reconnects'],
+            'downtime_seconds': grabber_stats['downtime_seconds'],
+            'ended': grabber.finished,
+        }
+
+class MultiStreamDetector:
+    """
+    多路视频流检测器
+
+    推理线程轮询各路抓帧器，取出已就绪的最新帧组成批次，
+    调用一次predict_batch完成所有视频流的推理。
+    """
+
+    def __init__(self, predictor, urls: List[str], batch_size: Optional[int] = None,
+                 drop_policy: str = DROP_OLDEST, buffer_size: int = 1, idle_wait: float = 0.005,
+                 reconnect: bool = False, stall_timeout: float = 10.0,
+                 max_reconnects: Optional[int] = None, render: bool = True, encode: bool = True):
+        """
+        初始化多路检测器
+
+        Args:
+            predictor: 共享的YOLOPredictor
+            urls: 视频流URL列表
+            batch_size: 单批次最多包含的帧数，默认等于视频流数量
+            drop_policy: 各路抓帧器的丢帧策略
+            buffer_size: 各路抓帧器的帧缓冲区容量
+            idle_wait: 没有就绪帧时的等待秒数
+            reconnect: 各路视频流断开或卡顿时是否自动重连
+            stall_timeout: 超过该秒数没有新帧视为卡顿
+            max_reconnects: 连续重连失败的最大次数，None表示不限
+            render: False时只产出检测结果，不绘制也不编码JPEG
+            encode: False时产出绘制好的BGR图像（numpy数组）而不是编码后的二进制流
+        """
+        if not urls:
+            raise ValueError("视频流列表为空")
+        self.predictor = predictor
+        self.urls = list(urls)
+        self.batch_size = batch_size or len(self.urls)
+        self.drop_policy = drop_policy
+        self.buffer_size = buffer_size
+        self.capture_options = {
+            'reconnect': reconnect,
+            'stall_timeout': stall_timeout,
+            'max_reconnects': max_reconnects,
+        }
+        self.idle_wait = idle_wait
+        self.render = render
+        self.encode = encode
+        self.grabbers = []
+        self.stream_stats = [StreamStats(i, url) for i, url in enumerate(self.urls)]
+        self._next_index = 0  # 轮询起点，保证各路公平
+
+    def _start_grabbers(self):
+        # 每次运行重新创建抓帧器和统计，不沿用上次运行已停止的抓帧器
+        self.grabbers = []
+        self.stream_stats = [StreamStats(i, url) for i, url in enumerate(self.urls)]
+        self._next_index = 0
+        for i, url in enumerate(self.urls):
+            grabber = FrameGrabber(url, drop_policy=self.drop_policy, capacity=self.buffer_size,
+                                   name=f"stream-{i:02d}", metrics=self.predictor.metrics,
+                                   **self.capture_options)
+            try:
+                grabber.start()
+            except RuntimeError as e:
+                # 只有未开启重连时才会抛出，开启时由抓帧线程按退避重试
+                print(f"视频流 {i:02d} 打开失败: {e}")
+                grabber.ended = True
+            self.grabbers.append(grabber)
+
+    def _stop_grabbers(self):
+        for grabber in self.grabbers:
+            grabber.stop()
+
+    def _collect_batch(self) -> list:
+        """从各路抓帧器非阻塞地取出最新帧，最多batch_size帧"""
+        batch = []
+        count = len(self.grabbers)
+        for offset in range(count):
+            index = (self._next_index + offset) % count
+            frame = self.grabbers[index].read(timeout=0)
+            if frame is not None:
+                batch.append((index, frame))
+                if len(batch) >= self.batch_size:
+                    self._next_index = (index + 1) % count
+                    break
+        else:
+            self._next_index = (self._next_index + 1) % max(1, count)
+        return batch
+
+    def run(self, stop_event: Optional[threading.Event] = None,
+            stats_interval: float = 5.0) -> Iterator[tuple]:
+        """
+        运行多路检测，直到stop_event被设置或所有视频流结束
+
+        Yields:
+            (视频流序号, JPEG二进制流, 检测结果, 帧信息)，帧信息包含 frame_id、timestamp（抓帧时间，Unix时间）、latency_ms；
+            render为False时JPEG二进制流为None
+        """
+        stop_event = stop_event or threading.Event()
+        self._start_grabbers()
+        last_report = time.monotonic()
+
+        try:
+            while not stop_event.is_set():
+                batch = self._collect_batch()
+                if not batch:
+                    if all(grabber.finished for grabber in self.grabbers):
+                        print("所有视频流均已结束")
+                        break
+                    time.sleep(self.idle_wait)
+                    continue
+
+                try:
+                    with self.predictor._trace_frame([f"{index}:{frame.frame_id}" for index, frame in batch]):
+                        results = self.predictor.predict_batch([frame.image for _, frame in batch],
+                                                               batch_size=len(batch), render=self.render)
+                except Exception as e:
+                    print(f"多路批次推理出错: {e}")
+                    self.predictor.metrics.incr('errors', len(batch))
+                    continue
+
+                for (index, frame), result in zip(batch, results):
+                    # 取结果时完成绘制与编码，延迟统计包含这部分耗时
+                    with self.predictor._trace_frame(f"{index}:{frame.frame_id}"):
+                        jpeg_data = result.jpeg if self.encode else result.annotated
+                    detections = result.detections
+                    self.predictor._record_detections(self.urls[index], detections, result.shape,
+                                                      result.inference_ms, frame=frame.frame_id)
+                    latency_ms = (time.monotonic() - frame.timestamp) * 1000
+                    self.stream_stats[index].update(latency_ms)
+                    yield index, jpeg_data, detections, {
+                        'frame_id': frame.frame_id,
+                        'timestamp': frame.wall_time,
+                        'latency_ms': latency_ms,
+                    }
+
+                now = time.monotonic()
+                if stats_interval and now - last_report >= stats_interval:
+                    for line in self.format_stats():
+                        print(line)
+                    last_report = now
+        finally:
+            self._stop_grabbers()
+
+    def stats(self) -> List[dict]:
+        """返回各路视频流的统计信息"""
+        return [stats.as_dict(grabber) for stats, grabber in zip(self.stream_stats, self.grabbers)]
+
+    def format_stats(self) -> List[str]:
+        """返回各路统计信息的文本行"""
+        lines = []
+        for item in self.stats():
+            lines.append(f"视频流 {item['index']:02d}: {item['fps']:.1f} FPS，"
+                         f"平均延迟 {item['mean_latency_ms']:.1f} ms，"
+                         f"已处理 {item['processed']} 帧，已丢弃 {item['dropped']} 帧，"
+                         f"重连 {item['reconnects']} 次"
+                         f"{'（已结束）' if item['ended'] else ''}")
+        return lines
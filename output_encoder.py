@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+结果图像编码配置
+控制输出格式（JPEG / PNG / WebP / 未压缩BMP）、质量、JPEG优化/渐进式选项
+以及编码前的缩小比例，编码参数在构造时一次性生成
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+
+# 格式名称 -> (文件后缀, 质量参数, 质量取值范围, 默认质量)
+FORMATS = {
+    'jpg': ('.jpg', cv2.IMWRITE_JPEG_QUALITY, (0, 100), 95),
+    'png': ('.png', cv2.IMWRITE_PNG_COMPRESSION, (0, 9), 1),
+    'webp': ('.webp', cv2.IMWRITE_WEBP_QUALITY, (1, 101), 95),  # 大于100为无损
+    'bmp': ('.bmp', None, None, None),  # 不压缩，编码最快
+}
+
+# 与格式等价的其他文件后缀
+SUFFIX_ALIASES = {'.jpeg': 'jpg'}
+
+class OutputEncoder:
+    """结果图像编码器"""
+
+    def __init__(self, fmt: str = 'jpg', quality: Optional[int] = None, optimize: bool = False,
+                 progressive: bool = False, scale: float = 1.0):
+        """
+        初始化编码器
+
+        Args:
+            fmt: 输出格式，'jpg'、'png'、'webp' 或 'bmp'
+            quality: jpg/webp为质量 (jpg 0-100，webp 1-100，101为无损)，png为压缩级别 (0-9)，
+                     None时使用各格式默认值，bmp忽略该参数
+            optimize: JPEG是否优化霍夫曼表（体积更小、编码稍慢）
+            progressive: JPEG是否使用渐进式编码
+            scale: 编码前的缩放比例，(0, 1]，1表示不缩放
+        """
+        fmt = fmt.lower().lstrip('.')
+        fmt = SUFFIX_ALIASES.get(f'.{fmt}', fmt)
+        if fmt not in FORMATS:
+            raise ValueError(f"不支持的输出格式: {fmt}，可选: {', '.join(FORMATS)}")
+        if not 0 < scale <= 1:
+            raise ValueError(f"缩放比例必须在 (0, 1] 范围内: {scale}")
+
+        suffix, quality_flag, quality_range, default_quality = FORMATS[fmt]
+        if quality is not None and quality_range is not None:
+            low, high = quality_range
+            if not low <= quality <= high:
+                raise ValueError(f"{fmt} 的质量参数必须在 {low}-{high} 之间: {quality}")
+
+        self.format = fmt
+        self.suffix = suffix
+        self.quality = default_quality if quality is None else quality
+        self.optimize = optimize and fmt == 'jpg'
+        self.progressive = progressive and fmt == 'jpg'
+        self.scale = scale
+
+        params = []
+        if quality_flag is not None:
+            params += [quality_flag, self.quality]
+        if self.optimize:
+            params += [cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+        if self.progressive:
+            params += [cv2.IMWRITE_JPEG_PROGRESSIVE, 1]
+        self.params = params
+
+    def encode(self, image: np.ndarray) -> bytes:
+        """按配置缩放并编码图像"""
+        if self.scale < 1:
+            height, width = image.shape[:2]
+            size = (max(1, int(round(width * self.scale))), max(1, int(round(height * self.scale))))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode(self.suffix, image, self.params)
+        if not ok:
+            raise RuntimeError(f"图像编码失败: {self.format}")
+        return buffer.tobytes()
+
+    def output_name(self, name: str) -> str:
+        """将输入文件名的后缀替换为输出格式的后缀（已匹配时保持不变）"""
+        path = Path(name)
+        suffix = path.suffix.lower()
+        if SUFFIX_ALIASES.get(suffix, suffix.lstrip('.')) == self.format:
+            return name
+        return f"{path.stem}{self.suffix}"
+
+    def describe(self) -> str:
+        """返回配置说明文本"""
+        parts = [self.format.upper()]
+        if self.quality is not None:
+            parts.append(f"{'压缩级别' if self.format == 'png' else '质量'} {self.quality}")
+        if self.optimize:
+            parts.append("优化")
+        if self.progressive:
+            parts.append("渐进式")
+        if self.scale < 1:
+            parts.append(f"缩放 {self.scale:g}")
+        return "，".join(parts)
+
+    def __repr__(self) -> str:
+        return (f"OutputEncoder(fmt={self.format!r}, quality={self.quality}, optimize={self.optimize}, "
+                f"progressive={self.progressive}, scale={self.scale})")
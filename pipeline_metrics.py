@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流水线分阶段耗时统计
+各阶段（抓帧、解码、预处理、推理、NMS、后处理、绘制、编码、写入）的耗时记录在固定容量的环形缓冲中，
+按最近的样本计算分位数；另有帧数、丢帧数、错误数计数和滑动窗口FPS。
+可通过Python接口读取、定期打印日志，或以Prometheus文本格式在本地HTTP端口暴露。
+CUDA上推理为异步提交，推理阶段只包含提交耗时，等待GPU的时间计入之后第一个需要结果的阶段（通常是NMS）
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+import numpy as np
+
+# 阶段名称 -> 显示名称，按流水线顺序排列
+STAGES = {
+    'capture': '抓帧',
+    'decode': '解码',
+    'preprocess': '预处理',
+    'inference': '推理',
+    'nms': 'NMS',
+    'postprocess': '后处理',
+    'draw': '绘制',
+    'encode': '编码',
+    'write': '写入',
+}
+
+# 计数器名称 -> 显示名称
+COUNTERS = {
+    'frames': '帧数',
+    'drops': '丢帧',
+    'errors': '错误',
+}
+
+class RollingHistogram:
+    """保存最近 size 个样本的环形缓冲，另外累计全部样本的数量和总和"""
+
+    __slots__ = ('samples', 'index', 'filled', 'count', 'total')
+
+    def __init__(self, size: int = 1024):
+        self.samples = np.zeros(size, dtype=np.float64)
+        self.index = 0
+        self.filled = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float):
+        self.samples[self.index] = value
+        self.index = (self.index + 1) % len(self.samples)
+        if self.filled < len(self.samples):
+            self.filled += 1
+        self.count += 1
+        self.total += value
+
+    def summary(self) -> dict:
+        """最近样本的分位数（毫秒）与累计数量/总和"""
+        if not self.filled:
+            return {'count': self.count, 'sum_ms': self.total, 'mean_ms': None,
+                    'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None}
+        recent = self.samples[:self.filled]
+        p50, p95, p99 = np.percentile(recent, (50, 95, 99))
+        return {
+            'count': self.count,
+            'sum_ms': round(self.total, 3),
+            'mean_ms': round(float(recent.mean()), 3),
+            'p50_ms': round(float(p50), 3),
+            'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3),
+            'max_ms': round(float(recent.max()), 3),
+        }
+
+class _StageTimer:
+    """with语句计时器，退出时记录耗时"""
+
+    __slots__ = ('metrics', 'stage', 'frame', 'start')
+
+    def __init__(self, metrics: 'PipelineMetrics', stage: str, frame=None):
+        self.metrics = metrics
+        self.stage = stage
+        self.frame = frame
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.record_span(self.stage, self.start, time.perf_counter(), self.frame)
+
+class PipelineMetrics:
+    """
+    流水线统计
+
+    record() / timer() 可在任意线程中调用，只在锁内写入环形缓冲，开销为微秒级。
+    设置了tracer（PipelineTracer）时，timer() 和 record_span() 同时记录执行追踪事件。
+    """
+
+    def __init__(self, window: int = 1024, fps_window: float = 5.0):
+        """
+        初始化统计
+
+        Args:
+            window: 每个阶段保留的最近样本数
+            fps_window: 计算FPS的滑动窗口秒数
+        """
+        self.window = window
+        self.fps_window = fps_window
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        self._frame_times = deque()
+        self._start_time = time.monotonic()
+        self._log_stop = None
+        self._server = None
+        self.tracer = None
+
+    def timer(self, stage: str, frame=None) -> _StageTimer:
+        """返回记录该阶段耗时的with语句计时器，frame为追踪事件的帧标识"""
+        return _StageTimer(self, stage, frame)
+
+    def record_span(self, stage: str, start: float, end: float, frame=None):
+        """记录一次阶段耗时，start/end为time.perf_counter()时间"""
+        self.record(stage, (end - start) * 1000)
+        tracer = self.tracer
+        if tracer is not None:
+            tracer.add(stage, start, end, frame)
+
+    def record(self, stage: str, elapsed_ms: float):
+        """记录一次阶段耗时（毫秒）"""
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = RollingHistogram(self.window)
+            histogram.add(elapsed_ms)
+
+    def incr(self, counter: str, n: int = 1):
+        """累加计数器"""
+        if n:
+            with self._lock:
+                self._counters[counter] = self._counters.get(counter, 0) + n
+
+    def frame_done(self, n: int = 1):
+        """记录完成的帧，用于帧数计数和FPS"""
+        now = time.monotonic()
+        with self._lock:
+            self._counters['frames'] += n
+            self._frame_times.append((now, n))
+            self._trim_frames(now)
+
+    def _trim_frames(self, now: float):
+        while self._frame_times and now - self._frame_times[0][0] > self.fps_window:
+            self._frame_times.popleft()
+
+    def fps(self) -> float:
+        """最近 fps_window 秒内的帧率"""
+        now = time.monotonic()
+        with self._lock:
+            self._trim_frames(now)
+            if not self._frame_times:
+                return 0.0
+            frames = sum(n for _, n in self._frame_times)
+            span = min(self.fps_window, now - self._start_time)
+            return frames / max(span, 1e-6)
+
+    def reset(self):
+        """清空所有统计"""
+        with self._lock:
+            self._stages.clear()
+            self._counters = dict.fromkeys(COUNTERS, 0)
+            self._frame_times.clear()
+            self._start_time = time.monotonic()
+
+    def snapshot(self) -> dict:
+        """返回当前统计：各阶段耗时分布、计数器、FPS和运行时长"""
+        fps = self.fps()
+        with self._lock:
+            stages = {name: self._stages[name].summary() for name in self._ordered_stages()}
+            counters = dict(self._counters)
+            uptime = time.monotonic() - self._start_time
+        return {'fps': round(fps, 2), 'uptime_seconds': round(uptime, 1),
+                'counters': counters, 'stages': stages}
+
+    def _ordered_stages(self) -> list:
+        known = [name for name in STAGES if name in self._stages]
+        return known + sorted(name for name in self._stages if name not in STAGES)
+
+    def format_summary(self) -> str:
+        """单行说明：FPS、计数器与各阶段P50耗时"""
+        snapshot = self.snapshot()
+        counters = snapshot['counters']
+        parts = [f"{snapshot['fps']:.1f} FPS",
+                 f"帧 {counters['frames']} / 丢 {counters['drops']} / 错 {counters['errors']}"]
+        stages = [f"{STAGES.get(name, name)} {stats['p50_ms']:.1f}"
+                  for name, stats in snapshot['stages'].items() if stats['p50_ms'] is not None]
+        if stages:
+            parts.append(" | ".join(stages) + " ms")
+        return "，".join(parts)
+
+    def prometheus_text(self, prefix: str = 'yolo') -> str:
+        """Prometheus文本格式的统计"""
+        snapshot = self.snapshot()
+        lines = [f"# HELP {prefix}_fps Frames per second over the last {self.fps_window:g} seconds",
+                 f"# TYPE {prefix}_fps gauge",
+                 f"{prefix}_fps {snapshot['fps']}"]
+        for name, value in snapshot['counters'].items():
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {value}"]
+
+        lines += [f"# HELP {prefix}_stage_latency_ms Stage latency over the most recent {self.window} samples",
+                  f"# TYPE {prefix}_stage_latency_ms summary"]
+        for name, stats in snapshot['stages'].items():
+            if stats['p50_ms'] is not None:
+                for quantile, key in (('0.5', 'p50_ms'), ('0.95', 'p95_ms'), ('0.99', 'p99_ms')):
+                    lines.append(f'{prefix}_stage_latency_ms{{stage="{name}",quantile="{quantile}"}} {stats[key]}')
+            lines.append(f'{prefix}_stage_latency_ms_sum{{stage="{name}"}} {stats["sum_ms"]}')
+            lines.append(f'{prefix}_stage_latency_ms_count{{stage="{name}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def start_logging(self, interval: float = 10.0, log: Callable[[str], None] = print):
+        """后台线程每隔interval秒输出一行统计，重复调用时替换之前的线程"""
+        self.stop_logging()
+        stop_event = threading.Event()
+
+        def run():
+            while not stop_event.wait(interval):
+                log(f"流水线统计: {self.format_summary()}")
+
+        threading.Thread(target=run, name='yolo-metrics-log', daemon=True).start()
+        self._log_stop = stop_event
+
+    def stop_logging(self):
+        if self._log_stop is not None:
+            self._log_stop.set()
+            self._log_stop = None
+
+    def serve(self, port: int = 9108, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """在后台线程中启动HTTP服务，GET /metrics 返回Prometheus文本，其余路径返回JSON快照"""
+        self.stop_serving()
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') in ('', '/metrics'):
+                    body = metrics.prometheus_text().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                else:
+                    body = json.dumps(metrics.snapshot(), ensure_ascii=False).encode('utf-8')
+                    content_type = 'application/json; charset=utf-8'
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # 不在控制台输出每个请求
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='yolo-metrics-http', daemon=True).start()
+        self._server = server
+        return server
+
+    def stop_serving(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def close(self):
+        """停止日志线程和HTTP服务"""
+        self.stop_logging()
+        self.stop_serving()
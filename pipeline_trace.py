@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流水线执行追踪
+按线程、按帧记录各阶段（抓帧、解码、预处理、推理、NMS、后处理、绘制、编码、写入）的起止时间，
+导出为Chrome trace JSON，可在 chrome://tracing 或 https://ui.perfetto.dev 中查看各线程的重叠与等待。
+事件写入固定容量的环形缓冲，记录时不加锁，容量用尽后覆盖最早的事件
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import List, Optional
+
+_NULL_SCOPE = nullcontext()
+
+class _Span:
+    """with语句追踪区间，退出时记录一个完整事件"""
+
+    __slots__ = ('tracer', 'name', 'frame', 'start')
+
+    def __init__(self, tracer: 'PipelineTracer', name: str, frame):
+        self.tracer = tracer
+        self.name = name
+        self.frame = frame
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.add(self.name, self.start, time.perf_counter(), self.frame)
+
+class _FrameScope:
+    """with语句期间为当前线程设置帧标识，退出时恢复之前的值"""
+
+    __slots__ = ('local', 'frame', 'previous')
+
+    def __init__(self, local: threading.local, frame):
+        self.local = local
+        self.frame = frame
+
+    def __enter__(self):
+        self.previous = getattr(self.local, 'frame', None)
+        self.local.frame = self.frame
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.local.frame = self.previous
+
+class PipelineTracer:
+    """
+    执行追踪器
+
+    add() / span() 可在任意线程中调用：序号由itertools.count分配（CPython中为原子操作），
+    每个事件写入各自的槽位，不需要加锁。事件记录为Chrome trace的完整事件（ph='X'），
+    参数frame为帧号、文件名或批次中各帧标识的列表，未指定时使用当前线程由frame()设置的值。
+    """
+
+    def __init__(self, capacity: int = 1 << 16, process_name: str = 'yolo'):
+        """
+        初始化追踪器
+
+        Args:
+            capacity: 环形缓冲保留的事件数
+            process_name: trace中显示的进程名称
+        """
+        self.capacity = max(1, capacity)
+        self.process_name = process_name
+        self._events = [None] * self.capacity
+        self._index = itertools.count()
+        self._local = threading.local()
+        self._threads = {}  # 线程标识 -> 线程名称
+        self._origin = time.perf_counter()
+
+    def frame(self, frame) -> _FrameScope:
+        """返回为当前线程设置帧标识的with语句上下文"""
+        return _FrameScope(self._local, frame)
+
+    def span(self, name: str, frame=None) -> _Span:
+        """返回记录一个区间的with语句上下文"""
+        return _Span(self, name, frame)
+
+    def add(self, name: str, start: float, end: float, frame=None):
+        """
+        记录一个区间
+
+        Args:
+            name: 阶段名称
+            start: 开始时间（time.perf_counter()）
+            end: 结束时间（time.perf_counter()）
+            frame: 帧标识，None时使用当前线程的帧标识
+        """
+        if frame is None:
+            frame = getattr(self._local, 'frame', None)
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        index = next(self._index)
+        self._events[index % self.capacity] = (index, name, tid, start, end, frame)
+
+    def clear(self):
+        """清空已记录的事件"""
+        self._events = [None] * self.capacity
+        self._index = itertools.count()
+        self._origin = time.perf_counter()
+
+    def events(self) -> List[dict]:
+        """返回按开始时间排序的Chrome trace事件，含进程与线程名称"""
+        pid = os.getpid()
+        trace = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                  'args': {'name': self.process_name}}]
+        trace += [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                  for tid, name in list(self._threads.items())]
+
+        spans = [event for event in list(self._events) if event is not None]
+        spans.sort(key=lambda event: event[3])
+        for _, name, tid, start, end, frame in spans:
+            event = {'name': name, 'cat': 'pipeline', 'ph': 'X', 'pid': pid, 'tid': tid,
+                     'ts': round((start - self._origin) * 1e6, 3),
+                     'dur': round((end - start) * 1e6, 3)}
+            if frame is not None:
+                event['args'] = {'frame': frame if isinstance(frame, (int, float, str)) else list(frame)}
+            trace.append(event)
+        return trace
+
+    def stats(self) -> dict:
+        """返回已记录的事件数与因缓冲用尽被覆盖的事件数"""
+        spans = [event for event in list(self._events) if event is not None]
+        total = max((event[0] for event in spans), default=-1) + 1
+        return {'recorded': total, 'kept': len(spans),
+                'dropped': max(0, total - self.capacity), 'threads': len(self._threads)}
+
+    def dump(self, path: str) -> int:
+        """保存为Chrome trace JSON，返回写入的区间事件数"""
+        events = self.events()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        return sum(1 for event in events if event['ph'] == 'X')
+
+    def format_stats(self) -> str:
+        """返回追踪统计的说明文本"""
+        stats = self.stats()
+        dropped = f"，覆盖最早的 {stats['dropped']} 个" if stats['dropped'] else ''
+        return f"执行追踪: {stats['kept']} 个事件，{stats['threads']} 个线程{dropped}"
+
+def trace_frame(tracer: Optional[PipelineTracer], frame):
+    """tracer为None时返回空上下文，调用方不必判断是否启用追踪"""
+    if tracer is None:
+        return _NULL_SCOPE
+    return tracer.frame(frame)
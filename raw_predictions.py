@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NMS前预测缓存
+保留最近处理的图片的模型原始输出，调整置信度/IOU阈值时只需重新执行NMS和绘制，不必重新推理。
+只保存目标置信度高于min_conf的候选框：NMS要求目标置信度高于置信度阈值，
+因此阈值不低于min_conf时，对保存的候选框NMS与对完整输出NMS的结果相同，占用却只有完整输出的很小一部分
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import torch
+
+class RawPrediction:
+    """单张图片的NMS前候选框及还原坐标所需的尺寸"""
+
+    __slots__ = ('candidates', 'input_shape', 'image_shape', 'min_conf')
+
+    def __init__(self, candidates: torch.Tensor, input_shape: tuple, image_shape: tuple, min_conf: float):
+        self.candidates = candidates  # [N, 5 + 类别数] float32 (CPU)
+        self.input_shape = input_shape  # 模型输入张量形状
+        self.image_shape = image_shape  # 原图形状
+        self.min_conf = min_conf  # 保存时的目标置信度下限
+
+    @property
+    def nbytes(self) -> int:
+        return self.candidates.numel() * self.candidates.element_size()
+
+class RawPredictionCache:
+    """
+    NMS前预测缓存（内存）
+
+    键为图片文件路径、大小和修改时间，文件修改后不会命中旧结果；
+    超过条目数或字节数上限时按最近使用淘汰。可在多个线程中使用。
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 256 << 20, min_conf: float = 0.1):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 保留的图片数上限
+            max_bytes: 候选框占用的字节数上限
+            min_conf: 保存的候选框目标置信度下限，低于该值的阈值无法只重新NMS
+        """
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self.min_conf = min_conf
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def file_key(path: str) -> str:
+        """由文件路径、大小和修改时间生成键"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        return f"{path}|{stat.st_size}|{stat.st_mtime_ns}"
+
+    def put(self, key: str, pred: torch.Tensor, input_shape: tuple, image_shape: tuple):
+        """
+        保存单张图片的模型原始输出
+
+        Args:
+            key: 图片的键，见file_key
+            pred: [锚点数, 5 + 类别数] 的原始预测
+            input_shape: 模型输入张量形状
+            image_shape: 原图形状
+        """
+        candidates = pred[pred[:, 4] > self.min_conf].float().cpu().contiguous()
+        entry = RawPrediction(candidates, tuple(input_shape), tuple(image_shape), self.min_conf)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._entries[key] = entry
+            self._bytes += entry.nbytes
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def get(self, key: str) -> Optional[RawPrediction]:
+        """返回缓存的原始预测，未命中返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """返回缓存统计信息"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def format_stats(self) -> str:
+        """返回缓存统计的说明文本"""
+        stats = self.stats()
+        return (f"NMS前预测缓存: {stats['entries']} 张，占用 {stats['bytes'] / (1 << 20):.1f} MB，"
+                f"命中 {stats['hits']} 次，未命中 {stats['misses']} 次，淘汰 {stats['evictions']} 张")
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检测结果磁盘缓存
+按 (图片内容哈希, 模型参数) 缓存检测结果，重复处理同一文件夹时只推理新增或修改过的图片；
+文件哈希按 (路径, 大小, 修改时间) 记住，未修改的文件无需重新读取计算哈希。
+缓存保存在SQLite数据库中，超过容量上限时按最近访问时间淘汰
+"""
+
+import atexit
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+# 缓存目录的环境变量
+RESULT_CACHE_ENV = 'YOLO_RESULT_CACHE'
+
+def default_result_cache_dir() -> Path:
+    """返回检测结果缓存目录"""
+    cache_dir = os.environ.get(RESULT_CACHE_ENV)
+    if cache_dir:
+        return Path(cache_dir)
+    return Path.home() / '.cache' / 'yolo_detection_gui' / 'results'
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """计算文件内容的BLAKE2b哈希"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ResultCache:
+    """
+    检测结果缓存
+
+    results表: 结果键 -> [N, 6] float32检测结果；
+    files表: 文件路径 -> (大小, 修改时间, 内容哈希)；
+    outputs表: 结果文件路径 -> 生成它的结果键、编码配置和字节数，用于判断结果图片是否需要重新生成。
+    可在多个线程中使用，写入每 commit_interval 次提交一次。
+    """
+
+    DB_NAME = 'results.sqlite3'
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 512 << 20,
+                 max_files: int = 1_000_000, commit_interval: int = 256):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录，默认见default_result_cache_dir
+            max_bytes: 检测结果占用的字节数上限，超过时淘汰最久未访问的结果
+            max_files: 记住哈希的文件数上限
+            commit_interval: 累计多少次写入后提交一次
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else default_result_cache_dir()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.commit_interval = max(1, commit_interval)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.cache_dir / self.DB_NAME), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY, detections BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL, checked REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS files_checked ON files (checked);
+            CREATE TABLE IF NOT EXISTS outputs (
+                path TEXT PRIMARY KEY, key TEXT NOT NULL, encoder TEXT NOT NULL, size INTEGER NOT NULL);
+        """)
+        self._total_bytes = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        self._file_count = self._db.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+        self._uncommitted = 0
+        self._closed = False
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # 进程退出前提交未保存的写入
+        atexit.register(self.close)
+
+    @staticmethod
+    def make_key(digest: str, params: str) -> str:
+        """由图片内容哈希和模型参数生成结果键"""
+        return hashlib.blake2b(f"{digest}|{params}".encode('utf-8'), digest_size=20).hexdigest()
+
+    def file_digest(self, path: str) -> str:
+        """返回文件内容哈希，文件大小和修改时间未变时直接使用记住的哈希"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            row = self._db.execute('SELECT size, mtime_ns, digest FROM files WHERE path = ?', (path,)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        digest = file_digest(path)
+        with self._lock:
+            if row is None:
+                self._file_count += 1
+            self._db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)',
+                             (path, stat.st_size, stat.st_mtime_ns, digest, time.time()))
+            if self._file_count > self.max_files:
+                self._trim_files()
+            self._wrote()
+        return digest
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """返回缓存的 [N, 6] 检测结果，未命中返回None"""
+        with self._lock:
+            row = self._db.execute('SELECT detections FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute('UPDATE results SET accessed = ? WHERE key = ?', (time.time(), key))
+            self._wrote()
+        return np.frombuffer(row[0], dtype=np.float32).reshape(-1, 6).copy()
+
+    def put(self, key: str, data: np.ndarray):
+        """保存检测结果，超过容量上限时淘汰旧结果"""
+        blob = np.ascontiguousarray(data, dtype=np.float32).tobytes()
+        size = len(blob) + len(key)
+        with self._lock:
+            old = self._db.execute('SELECT size FROM results WHERE key = ?', (key,)).fetchone()
+            if old:
+                self._total_bytes -= old[0]
+            self._db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                             (key, blob, size, time.time()))
+            self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._wrote()
+
+    def output_current(self, path: str, key: str, encoder: str) -> bool:
+        """结果图片是否存在且由同一结果键和编码配置生成"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return False
+        with self._lock:
+            row = self._db.execute('SELECT key, encoder, size FROM outputs WHERE path = ?',
+                                   (os.path.abspath(path),)).fetchone()
+        return row is not None and row == (key, encoder, size)
+
+    def put_output(self, path: str, key: str, encoder: str, size: int):
+        """记录结果图片由哪个结果键生成"""
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?)',
+                             (os.path.abspath(path), key, encoder, size))
+            self._wrote()
+
+    def _evict(self):
+        """淘汰最久未访问的结果，直到占用降到上限的90%以下，调用方需持有锁"""
+        target = self.max_bytes * 0.9
+        rows = self._db.execute('SELECT key, size FROM results ORDER BY accessed').fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            evicted.append((key,))
+            self._total_bytes -= size
+        self._db.executemany('DELETE FROM results WHERE key = ?', evicted)
+        self._db.executemany('DELETE FROM outputs WHERE key = ?', evicted)
+        self.evictions += len(evicted)
+
+    def _trim_files(self):
+        """删除最早记录的文件哈希，调用方需持有锁"""
+        excess = self._file_count - int(self.max_files * 0.9)
+        self._db.execute('DELETE FROM files WHERE path IN '
+                         '(SELECT path FROM files ORDER BY checked LIMIT ?)', (excess,))
+        self._file_count -= excess
+
+    def _wrote(self):
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_interval:
+            self._db.commit()
+            self._uncommitted = 0
+
+    def flush(self):
+        """提交未保存的写入"""
+        with self._lock:
+            if not self._closed:
+                self._db.commit()
+                self._uncommitted = 0
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._db.executescript('DELETE FROM results; DELETE FROM files; DELETE FROM outputs;')
+            self._db.commit()
+            self._total_bytes = 0
+            self._file_count = 0
+            self._uncommitted = 0
+
+    def close(self):
+        """提交并关闭数据库，可重复调用"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._db.commit()
+            self._db.close()
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> 'ResultCache':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def stats(self) -> dict:
+        """返回缓存统计信息"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'files': self._file_count,
+            }
+
+    def format_stats(self) -> str:
+        """返回缓存统计的说明文本"""
+        stats = self.stats()
+        total = stats['hits'] + stats['misses']
+        hit_rate = stats['hits'] / total * 100 if total else 0.0
+        return (f"结果缓存: 命中 {stats['hits']} 张，未命中 {stats['misses']} 张（命中率 {hit_rate:.1f}%），"
+                f"占用 {stats['bytes'] / (1 << 20):.1f}/{stats['max_bytes'] / (1 << 20):.0f} MB，"
+                f"淘汰 {stats['evictions']} 条")
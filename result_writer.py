@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步结果写入
+后台线程池负责写文件，推理线程只把 (路径, 数据) 放入有界队列；
+队列满时提交方阻塞，从而限制内存中积压的结果数量
+"""
+
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+class ResultWriter:
+    """
+    结果文件写入器
+
+    max_workers为0时在调用线程中同步写入，行为与直接写文件一致。
+    close()（或with语句结束、进程退出）会等待所有已提交的写入完成。
+    """
+
+    def __init__(self, max_workers: int = 2, queue_size: int = 64, fsync: bool = False,
+                 atomic: bool = False):
+        """
+        初始化写入器
+
+        Args:
+            max_workers: 写入线程数，0表示同步写入
+            queue_size: 已提交但尚未写完的文件数上限，超过时submit阻塞
+            fsync: 写完后调用fsync，确保数据落盘
+            atomic: 先写入同目录的临时文件再重命名，读取方不会看到写了一半的文件
+        """
+        self.max_workers = max(0, max_workers)
+        self.queue_size = max(1, queue_size)
+        self.fsync = fsync
+        self.atomic = atomic
+
+        self._executor = None
+        if self.max_workers > 0:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='yolo-writer')
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._closed = False
+        self.tracer = None  # 设置为PipelineTracer后记录每次写文件的起止时间
+
+        # 统计信息
+        self._pending = 0
+        self._max_pending = 0
+        self._files = 0
+        self._bytes = 0
+        self._write_seconds = 0.0
+        self._blocked_seconds = 0.0
+        self._errors = []
+        self._start_time = time.monotonic()
+        self._last_write_time = None
+
+        # 进程退出前确保所有结果都已写完
+        atexit.register(self.close)
+
+    def submit(self, path: str, data: bytes):
+        """提交一个写入任务，队列满时阻塞等待"""
+        if self._closed:
+            raise RuntimeError("写入器已关闭")
+        if self._executor is None:
+            self._write(path, data)
+            return
+
+        if not self._slots.acquire(blocking=False):
+            start = time.monotonic()
+            self._slots.acquire()
+            with self._lock:
+                self._blocked_seconds += time.monotonic() - start
+
+        with self._lock:
+            self._pending += 1
+            self._max_pending = max(self._max_pending, self._pending)
+        try:
+            self._executor.submit(self._run, path, data)
+        except Exception:
+            self._done()
+            raise
+
+    def _run(self, path: str, data: bytes):
+        try:
+            tracer = self.tracer
+            if tracer is None:
+                self._write(path, data)
+            else:
+                with tracer.span('write', os.path.basename(path)):
+                    self._write(path, data)
+        finally:
+            self._done()
+
+    def _done(self):
+        self._slots.release()
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.notify_all()
+
+    def _write(self, path: str, data: bytes):
+        """写入单个文件，出错时记录错误而不中断后续写入"""
+        start = time.monotonic()
+        target = path
+        if self.atomic:
+            target = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(target, 'wb') as f:
+                f.write(data)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            if self.atomic:
+                os.replace(target, path)
+                if self.fsync:
+                    self._fsync_dir(os.path.dirname(os.path.abspath(path)))
+        except OSError as e:
+            print(f"写入 {path} 失败: {e}")
+            if self.atomic and os.path.exists(target):
+                try:
+                    os.remove(target)
+                except OSError:
+                    pass
+            with self._lock:
+                self._errors.append((path, str(e)))
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self._files += 1
+            self._bytes += len(data)
+            self._write_seconds += now - start
+            self._last_write_time = now
+
+    @staticmethod
+    def _fsync_dir(directory: str):
+        """同步目录项，使重命名本身也落盘（Windows不支持打开目录，直接跳过）"""
+        if os.name == 'nt':
+            return
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待所有已提交的写入完成，超时返回False"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self):
+        """等待所有写入完成并释放线程池，可重复调用"""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> 'ResultWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def errors(self) -> List[tuple]:
+        """写入失败的 (路径, 错误信息) 列表"""
+        with self._lock:
+            return list(self._errors)
+
+    def stats(self) -> dict:
+        """返回写入统计信息"""
+        with self._lock:
+            end = self._last_write_time or time.monotonic()
+            elapsed = max(1e-6, end - self._start_time)
+            return {
+                'files': self._files,
+                'bytes': self._bytes,
+                'errors': len(self._errors),
+                'pending': self._pending,
+                'max_pending': self._max_pending,
+                'write_seconds': self._write_seconds,
+                'blocked_seconds': self._blocked_seconds,
+                'files_per_second': self._files / elapsed,
+                'mb_per_second': self._bytes / elapsed / (1 << 20),
+            }
+
+    def format_stats(self) -> str:
+        """返回写入统计的说明文本"""
+        stats = self.stats()
+        return (f"写入 {stats['files']} 个文件，共 {stats['bytes'] / (1 << 20):.1f} MB，"
+                f"{stats['mb_per_second']:.1f} MB/s（{stats['files_per_second']:.1f} 个/秒），"
+                f"写入线程累计耗时 {stats['write_seconds']:.2f} 秒，提交阻塞 {stats['blocked_seconds']:.2f} 秒，"
+                f"最大积压 {stats['max_pending']}，失败 {stats['errors']} 个")
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+视频流抓帧组件
+独立线程持续读取视频流，帧存入固定容量的环形缓冲区，
+缓冲区满时按策略丢帧或阻塞抓帧线程，消费方阻塞读取（支持超时）
+"""
+
+import threading
+import time
+from typing import Optional
+
+import cv2
+
+# 缓冲区满时的处理策略
+DROP_OLDEST = 'drop_oldest'  # 新帧覆盖最旧的帧，总是处理最新画面
+DROP_NEWEST = 'drop_newest'  # 保留已缓冲的帧，丢弃新到达的帧
+BLOCK = 'block'  # 阻塞抓帧线程直到有空位，不丢帧（适合视频文件）
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+class CapturedFrame:
+    """抓取到的一帧及其元数据"""
+
+    __slots__ = ('frame_id', 'timestamp', 'image')
+
+    def __init__(self, frame_id: int, timestamp: float, image):
+        self.frame_id = frame_id  # 从0开始的抓帧序号
+        self.timestamp = timestamp  # 抓帧完成时的time.monotonic()
+        self.image = image
+
+    @property
+    def wall_time(self) -> float:
+        """抓帧完成时的Unix时间，由monotonic时间戳换算，用于记录帧的实际时间"""
+        return time.time() - (time.monotonic() - self.timestamp)
+
+class FrameBuffer:
+    """
+    固定容量的线程安全环形缓冲区
+
+    put在缓冲区满时按policy处理，get阻塞到有数据、超时或缓冲区关闭。
+    """
+
+    def __init__(self, capacity: int = 1, policy: str = DROP_OLDEST):
+        """
+        初始化缓冲区
+
+        Args:
+            capacity: 缓冲区容量（帧数）
+            policy: 缓冲区满时的处理策略，见DROP_POLICIES
+        """
+        if capacity < 1:
+            raise ValueError(f"缓冲区容量必须大于0: {capacity}")
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"不支持的缓冲策略: {policy}，可选: {', '.join(DROP_POLICIES)}")
+        self.capacity = capacity
+        self.policy = policy
+
+        self._slots = [None] * capacity
+        self._head = 0  # 最旧元素的位置
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # 统计计数
+        self.put_count = 0
+        self.get_count = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.blocked_seconds = 0.0  # BLOCK策略下生产者累计等待时间
+
+    def put(self, item, timeout: Optional[float] = None) -> bool:
+        """
+        放入一个元素
+
+        Args:
+            item: 要放入的元素
+            timeout: BLOCK策略下最长等待秒数，None表示一直等待
+
+        Returns:
+            元素是否进入缓冲区（被丢弃、超时或缓冲区已关闭时返回False）
+        """
+        with self._cond:
+            if self._closed:
+                return False
+
+            if self._size == self.capacity:
+                if self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                if self.policy == DROP_OLDEST:
+                    self._slots[self._head] = None
+                    self._head = (self._head + 1) % self.capacity
+                    self._size -= 1
+                    self.dropped += 1
+                else:
+                    start = time.monotonic()
+                    has_room = self._cond.wait_for(
+                        lambda: self._size < self.capacity or self._closed, timeout=timeout
+                    )
+                    self.blocked_seconds += time.monotonic() - start
+                    if not has_room or self._closed:
+                        return False
+
+            tail = (self._head + self._size) % self.capacity
+            self._slots[tail] = item
+            self._size += 1
+            self.put_count += 1
+            self.max_depth = max(self.max_depth, self._size)
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout: Optional[float] = None):
+        """
+        取出最旧的元素
+
+        Args:
+            timeout: 最长等待秒数，None表示一直等待，0表示不等待
+
+        Returns:
+            取出的元素；超时或缓冲区已关闭且为空时返回None
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._size > 0 or self._closed, timeout=timeout):
+                return None
+            if self._size == 0:
+                return None
+
+            item = self._slots[self._head]
+            self._slots[self._head] = None
+            self._head = (self._head + 1) % self.capacity
+            self._size -= 1
+            self.get_count += 1
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        """关闭缓冲区，唤醒所有等待者；已缓冲的元素仍可取出"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        with self._cond:
+            return self._closed
+
+    def __len__(self) -> int:
+        with self._cond:
+            return self._size
+
+    def stats(self) -> dict:
+        """返回缓冲区统计"""
+        with self._cond:
+            return {
+                'capacity': self.capacity,
+                'depth': self._size,
+                'max_depth': self.max_depth,
+                'put': self.put_count,
+                'get': self.get_count,
+                'dropped': self.dropped,
+                'blocked_seconds': self.blocked_seconds,
+            }
+
+class FrameGrabber:
+    """
+    后台抓帧器
+
+    抓帧线程以视频源自身的速度调用cap.read()，使解码缓冲区不会堆积；
+    帧存入FrameBuffer，消费方通过read()取走，也可直接作为YOLOPredictor.iter_live_stream的帧源。
+
+    开启reconnect后，启动时打开失败、读取失败或看门狗发现超过stall_timeout没有新帧时，
+    按指数退避重新打开视频源，帧序号连续，消费方无需感知。
+    """
+
+    def __init__(self, source: str, drop_policy: str = DROP_OLDEST, capacity: int = 1,
+                 name: Optional[str] = None, reconnect: bool = False,
+                 max_reconnects: Optional[int] = None, backoff_initial: float = 0.5,
+                 backoff_max: float = 30.0, stall_timeout: float = 10.0, metrics=None):
+        """
+        初始化抓帧器
+
+        Args:
+            source: 视频流URL或视频文件路径
+            drop_policy: 缓冲区满时的处理策略，见DROP_POLICIES
+            capacity: 帧缓冲区容量，实时处理时通常为1
+            name: 线程名称，用于日志
+            reconnect: 读取失败或卡顿时是否自动重连
+            max_reconnects: 连续重连失败的最大次数，None表示不限
+            backoff_initial: 首次重连前的等待秒数，之后每次失败翻倍
+            backoff_max: 重连等待秒数上限
+            stall_timeout: 超过该秒数没有新帧视为卡顿
+            metrics: PipelineMetrics，提供时记录抓帧耗时和丢帧数
+        """
+        self.source = source
+        self.drop_policy = drop_policy
+        self.name = name or f"grabber-{source}"
+        self.buffer = FrameBuffer(capacity, drop_policy)
+
+        self.reconnect = reconnect
+        self.max_reconnects = max_reconnects
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stall_timeout = stall_timeout
+        self.metrics = metrics
+
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._watchdog = None
+        self._cap = None
+        self._stalled = threading.Event()  # 看门狗检测到卡顿，等待读取线程重连
+        self._last_frame_time = None
+
+        self.frames_captured = 0
+        self.ended = False  # 视频源已结束或读取失败
+
+        # 重连统计
+        self.reconnects = 0
+        self.stalls = 0
+        self.downtime_seconds = 0.0
+        self.connected = False
+
+    def _open_capture(self):
+        """打开视频源，网络流设置打开/读取超时，使卡住的read()能够返回"""
+        cap = None
+        if self.reconnect and isinstance(self.source, str) and self.stall_timeout:
+            open_timeout = getattr(cv2, 'CAP_PROP_OPEN_TIMEOUT_MSEC', None)
+            read_timeout = getattr(cv2, 'CAP_PROP_READ_TIMEOUT_MSEC', None)
+            if open_timeout is not None and read_timeout is not None:
+                timeout_ms = int(self.stall_timeout * 1000)
+                try:
+                    cap = cv2.VideoCapture(self.source, cv2.CAP_ANY,
+                                           [open_timeout, timeout_ms, read_timeout, timeout_ms])
+                except cv2.error:
+                    cap = None
+                if cap is not None and not cap.isOpened():
+                    cap.release()
+                    cap = None
+        if cap is None:
+            cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        return cap
+
+    def start(self) -> 'FrameGrabber':
+        """
+        打开视频源并启动抓帧线程，已启动时直接返回
+
+        打开失败时未开启reconnect则抛出RuntimeError；开启时由抓帧线程按退避重试，
+        视频源暂时不可用（如摄像头重启）不会使任务失败
+        """
+        if self._thread is not None:
+            return self
+
+        self._cap = self._open_capture()
+        if self._cap is None:
+            if not self.reconnect:
+                raise RuntimeError(f"无法打开视频流: {self.source}")
+            print(f"[{self.name}] 无法打开视频流，稍后重试: {self.source}")
+        else:
+            self.connected = True
+            self._last_frame_time = time.monotonic()
+
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        if self.reconnect and self.stall_timeout:
+            self._watchdog = threading.Thread(target=self._watch, name=f"{self.name}-watchdog", daemon=True)
+            self._watchdog.start()
+        return self
+
+    def stop(self):
+        """停止抓帧线程并释放视频源"""
+        self._stop_event.set()
+        self.buffer.close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    def __enter__(self) -> 'FrameGrabber':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _watch(self):
+        """看门狗：根据最后一帧的时间戳检测卡顿"""
+        interval = min(1.0, self.stall_timeout / 4)
+        while not self._stop_event.wait(interval):
+            if not self.connected or self._stalled.is_set():
+                continue
+            idle = time.monotonic() - self._last_frame_time
+            if idle > self.stall_timeout:
+                print(f"[{self.name}] {idle:.1f} 秒没有新帧，准备重连")
+                self.stalls += 1
+                self._stalled.set()
+
+    def _reopen(self) -> bool:
+        """按指数退避重新打开视频源，成功返回True，停止或超过重连次数返回False"""
+        self.connected = False
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+        down_since = time.monotonic()
+        attempt = 0
+        while not self._stop_event.is_set():
+            if self.max_reconnects is not None and attempt >= self.max_reconnects:
+                print(f"[{self.name}] 连续 {attempt} 次重连失败，放弃")
+                break
+
+            delay = min(self.backoff_max, self.backoff_initial * (2 ** attempt))
+            attempt += 1
+            print(f"[{self.name}] {delay:.1f} 秒后进行第 {attempt} 次重连")
+            if self._stop_event.wait(delay):
+                break
+
+            self._cap = self._open_capture()
+            if self._cap is not None:
+                self.reconnects += 1
+                self.downtime_seconds += time.monotonic() - down_since
+                self._last_frame_time = time.monotonic()
+                self._stalled.clear()
+                self.connected = True
+                print(f"[{self.name}] 重连成功，累计重连 {self.reconnects} 次，"
+                      f"累计中断 {self.downtime_seconds:.1f} 秒")
+                return True
+
+        self.downtime_seconds += time.monotonic() - down_since
+        return False
+
+    def _run(self):
+        """抓帧线程主循环"""
+        try:
+            while not self._stop_event.is_set():
+                if self._cap is None:
+                    # 启动时未能打开视频源
+                    if not self._reopen():
+                        break
+                    continue
+                read_start = time.perf_counter()
+                ret, image = self._cap.read()
+                if self.metrics is not None and ret:
+                    self.metrics.record_span('capture', read_start, time.perf_counter(), self.frames_captured)
+                if self._stalled.is_set():
+                    ret = False
+                if not ret:
+                    if self._stop_event.is_set():
+                        break
+                    if not self.reconnect:
+                        print(f"[{self.name}] 视频流结束或读取失败")
+                        break
+                    if not self._reopen():
+                        break
+                    continue
+
+                now = time.monotonic()
+                self._last_frame_time = now
+                frame = CapturedFrame(self.frames_captured, now, image)
+                self.frames_captured += 1
+                # BLOCK策略下分段等待，以便及时响应stop()；等待消费方不算卡顿
+                dropped = self.buffer.dropped
+                while not self.buffer.put(frame, timeout=0.1):
+                    if self.drop_policy != BLOCK or self._stop_event.is_set():
+                        break
+                    self._last_frame_time = time.monotonic()
+                if self.metrics is not None:
+                    self.metrics.incr('drops', self.buffer.dropped - dropped)
+        finally:
+            if self._cap is not None:
+                self._cap.release()
+                self._cap = None
+            self.connected = False
+            self.ended = True
+            self.buffer.close()
+
+    def read(self, timeout: Optional[float] = None) -> Optional[CapturedFrame]:
+        """
+        取走最旧的已缓冲帧
+
+        Args:
+            timeout: 最长等待秒数，None表示一直等待，0表示不等待
+
+        Returns:
+            帧；超时、已停止或视频源结束且无剩余帧时返回None
+        """
+        return self.buffer.get(timeout=timeout)
+
+    def iter_frames(self, stop_event: Optional[threading.Event] = None, poll_interval: float = 0.5):
+        """逐帧产出直到视频源结束或stop_event被设置"""
+        while not (stop_event and stop_event.is_set()):
+            frame = self.read(timeout=poll_interval)
+            if frame is not None:
+                yield frame
+            elif self.finished:
+                break
+
+    @property
+    def finished(self) -> bool:
+        """视频源已结束且没有待处理的帧"""
+        return self.ended and len(self.buffer) == 0
+
+    def stats(self) -> dict:
+        """返回抓帧、缓冲区与重连统计"""
+        buffer_stats = self.buffer.stats()
+        return {
+            'captured': self.frames_captured,
+            'dropped': buffer_stats['dropped'],
+            'consumed': buffer_stats['get'],
+            'depth': buffer_stats['depth'],
+            'max_depth': buffer_stats['max_depth'],
+            'capacity': buffer_stats['capacity'],
+            'blocked_seconds': buffer_stats['blocked_seconds'],
+            'connected': self.connected,
+            'reconnects': self.reconnects,
+            'stalls': self.stalls,
+            'downtime_seconds': self.downtime_seconds,
+        }
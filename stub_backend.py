@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线替身模型
+不需要权重文件和网络，按配置输出确定的NMS前原始预测，并可模拟推理延迟，
+用于在没有模型的机器上测试和测量流水线、多线程与IO性能。
+通过 engine='stub' 使用，model_path 为配置：'boxes=20,classes=80,latency_ms=8'、JSON文件路径，或留空使用默认值
+"""
+
+import json
+import os
+import time
+from typing import Optional
+
+import numpy as np
+import torch
+
+class StubBackend:
+    """
+    与DetectMultiBackend接口一致的替身模型
+
+    输出 [B, 锚点数, 5 + 类别数] 的预测 (cx, cy, w, h, 目标置信度, 各类别置信度)，
+    坐标为模型输入像素坐标。每张图像有 boxes 个高置信度候选框，其余锚点置信度为0；
+    相同输入尺寸下每次调用输出相同，batch内第i张图像的候选框由 seed + i 决定。
+    """
+
+    # 可通过配置字符串/JSON设置的参数及类型
+    OPTIONS = {
+        'boxes': int,
+        'classes': int,
+        'anchors': int,
+        'latency_ms': float,
+        'per_image_ms': float,
+        'jitter_ms': float,
+        'seed': int,
+        'stride': int,
+    }
+
+    def __init__(self, boxes: int = 10, classes: int = 80, anchors: Optional[int] = None,
+                 latency_ms: float = 0.0, per_image_ms: float = 0.0, jitter_ms: float = 0.0,
+                 seed: int = 0, stride: int = 32, device: Optional[torch.device] = None, fp16: bool = False):
+        """
+        初始化替身模型
+
+        Args:
+            boxes: 每张图像的高置信度候选框数量
+            classes: 类别数量
+            anchors: 每张图像的锚点数量，None时与YOLOv5相同（按输入尺寸在8/16/32三个步长上各3个锚点）
+            latency_ms: 每次调用的固定延迟（毫秒）
+            per_image_ms: 每张图像额外的延迟（毫秒）
+            jitter_ms: 延迟的随机抖动上限（毫秒），抖动序列由seed决定
+            seed: 随机种子
+            stride: 模型最大步长，输入尺寸按此对齐
+            device: 输出所在设备
+            fp16: 是否输出fp16
+        """
+        if classes < 1:
+            raise ValueError(f"类别数量必须大于0: {classes}")
+        self.boxes = max(0, boxes)
+        self.num_classes = classes
+        self.anchors = anchors
+        self.latency_ms = latency_ms
+        self.per_image_ms = per_image_ms
+        self.jitter_ms = jitter_ms
+        self.seed = seed
+        self.stride = stride
+        self.device = device or torch.device('cpu')
+        self.fp16 = fp16
+        self.pt = False
+        self.names = [f"class{i}" for i in range(classes)]
+
+        self.calls = 0
+        self.images = 0
+        self._jitter = np.random.default_rng(seed)
+        self._cache = {}  # (batch, 高, 宽, dtype) -> 预测张量
+
+    @classmethod
+    def from_spec(cls, spec: str, **kwargs) -> 'StubBackend':
+        """由配置字符串或JSON文件创建，未知参数报错"""
+        options = {}
+        spec = (spec or '').strip()
+        if spec and os.path.isfile(spec):
+            with open(spec, 'r', encoding='utf-8') as f:
+                options = json.load(f)
+        elif spec and spec != 'stub':
+            for item in spec.split(','):
+                key, sep, value = item.partition('=')
+                if not sep:
+                    raise ValueError(f"替身模型配置格式应为 key=value: {item}")
+                options[key.strip()] = value.strip()
+
+        unknown = set(options) - set(cls.OPTIONS)
+        if unknown:
+            raise ValueError(f"未知的替身模型参数: {', '.join(sorted(unknown))}，可选: {', '.join(cls.OPTIONS)}")
+        return cls(**{key: cls.OPTIONS[key](value) for key, value in options.items()}, **kwargs)
+
+    def describe(self) -> str:
+        """返回配置说明文本"""
+        return (f"替身模型: {self.boxes} 个候选框/图，{self.num_classes} 类，"
+                f"延迟 {self.latency_ms:g} ms + {self.per_image_ms:g} ms/图"
+                f"{f' ± {self.jitter_ms:g} ms' if self.jitter_ms else ''}")
+
+    def _anchor_count(self, height: int, width: int) -> int:
+        if self.anchors is not None:
+            return max(self.anchors, self.boxes, 1)
+        return 3 * sum((height // s) * (width // s) for s in (8, 16, 32))
+
+    def _prediction(self, batch: int, height: int, width: int) -> np.ndarray:
+        """生成一批确定的原始预测"""
+        anchors = self._anchor_count(height, width)
+        data = np.zeros((batch, anchors, 5 + self.num_classes), dtype=np.float32)
+        count = min(self.boxes, anchors)
+        for b in range(batch):
+            rng = np.random.default_rng(self.seed + b)
+            index = rng.choice(anchors, count, replace=False)
+            w = rng.uniform(16, max(17, width / 4), count)
+            h = rng.uniform(16, max(17, height / 4), count)
+            data[b, index, 0] = rng.uniform(w / 2, width - w / 2)
+            data[b, index, 1] = rng.uniform(h / 2, height - h / 2)
+            data[b, index, 2] = w
+            data[b, index, 3] = h
+            data[b, index, 4] = rng.uniform(0.6, 1.0, count)
+            data[b, index, 5 + rng.integers(0, self.num_classes, count)] = rng.uniform(0.6, 1.0, count)
+        return data
+
+    def _simulate_latency(self, batch: int):
+        """sleep期间释放GIL，与GPU推理时其他线程可以继续运行的情况一致"""
+        delay_ms = self.latency_ms + self.per_image_ms * batch
+        if self.jitter_ms:
+            delay_ms += self._jitter.uniform(0, self.jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+    def __call__(self, im: torch.Tensor) -> torch.Tensor:
+        """返回与输入batch对应的原始预测，dtype与输入一致"""
+        batch, _, height, width = im.shape
+        key = (batch, height, width, im.dtype)
+        pred = self._cache.get(key)
+        if pred is None:
+            pred = torch.from_numpy(self._prediction(batch, height, width)).to(im.device, dtype=im.dtype)
+            self._cache[key] = pred
+        self._simulate_latency(batch)
+        self.calls += 1
+        self.images += batch
+        # 返回副本，NMS等后续步骤原地修改时不影响缓存
+        return pred.clone()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试本地NMS：置信度筛选、同类别重叠框抑制、不同类别互不抑制
+"""
+
+import sys
+from pathlib import Path
+
+import torch
+
+# 添加当前目录到路径
+sys.path.append(str(Path(__file__).parent))
+
+from detection_nms import nms, non_max_suppression
+
+def make_row(cx, cy, w, h, obj, cls, classes=3):
+    row = torch.zeros(5 + classes)
+    row[:5] = torch.tensor([cx, cy, w, h, obj])
+    row[5 + cls] = 1.0
+    return row
+
+def test_suppresses_overlapping_boxes_of_same_class():
+    """同类别重叠框只保留置信度最高的，其他类别和低置信度框按规则处理"""
+    pred = torch.stack([
+        make_row(100, 100, 50, 50, 0.9, 0),
+        make_row(102, 102, 50, 50, 0.8, 0),  # 与第一个框重叠，被抑制
+        make_row(102, 102, 50, 50, 0.7, 1),  # 类别不同，保留
+        make_row(300, 300, 40, 40, 0.6, 0),  # 不重叠，保留
+        make_row(400, 400, 40, 40, 0.3, 2),  # 低于置信度阈值
+    ]).unsqueeze(0)
+    output = non_max_suppression(pred, conf_thres=0.5, iou_thres=0.5)
+
+    assert len(output) == 1
+    det = output[0]
+    assert det.shape == (3, 6)
+    assert det[:, 4].tolist() == sorted(det[:, 4].tolist(), reverse=True)
+    assert torch.allclose(det[0, :4], torch.tensor([75.0, 75.0, 125.0, 125.0]))
+    assert det[:, 5].tolist() == [0.0, 1.0, 0.0]
+
+def test_empty_and_greedy_order():
+    """没有候选框时返回空结果；NMS返回按置信度排序的保留索引"""
+    pred = torch.zeros((2, 10, 8))
+    assert [det.shape for det in non_max_suppression(pred)] == [(0, 6), (0, 6)]
+
+    boxes = torch.tensor([[0.0, 0, 10, 10], [1, 1, 11, 11], [20, 20, 30, 30]])
+    keep = nms(boxes, torch.tensor([0.5, 0.9, 0.7]), 0.5)
+    assert keep.tolist() == [1, 2]
+
+if __name__ == '__main__':
+    test_suppresses_overlapping_boxes_of_same_class()
+    test_empty_and_greedy_order()
+    print("NMS测试完成！")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试检测结果导出：缓冲批量写入、关闭时写出剩余记录、记录字段完整
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# 添加当前目录到路径
+sys.path.append(str(Path(__file__).parent))
+
+from detection_sink import DetectionSink, read_detections
+
+def test_jsonl_buffered_writes():
+    """攒够buffer_size条才写入，close时写出剩余记录"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'detections.jsonl')
+        sink = DetectionSink(path, buffer_size=4, class_names=['person', 'car'])
+        for i in range(3):
+            sink.add(f'{i}.jpg', np.array([[10, 20, 110, 220, 0.876543, i % 3]], dtype=np.float32),
+                     timestamp=1000.0 + i, inference_ms=12.3456, shape=(480, 640, 3))
+        assert read_detections(path) == []
+
+        sink.add('empty.jpg', None)
+        assert len(read_detections(path)) == 4
+
+        sink.add('video.mp4', np.zeros((0, 6)), frame=7)
+        sink.close()
+
+        records = read_detections(path)
+        assert sink.records == 5
+        assert [r['source'] for r in records] == ['0.jpg', '1.jpg', '2.jpg', 'empty.jpg', 'video.mp4']
+        first = records[0]
+        assert first['boxes'] == [[10.0, 20.0, 110.0, 220.0]]
+        assert first['confidences'] == [0.8765]
+        assert first['classes'] == [0]
+        assert first['labels'] == ['person']
+        assert first['inference_ms'] == 12.346
+        assert (first['width'], first['height']) == (640, 480)
+        assert records[2]['labels'] == ['cls:2']
+        assert records[4]['frame'] == 7 and records[4]['num_detections'] == 0
+
+def test_unknown_suffix_rejected():
+    """无法根据后缀判断格式时报错"""
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            DetectionSink(os.path.join(tmp, 'detections.txt'))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("未知后缀应当报错")
+
+if __name__ == '__main__':
+    test_jsonl_buffered_writes()
+    test_unknown_suffix_rejected()
+    print("检测结果导出测试完成！")
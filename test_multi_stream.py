@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试多路视频流检测：使用本地生成的视频文件和离线替身模型，同一检测器可多次运行
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# 添加当前目录到路径
+sys.path.append(str(Path(__file__).parent))
+
+from multi_stream import MultiStreamDetector
+from stream_capture import BLOCK
+from yolo_predict import YOLOPredictor
+
+def _write_video(path: str, frames: int, size: tuple = (64, 48)):
+    """生成一个每帧亮度不同的小视频文件"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 25, size)
+    for i in range(frames):
+        writer.write(np.full((size[1], size[0], 3), i * 20, dtype=np.uint8))
+    writer.release()
+
+def test_run_twice_rebuilds_grabbers_and_stats():
+    """再次运行时重新创建各路抓帧器和统计，统计与本次运行的抓帧器一一对应"""
+    predictor = YOLOPredictor('boxes=3,classes=2', engine='stub', conf_thres=0.3, imgsz=64, warmup_iters=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        urls = []
+        for i, frames in enumerate((4, 6)):
+            urls.append(os.path.join(tmp, f"stream_{i}.avi"))
+            _write_video(urls[-1], frames)
+
+        detector = MultiStreamDetector(predictor, urls, drop_policy=BLOCK, buffer_size=8, render=False)
+        for _ in range(2):
+            results = list(detector.run(stats_interval=0))
+            assert sorted(index for index, _, _, _ in results) == [0] * 4 + [1] * 6
+            assert len(detector.grabbers) == 2
+            stats = detector.stats()
+            assert [item['processed'] for item in stats] == [4, 6]
+            assert [item['captured'] for item in stats] == [4, 6]
+
+if __name__ == '__main__':
+    test_run_twice_rebuilds_grabbers_and_stats()
+    print("多路视频流检测测试完成！")
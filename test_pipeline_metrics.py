@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试流水线统计：分位数、计数器与FPS、Prometheus文本和HTTP接口，以及文件夹模式各路径的帧数统计
+"""
+
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# 添加当前目录到路径
+sys.path.append(str(Path(__file__).parent))
+
+from pipeline_metrics import PipelineMetrics
+from result_cache import ResultCache
+from yolo_predict import YOLOPredictor
+
+def test_stage_percentiles_use_recent_samples():
+    """分位数只按最近window个样本计算，数量和总和累计全部样本"""
+    metrics = PipelineMetrics(window=100)
+    for value in range(1000):
+        metrics.record('inference', 1000.0 if value < 900 else float(value - 900))
+    with metrics.timer('nms'):
+        time.sleep(0.01)
+
+    stages = metrics.snapshot()['stages']
+    assert list(stages) == ['inference', 'nms']  # 按流水线顺序
+    inference = stages['inference']
+    assert inference['count'] == 1000
+    assert inference['max_ms'] == 99.0
+    assert 49 <= inference['p50_ms'] <= 50
+    assert stages['nms']['p50_ms'] >= 10
+
+def test_counters_fps_and_summary():
+    """帧数/丢帧/错误计数与滑动窗口FPS"""
+    metrics = PipelineMetrics(fps_window=1.0)
+    for _ in range(20):
+        metrics.frame_done()
+    metrics.incr('drops', 3)
+    metrics.incr('errors')
+    metrics.record('draw', 2.5)
+
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == {'frames': 20, 'drops': 3, 'errors': 1}
+    assert snapshot['fps'] >= 20
+    summary = metrics.format_summary()
+    assert "帧 20 / 丢 3 / 错 1" in summary and "绘制 2.5" in summary
+
+    metrics.reset()
+    assert metrics.snapshot()['counters']['frames'] == 0
+
+def test_prometheus_endpoint():
+    """HTTP接口返回Prometheus文本"""
+    metrics = PipelineMetrics()
+    metrics.record('preprocess', 1.5)
+    metrics.frame_done()
+    server = metrics.serve(port=0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            text = response.read().decode('utf-8')
+    finally:
+        metrics.close()
+    assert 'yolo_frames_total 1' in text
+    assert 'yolo_stage_latency_ms{stage="preprocess",quantile="0.5"} 1.5' in text
+    assert 'yolo_stage_latency_ms_count{stage="preprocess"} 1' in text
+
+def test_folder_runs_count_frames():
+    """流水线、只输出检测结果和缓存命中的文件夹运行都按产出的图片数计帧"""
+    predictor = YOLOPredictor('boxes=2,classes=2', engine='stub', imgsz=128, warmup_iters=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, 'images')
+        os.makedirs(folder)
+        for i in range(6):
+            cv2.imwrite(os.path.join(folder, f"img_{i}.jpg"), np.full((96, 128, 3), i * 30, dtype=np.uint8))
+
+        for render in (True, False):
+            predictor.metrics.reset()
+            results = list(predictor.iter_images_folder(folder, batch_size=2, num_workers=4, render=render,
+                                                        output_dir=os.path.join(tmp, 'output')))
+            assert len(results) == 6
+            snapshot = predictor.metrics.snapshot()
+            assert snapshot['counters']['frames'] == 6
+            assert snapshot['fps'] > 0
+
+        predictor.cache = ResultCache(os.path.join(tmp, 'cache'))
+        try:
+            list(predictor.iter_images_folder(folder, num_workers=4))
+            predictor.metrics.reset()
+            list(predictor.iter_images_folder(folder, num_workers=4))
+            assert predictor.cache.hits == 6
+            assert predictor.metrics.snapshot()['counters']['frames'] == 6
+        finally:
+            predictor.cache.close()
+
+if __name__ == '__main__':
+    test_stage_percentiles_use_recent_samples()
+    test_counters_fps_and_summary()
+    test_prometheus_endpoint()
+    test_folder_runs_count_frames()
+    print("流水线统计测试完成！")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试执行追踪：按线程和帧记录区间、环形缓冲覆盖、与流水线统计联动及Chrome trace导出
+"""
+
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# 添加当前目录到路径
+sys.path.append(str(Path(__file__).parent))
+
+from pipeline_metrics import PipelineMetrics
+from pipeline_trace import PipelineTracer, trace_frame
+from result_writer import ResultWriter
+
+def test_spans_record_thread_and_frame():
+    """区间记录所在线程，未指定帧时使用当前线程的帧标识"""
+    tracer = PipelineTracer()
+
+    def work(frame_id):
+        with tracer.frame(frame_id):
+            with tracer.span('inference'):
+                time.sleep(0.002)
+            with tracer.span('encode', frame='override'):
+                pass
+
+    threads = [threading.Thread(target=work, args=(i,), name=f"worker-{i}") for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    events = tracer.events()
+    names = {e['args']['name'] for e in events if e['ph'] == 'M' and e['name'] == 'thread_name'}
+    assert {'worker-0', 'worker-1', 'worker-2'} <= names
+    spans = [e for e in events if e['ph'] == 'X']
+    assert len(spans) == 6
+    assert sorted(e['args']['frame'] for e in spans if e['name'] == 'inference') == [0, 1, 2]
+    assert all(e['args']['frame'] == 'override' for e in spans if e['name'] == 'encode')
+    assert all(e['dur'] >= 2000 for e in spans if e['name'] == 'inference')
+    assert [e['ts'] for e in spans] == sorted(e['ts'] for e in spans)
+
+def test_ring_buffer_keeps_latest_events():
+    """容量用尽后覆盖最早的事件"""
+    tracer = PipelineTracer(capacity=8)
+    for i in range(20):
+        now = time.perf_counter()
+        tracer.add('decode', now, now, frame=i)
+    frames = [e['args']['frame'] for e in tracer.events() if e['ph'] == 'X']
+    assert frames == list(range(12, 20))
+    stats = tracer.stats()
+    assert stats['recorded'] == 20 and stats['kept'] == 8 and stats['dropped'] == 12
+    assert "覆盖最早的 12 个" in tracer.format_stats()
+
+def test_metrics_timers_emit_trace_events():
+    """设置了tracer的流水线统计在计时的同时记录追踪事件，批次帧标识为列表"""
+    metrics = PipelineMetrics()
+    with metrics.timer('preprocess'):
+        pass
+    tracer = PipelineTracer()
+    metrics.tracer = tracer
+    with trace_frame(tracer, ['a.jpg', 'b.jpg']):
+        with metrics.timer('nms'):
+            pass
+    with metrics.timer('decode', 'c.jpg'):
+        pass
+    with trace_frame(None, 'ignored'):
+        pass
+
+    spans = [e for e in tracer.events() if e['ph'] == 'X']
+    assert [(e['name'], e['args']['frame']) for e in spans] == [('nms', ['a.jpg', 'b.jpg']), ('decode', 'c.jpg')]
+    assert metrics.snapshot()['stages']['preprocess']['count'] == 1
+
+def test_dump_includes_writer_threads():
+    """导出的Chrome trace包含写入线程的写文件事件"""
+    tracer = PipelineTracer()
+    with tempfile.TemporaryDirectory() as tmp:
+        with ResultWriter(max_workers=2) as writer:
+            writer.tracer = tracer
+            for i in range(4):
+                writer.submit(str(Path(tmp) / f"frame_{i}.jpg"), b'data')
+        trace_path = Path(tmp) / 'trace.json'
+        assert tracer.dump(str(trace_path)) == 4
+        trace = json.loads(trace_path.read_text(encoding='utf-8'))
+
+    events = trace['traceEvents']
+    writes = [e for e in events if e['ph'] == 'X']
+    assert sorted(e['args']['frame'] for e in writes) == [f"frame_{i}.jpg" for i in range(4)]
+    thread_names = {e['args']['name'] for e in events if e['name'] == 'thread_name'}
+    assert all(name.startswith('yolo-writer') for name in thread_names)
+
+if __name__ == '__main__':
+    test_spans_record_thread_and_frame()
+    test_ring_buffer_keeps_latest_events()
+    test_metrics_timers_emit_trace_events()
+    test_dump_includes_writer_threads()
+    print("执行追踪测试完成！")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试NMS前预测缓存：候选框筛选、按文件修改失效与按最近使用淘汰，
+以及预测器按新阈值只重新NMS（替身引擎）
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+
+# 添加当前目录到路径
+sys.path.append(str(Path(__file__).parent))
+
+from raw_predictions import RawPredictionCache
+from yolo_predict import YOLOPredictor
+
+def make_pred(anchors: int = 1000, keep: int = 10, classes: int = 80) -> torch.Tensor:
+    """构造原始预测：keep个锚点目标置信度高于0.1，其余为0.05"""
+    pred = torch.zeros((anchors, 5 + classes), dtype=torch.float16)
+    pred[:, 4] = 0.05
+    pred[:keep, :4] = torch.tensor([100.0, 100.0, 20.0, 20.0], dtype=torch.float16)
+    pred[:keep, 4] = torch.linspace(0.2, 0.9, keep, dtype=torch.float16)
+    return pred
+
+def test_keeps_only_candidates_above_floor():
+    """只保存目标置信度高于下限的候选框，并转换为float32"""
+    cache = RawPredictionCache(min_conf=0.1)
+    cache.put('a', make_pred(), (1, 3, 640, 640), (480, 640, 3))
+
+    entry = cache.get('a')
+    assert entry.candidates.shape == (10, 85)
+    assert entry.candidates.dtype == torch.float32
+    assert entry.input_shape == (1, 3, 640, 640) and entry.image_shape == (480, 640, 3)
+    assert entry.min_conf == 0.1
+    assert cache.get('b') is None
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+    assert stats['bytes'] == 10 * 85 * 4
+
+def test_evicts_least_recently_used():
+    """超过条目数或字节数上限时淘汰最久未使用的图片"""
+    cache = RawPredictionCache(max_entries=3)
+    for key in 'abc':
+        cache.put(key, make_pred(), (1, 3, 640, 640), (640, 640, 3))
+    cache.get('a')
+    cache.put('d', make_pred(), (1, 3, 640, 640), (640, 640, 3))
+    assert cache.get('b') is None
+    assert all(cache.get(key) is not None for key in 'acd')
+    assert cache.evictions == 1
+
+    small = RawPredictionCache(max_bytes=10 * 85 * 4 * 2)
+    for key in 'abc':
+        small.put(key, make_pred(), (1, 3, 640, 640), (640, 640, 3))
+    assert len(small) == 2 and small.get('a') is None
+
+def test_file_key_changes_when_file_modified():
+    """文件修改后键改变，不会命中旧的预测"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'image.jpg')
+        Path(path).write_bytes(b'first')
+        key = RawPredictionCache.file_key(path)
+        assert key == RawPredictionCache.file_key(path)
+
+        Path(path).write_bytes(b'second version')
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert RawPredictionCache.file_key(path) != key
+
+def test_rethreshold_without_inference():
+    """调整阈值只重新NMS：不调用模型，不计入帧数，结果与重新推理一致"""
+    predictor = YOLOPredictor('boxes=20,classes=3', engine='stub', conf_thres=0.3, imgsz=256, warmup_iters=0)
+    predictor.raw_cache = RawPredictionCache()
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, 'images')
+        os.makedirs(folder)
+        for i in range(4):
+            cv2.imwrite(os.path.join(folder, f"img_{i}.jpg"), np.full((180, 256, 3), i * 50, dtype=np.uint8))
+        path = os.path.join(folder, 'img_0.jpg')
+
+        # 替身模型的候选框与图片在batch中的位置有关，逐张推理以便与predict_single_image对比
+        list(predictor.iter_images_folder(folder, batch_size=1, num_workers=2))
+        calls = predictor.model.calls
+        predictor.metrics.reset()
+
+        loose = predictor.rethreshold(path)
+        predictor.conf_thres = 0.7
+        strict = predictor.rethreshold(path)
+        assert len(strict.detections) < len(loose.detections)
+        assert strict.jpeg
+        assert predictor.model.calls == calls
+        assert predictor.metrics.snapshot()['counters']['frames'] == 0
+        assert np.array_equal(strict.detections.data, predictor.predict_single_image(path).detections.data)
+
+        # 置信度阈值低于缓存下限时无法只重新NMS
+        predictor.conf_thres = 0.05
+        assert predictor.rethreshold(path) is None
+
+        # 文件夹再次运行时保留了NMS前输出的图片不再推理，按产出的图片计帧
+        predictor.conf_thres = 0.5
+        calls = predictor.model.calls
+        predictor.metrics.reset()
+        results = list(predictor.iter_images_folder(folder, num_workers=2))
+        assert len(results) == 4
+        assert predictor.model.calls == calls
+        assert predictor.metrics.snapshot()['counters']['frames'] == 4
+
+if __name__ == '__main__':
+    test_keeps_only_candidates_above_floor()
+    test_evicts_least_recently_used()
+    test_file_key_changes_when_file_modified()
+    test_rethreshold_without_inference()
+    print("NMS前预测缓存测试完成！")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试检测结果缓存：按内容哈希命中、文件修改后失效、容量超限时淘汰、结果图片是否最新
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# 添加当前目录到路径
+sys.path.append(str(Path(__file__).parent))
+
+from result_cache import ResultCache
+
+PARAMS = 'weights|conf=0.5|iou=0.5|imgsz=640x640|torch|fp32'
+
+def test_hit_after_reopen_and_miss_after_change():
+    """重新打开缓存后仍能命中，文件内容变化后不再命中"""
+    with tempfile.TemporaryDirectory() as tmp:
+        image = os.path.join(tmp, 'a.jpg')
+        Path(image).write_bytes(b'image-v1')
+        data = np.array([[1, 2, 3, 4, 0.9, 2]], dtype=np.float32)
+
+        with ResultCache(os.path.join(tmp, 'cache')) as cache:
+            key = cache.make_key(cache.file_digest(image), PARAMS)
+            assert cache.get(key) is None
+            cache.put(key, data)
+
+        with ResultCache(os.path.join(tmp, 'cache')) as cache:
+            key = cache.make_key(cache.file_digest(image), PARAMS)
+            assert np.array_equal(cache.get(key), data)
+            assert cache.get(cache.make_key(cache.file_digest(image), PARAMS + 'x')) is None
+
+            Path(image).write_bytes(b'image-v2!')
+            assert cache.get(cache.make_key(cache.file_digest(image), PARAMS)) is None
+            assert cache.stats()['hits'] == 1
+
+def test_eviction_keeps_recent_results():
+    """超过容量上限时淘汰最久未访问的结果"""
+    with tempfile.TemporaryDirectory() as tmp:
+        data = np.zeros((10, 6), dtype=np.float32)
+        entry = data.nbytes + 40
+        with ResultCache(tmp, max_bytes=entry * 5) as cache:
+            for i in range(5):
+                cache.put(f'{i:040d}', data)
+            assert cache.get(f'{0:040d}') is not None  # 访问后变为最近使用
+            cache.put(f'{5:040d}', data)
+
+            stats = cache.stats()
+            assert stats['bytes'] <= entry * 5
+            assert stats['evictions'] >= 1
+            assert cache.get(f'{0:040d}') is not None
+            assert cache.get(f'{1:040d}') is None
+
+def test_output_current():
+    """结果图片由同一结果键和编码配置生成且大小一致时视为最新"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'predicted_a.jpg')
+        with ResultCache(os.path.join(tmp, 'cache')) as cache:
+            assert not cache.output_current(output, 'k', 'jpg')
+            Path(output).write_bytes(b'12345')
+            cache.put_output(output, 'k', 'jpg', 5)
+            assert cache.output_current(output, 'k', 'jpg')
+            assert not cache.output_current(output, 'k', 'png')
+            assert not cache.output_current(output, 'other', 'jpg')
+            Path(output).write_bytes(b'123')
+            assert not cache.output_current(output, 'k', 'jpg')
+
+if __name__ == '__main__':
+    test_hit_after_reopen_and_miss_after_change()
+    test_eviction_keeps_recent_results()
+    test_output_current()
+    print("结果缓存测试完成！")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试异步结果写入：关闭时全部写完、原子写入不残留临时文件、写入失败不影响后续文件
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加当前目录到路径
+sys.path.append(str(Path(__file__).parent))
+
+from result_writer import ResultWriter
+
+def test_close_flushes_all_files():
+    """关闭写入器后所有提交的文件都已写完"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with ResultWriter(max_workers=2, queue_size=4) as writer:
+            for i in range(50):
+                writer.submit(os.path.join(tmp, f'{i:03d}.bin'), bytes([i]) * 1000)
+
+        assert sorted(os.listdir(tmp)) == [f'{i:03d}.bin' for i in range(50)]
+        assert Path(tmp, '007.bin').read_bytes() == bytes([7]) * 1000
+        stats = writer.stats()
+        assert stats['files'] == 50
+        assert stats['bytes'] == 50000
+        assert stats['pending'] == 0
+        assert stats['max_pending'] <= 4
+
+def test_atomic_fsync_leaves_no_temp_files():
+    """原子写入 + fsync，目录中只有最终文件"""
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = ResultWriter(max_workers=2, fsync=True, atomic=True)
+        for i in range(10):
+            writer.submit(os.path.join(tmp, f'{i}.jpg'), b'data')
+        assert writer.flush(timeout=10)
+        writer.close()
+
+        assert sorted(os.listdir(tmp)) == sorted(f'{i}.jpg' for i in range(10))
+
+def test_errors_are_recorded():
+    """写入失败时记录错误，其余文件照常写入；同步模式下同样生效"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in (0, 2):
+            with ResultWriter(max_workers=workers) as writer:
+                writer.submit(os.path.join(tmp, 'missing', 'a.jpg'), b'x')
+                writer.submit(os.path.join(tmp, f'ok_{workers}.jpg'), b'x')
+
+            assert len(writer.errors) == 1
+            assert writer.stats()['files'] == 1
+            assert os.path.exists(os.path.join(tmp, f'ok_{workers}.jpg'))
+
+if __name__ == '__main__':
+    test_close_flushes_all_files()
+    test_atomic_fsync_leaves_no_temp_files()
+    test_errors_are_recorded()
+    print("结果写入测试完成！")
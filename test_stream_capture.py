@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试抓帧组件：环形缓冲区策略、断线重连与卡顿检测
+使用本地生成的视频文件和模拟的视频源，无需网络摄像头
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# 添加当前目录到路径
+sys.path.append(str(Path(__file__).parent))
+
+from stream_capture import BLOCK, DROP_NEWEST, DROP_OLDEST, FrameBuffer, FrameGrabber
+
+def _write_video(path: str, frames: int = 10, size: tuple = (64, 48)):
+    """生成一个每帧亮度不同的小视频文件"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 25, size)
+    for i in range(frames):
+        writer.write(np.full((size[1], size[0], 3), i * 20, dtype=np.uint8))
+    writer.release()
+
+class _StallingCapture:
+    """模拟卡顿的视频源：先正常出帧，之后read()长时间阻塞"""
+
+    def __init__(self, frames_before_stall: int, stall_seconds: float):
+        self.remaining = frames_before_stall
+        self.stall_seconds = stall_seconds
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.remaining > 0:
+            self.remaining -= 1
+            time.sleep(0.01)
+            return True, np.zeros((8, 8, 3), dtype=np.uint8)
+        time.sleep(self.stall_seconds)
+        return True, np.zeros((8, 8, 3), dtype=np.uint8)
+
+    def release(self):
+        pass
+
+def test_frame_buffer_policies():
+    """测试缓冲区满时的三种策略"""
+    buffer = FrameBuffer(3, DROP_OLDEST)
+    for i in range(5):
+        buffer.put(i)
+    assert [buffer.get(0) for _ in range(3)] == [2, 3, 4]
+    assert buffer.stats()['dropped'] == 2
+
+    buffer = FrameBuffer(2, DROP_NEWEST)
+    for i in range(5):
+        buffer.put(i)
+    assert [buffer.get(0) for _ in range(2)] == [0, 1]
+    assert buffer.get(0) is None
+
+    buffer = FrameBuffer(1, BLOCK)
+    assert buffer.put('a')
+    assert not buffer.put('b', timeout=0.05)
+    assert buffer.stats()['blocked_seconds'] > 0
+    buffer.close()
+    assert buffer.get() == 'a'
+    assert buffer.get() is None
+
+def test_grabber_reads_file_without_drops():
+    """BLOCK策略下读取完整的视频文件"""
+    with tempfile.TemporaryDirectory() as tmp:
+        video = os.path.join(tmp, 'stream.avi')
+        _write_video(video, frames=10)
+
+        with FrameGrabber(video, drop_policy=BLOCK, capacity=2) as grabber:
+            frame_ids = [frame.frame_id for frame in grabber.iter_frames()]
+
+        assert frame_ids == list(range(10))
+        assert grabber.stats()['dropped'] == 0
+
+def test_grabber_reconnects_after_stream_end():
+    """视频文件读完视为断线，重连后帧序号连续"""
+    with tempfile.TemporaryDirectory() as tmp:
+        video = os.path.join(tmp, 'stream.avi')
+        _write_video(video, frames=5)
+
+        grabber = FrameGrabber(video, drop_policy=BLOCK, capacity=2, reconnect=True,
+                               backoff_initial=0.01, stall_timeout=0)
+        with grabber:
+            frame_ids = [grabber.read(timeout=2).frame_id for _ in range(12)]
+
+        assert frame_ids == list(range(12))
+        assert grabber.stats()['reconnects'] >= 2
+
+def test_grabber_gives_up_after_max_reconnects():
+    """视频源消失后按退避重试，超过次数后结束"""
+    with tempfile.TemporaryDirectory() as tmp:
+        video = os.path.join(tmp, 'stream.avi')
+        _write_video(video, frames=3)
+
+        grabber = FrameGrabber(video, drop_policy=BLOCK, capacity=8, reconnect=True,
+                               max_reconnects=2, backoff_initial=0.2, stall_timeout=0)
+        grabber.start()
+        os.remove(video)
+        frames = list(grabber.iter_frames(poll_interval=0.1))
+        grabber.stop()
+
+        assert len(frames) == 3
+        stats = grabber.stats()
+        assert stats['reconnects'] == 0
+        assert stats['downtime_seconds'] >= 0.6  # 0.2 + 0.4 秒退避
+
+def test_grabber_retries_failed_initial_open():
+    """开启重连时启动阶段打不开视频源不抛出异常，按退避重试直到打开"""
+    class FlakyGrabber(FrameGrabber):
+        opens = 0
+
+        def _open_capture(self):
+            self.opens += 1
+            if self.opens <= 3:
+                return None
+            return _StallingCapture(frames_before_stall=5, stall_seconds=0)
+
+    grabber = FlakyGrabber('stand-in', drop_policy=BLOCK, capacity=8, reconnect=True,
+                           backoff_initial=0.01, stall_timeout=0)
+    with grabber:
+        frame_ids = [grabber.read(timeout=2).frame_id for _ in range(5)]
+
+    assert frame_ids == list(range(5))
+    assert grabber.opens == 4
+    stats = grabber.stats()
+    assert stats['reconnects'] == 1 and stats['downtime_seconds'] > 0
+
+    # 未开启重连时仍然立即报错
+    try:
+        FlakyGrabber('stand-in').start()
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("打开失败时应抛出RuntimeError")
+
+def test_grabber_detects_stall():
+    """看门狗发现长时间没有新帧后触发重连"""
+    class StallingGrabber(FrameGrabber):
+        def _open_capture(self):
+            return _StallingCapture(frames_before_stall=3, stall_seconds=0.6)
+
+    grabber = StallingGrabber('stand-in', drop_policy=BLOCK, capacity=16, reconnect=True,
+                              backoff_initial=0.01, stall_timeout=0.2)
+    with grabber:
+        frames = [grabber.read(timeout=2) for _ in range(5)]
+
+    assert all(frame is not None for frame in frames)
+    stats = grabber.stats()
+    assert stats['stalls'] >= 1
+    assert stats['reconnects'] >= 1
+
+if __name__ == '__main__':
+    test_frame_buffer_policies()
+    test_grabber_reads_file_without_drops()
+    test_grabber_reconnects_after_stream_end()
+    test_grabber_gives_up_after_max_reconnects()
+    test_grabber_retries_failed_initial_open()
+    test_grabber_detects_stall()
+    print("抓帧组件测试完成！")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试离线替身模型：输出形状与候选框数量、多次调用输出一致、配置解析、模拟延迟，
+以及不依赖yolov5代码的完整预测流程（letterbox、推理、NMS、坐标还原、绘制、编码）和提前停止流水线
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+
+# 添加当前目录到路径
+sys.path.append(str(Path(__file__).parent))
+
+from stub_backend import StubBackend
+from yolo_predict import YOLOPredictor
+
+def test_output_shape_and_determinism():
+    """输出形状与YOLOv5一致，每张图有指定数量的高置信度候选框，重复调用输出相同"""
+    model = StubBackend(boxes=7, classes=5)
+    im = torch.zeros((2, 3, 320, 640))
+    pred = model(im)
+
+    anchors = 3 * sum((320 // s) * (640 // s) for s in (8, 16, 32))
+    assert pred.shape == (2, anchors, 10)
+    for b in range(2):
+        candidates = pred[b][pred[b, :, 4] > 0.5]
+        assert len(candidates) == 7
+        assert (candidates[:, 0] >= 0).all() and (candidates[:, 0] <= 640).all()
+        assert (candidates[:, 5:].max(dim=1).values >= 0.6).all()
+
+    pred[:] = 0  # 修改返回值不影响之后的输出
+    again = StubBackend(boxes=7, classes=5)(im)
+    assert torch.equal(model(im), again)
+    assert model.calls == 2 and model.images == 4
+
+def test_from_spec():
+    """配置字符串解析，未知参数报错"""
+    model = StubBackend.from_spec('boxes=3, classes=2, anchors=100, latency_ms=1.5')
+    assert (model.boxes, model.num_classes, model.latency_ms) == (3, 2, 1.5)
+    assert model(torch.zeros((1, 3, 64, 64))).shape == (1, 100, 7)
+    assert StubBackend.from_spec('').boxes == 10
+    try:
+        StubBackend.from_spec('boxes=3,speed=fast')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("未知参数应当报错")
+
+def test_simulated_latency():
+    """每次调用按 latency_ms + per_image_ms * batch 延迟"""
+    model = StubBackend(anchors=10, latency_ms=20, per_image_ms=10)
+    start = time.perf_counter()
+    model(torch.zeros((3, 3, 32, 32)))
+    assert time.perf_counter() - start >= 0.05
+
+def test_predictor_end_to_end():
+    """替身引擎的预测结果与按letterbox几何手动还原的候选框一致，结果图像可解码且尺寸与原图相同"""
+    predictor = YOLOPredictor('boxes=1,classes=3,seed=4', engine='stub', conf_thres=0.3, imgsz=320,
+                              warmup_iters=0)
+    image = np.full((200, 400, 3), 90, dtype=np.uint8)
+
+    raw = predictor.model(predictor._preprocess_image(image))[0]
+    cx, cy, w, h, obj = raw[raw[:, 4] > 0][0, :5].tolist()
+    cls_conf, cls = raw[raw[:, 4] > 0][0, 5:].max(0)
+    (gain, _), (pad_w, pad_h) = predictor._letterbox_geometry(image.shape)[2]
+    expected = np.array([(cx - w / 2 - pad_w) / gain, (cy - h / 2 - pad_h) / gain,
+                         (cx + w / 2 - pad_w) / gain, (cy + h / 2 - pad_h) / gain])
+    expected = np.round(np.clip(expected, 0, [400, 200, 400, 200]))
+
+    result = predictor.predict_image(image)
+    assert len(result.detections) == 1
+    assert np.abs(result.detections.boxes[0] - expected).max() <= 1
+    assert abs(result.detections.confidences[0] - obj * float(cls_conf)) < 1e-3
+    assert result.detections.classes[0] == int(cls)
+
+    decoded = cv2.imdecode(np.frombuffer(result.jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+    assert decoded.shape == image.shape
+    assert not np.array_equal(decoded, image)  # 绘制了检测框
+
+def test_predictor_folder_with_stub_engine():
+    """替身引擎驱动流水线文件夹模式，每张图片都产出结果并写入输出目录"""
+    predictor = YOLOPredictor('boxes=3,classes=2', engine='stub', conf_thres=0.3, imgsz=256, warmup_iters=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        folder, output_dir = os.path.join(tmp, 'images'), os.path.join(tmp, 'output')
+        os.makedirs(folder)
+        names = [f"img_{i}.jpg" for i in range(5)]
+        for i, name in enumerate(names):
+            cv2.imwrite(os.path.join(folder, name), np.full((120 + i * 10, 160, 3), i * 40, dtype=np.uint8))
+
+        results = list(predictor.iter_images_folder(folder, batch_size=2, num_workers=2, output_dir=output_dir))
+        assert sorted(name for name, _, _ in results) == names
+        # 候选框置信度不低于0.36，重叠的同类别框可能被NMS抑制
+        assert all(1 <= len(detections) <= 3 and jpeg for _, jpeg, detections in results)
+        assert sorted(os.listdir(output_dir)) == [f"predicted_{name}" for name in names]
+
+def test_pipeline_closes_early():
+    """提前停止流水线时，解码队列已满、送入线程阻塞在结束标记上也能返回"""
+    predictor = YOLOPredictor('boxes=3,classes=2', engine='stub', conf_thres=0.3, imgsz=128, warmup_iters=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(8):
+            cv2.imwrite(os.path.join(tmp, f"img_{i}.jpg"), np.full((96, 128, 3), i * 30, dtype=np.uint8))
+
+        # 产出第一个结果前取出2张图片，其余6张恰好填满队列，结束标记无法放入
+        results = predictor.iter_images_folder(tmp, batch_size=1, num_workers=2, decode_queue_size=6,
+                                               render_queue_size=1, render=True)
+        next(results)
+        time.sleep(0.3)  # 等待送入线程放完图片、阻塞在结束标记上
+        closer = threading.Thread(target=results.close, daemon=True)
+        closer.start()
+        closer.join(timeout=5)
+        assert not closer.is_alive()
+
+if __name__ == '__main__':
+    test_output_shape_and_determinism()
+    test_from_spec()
+    test_simulated_latency()
+    test_predictor_end_to_end()
+    test_predictor_folder_with_stub_engine()
+    test_pipeline_closes_early()
+    print("替身模型测试完成！")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试视频分段输出：按时长滚动分段、索引与帧号对应、按帧号取回单帧，
+以及视频流批量推理时索引记录抓帧时间而不是写入时间（离线替身模型）
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# 添加当前目录到路径
+sys.path.append(str(Path(__file__).parent))
+
+from video_segments import SegmentWriter, extract_frame, list_segments, read_index
+from yolo_predict import YOLOPredictor
+
+def make_frame(index: int) -> np.ndarray:
+    """每帧填充不同的灰度，便于识别取回的是哪一帧"""
+    return np.full((64, 96, 3), index * 20, dtype=np.uint8)
+
+def test_rolling_segments_and_extract():
+    """10帧、每段4帧，生成3个分段，任意帧都能按帧号取回"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with SegmentWriter(tmp, fps=4, codec='MJPG', segment_seconds=1.0) as writer:
+            for i in range(10):
+                detections = np.array([[1, 2, 30, 40, 0.9, i % 3]], dtype=np.float32)
+                assert writer.write(make_frame(i), detections, timestamp=100.0 + i) == i
+
+        segments = list_segments(tmp)
+        assert [start for start, _, _ in segments] == [0, 4, 8]
+        assert writer.stats()['segments'] == 3
+        assert [r['offset'] for r in read_index(segments[1][2])] == [0, 1, 2, 3]
+
+        for frame_number in (0, 5, 9):
+            image, record = extract_frame(tmp, frame_number)
+            assert image.shape == (64, 96, 3)
+            assert abs(float(image.mean()) - frame_number * 20) < 4
+            assert record['frame'] == frame_number
+            assert record['timestamp'] == 100.0 + frame_number
+            assert record['detections'][0][5] == frame_number % 3
+
+def test_size_change_starts_new_segment():
+    """帧尺寸变化时开始新分段"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with SegmentWriter(tmp, fps=25, codec='MJPG') as writer:
+            writer.write(make_frame(1))
+            writer.write(np.zeros((32, 32, 3), dtype=np.uint8))
+        assert [start for start, _, _ in list_segments(tmp)] == [0, 1]
+        assert len(os.listdir(tmp)) == 4
+
+def test_stream_index_uses_capture_time():
+    """批量推理时各帧的抓帧时间早于结果产出，索引记录的是抓帧时间"""
+    predictor = YOLOPredictor('boxes=3,classes=2,latency_ms=50', engine='stub', conf_thres=0.3,
+                              imgsz=64, warmup_iters=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        video = os.path.join(tmp, 'stream.avi')
+        writer = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*'MJPG'), 25, (96, 64))
+        for i in range(6):
+            writer.write(make_frame(i))
+        writer.release()
+
+        for reconnect in (False, True):
+            output_dir = os.path.join(tmp, f"segments_{reconnect}")
+            written = []
+            with SegmentWriter(output_dir, fps=25, codec='MJPG') as segments:
+                for image, detections, capture_time in predictor.iter_video_stream(
+                        video, max_frames=6, batch_size=3, reconnect=reconnect, stall_timeout=0,
+                        encode=False, timestamps=True):
+                    written.append(time.time())
+                    segments.write(image, detections, timestamp=capture_time)
+
+            timestamps = [record['timestamp'] for _, _, index_path in list_segments(output_dir)
+                          for record in read_index(index_path)]
+            assert len(timestamps) == 6
+            assert timestamps == sorted(timestamps)
+            # 每批第一帧至少等待了一次推理（50毫秒）
+            assert all(written[i] - timestamps[i] >= 0.045 for i in (0, 3))
+
+if __name__ == '__main__':
+    test_rolling_segments_and_extract()
+    test_size_change_starts_new_segment()
+    test_stream_index_uses_capture_time()
+    print("视频分段测试完成！")
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+视频分段输出
+标注后的帧按固定时长写入滚动的视频分段，代替逐帧保存的图片文件；
+每个分段有一个同名的JSONL索引，逐行记录帧号、时间戳和检测结果。
+分段文件名包含起始帧号，按帧号即可定位分段并取出单帧
+"""
+
+import bisect
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+# 编码器FourCC -> 默认容器后缀
+CODEC_CONTAINERS = {
+    'mp4v': '.mp4',
+    'avc1': '.mp4',
+    'h264': '.mp4',
+    'xvid': '.avi',
+    'mjpg': '.avi',
+}
+
+class SegmentWriter:
+    """
+    滚动视频分段写入器
+
+    分段达到 segment_seconds 对应的帧数或帧尺寸变化时自动开始新分段，
+    文件名为 {prefix}_{起始帧号:08d}{后缀}，索引为同名的 .jsonl 文件。
+    """
+
+    def __init__(self, output_dir: str, fps: float = 25.0, codec: str = 'mp4v',
+                 segment_seconds: float = 60.0, prefix: str = 'segment', container: Optional[str] = None):
+        """
+        初始化写入器
+
+        Args:
+            output_dir: 输出目录
+            fps: 写入视频的帧率
+            codec: 四字符编码器名称，如 'mp4v'、'avc1'、'XVID'、'MJPG'
+            segment_seconds: 单个分段的时长（秒），按 fps 换算为帧数
+            prefix: 分段文件名前缀
+            container: 容器后缀，默认根据编码器选择（未知编码器为 .avi）
+        """
+        if len(codec) != 4:
+            raise ValueError(f"编码器名称必须为4个字符: {codec}")
+        if fps <= 0 or segment_seconds <= 0:
+            raise ValueError("fps和分段时长必须大于0")
+        self.output_dir = output_dir
+        self.fps = fps
+        self.codec = codec
+        self.fourcc = cv2.VideoWriter_fourcc(*codec)
+        self.container = container or CODEC_CONTAINERS.get(codec.lower(), '.avi')
+        self.segment_frames = max(1, int(round(fps * segment_seconds)))
+        self.prefix = prefix
+        os.makedirs(output_dir, exist_ok=True)
+
+        self.frame_count = 0
+        self.segment_count = 0
+        self._writer = None
+        self._index_file = None
+        self._segment_start = 0
+        self._segment_size = None
+
+    def _open_segment(self, size: tuple):
+        """以当前帧号开始新分段"""
+        self._close_segment()
+        stem = os.path.join(self.output_dir, f"{self.prefix}_{self.frame_count:08d}")
+        video_path = stem + self.container
+        writer = cv2.VideoWriter(video_path, self.fourcc, self.fps, size)
+        if not writer.isOpened():
+            raise RuntimeError(f"无法创建视频文件: {video_path}（编码器 {self.codec}）")
+        self._writer = writer
+        self._index_file = open(stem + '.jsonl', 'w', encoding='utf-8')
+        self._segment_start = self.frame_count
+        self._segment_size = size
+        self.segment_count += 1
+
+    def _close_segment(self):
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+
+    def write(self, image: np.ndarray, detections=None, timestamp: Optional[float] = None,
+              extra: Optional[dict] = None) -> int:
+        """
+        写入一帧
+
+        Args:
+            image: 绘制好的BGR图像
+            detections: 该帧的检测结果（Detections或 [N, 6] 数组），写入索引
+            timestamp: 帧时间戳（Unix时间，秒），默认为写入时刻
+            extra: 附加写入索引记录的字段，如视频源帧号
+
+        Returns:
+            该帧的全局帧号
+        """
+        size = (image.shape[1], image.shape[0])
+        if (self._writer is None or size != self._segment_size
+                or self.frame_count - self._segment_start >= self.segment_frames):
+            self._open_segment(size)
+
+        self._writer.write(image)
+        data = getattr(detections, 'data', detections)
+        record = {
+            'frame': self.frame_count,
+            'offset': self.frame_count - self._segment_start,
+            'timestamp': round(time.time() if timestamp is None else timestamp, 6),
+            'detections': [] if data is None else np.round(np.asarray(data, dtype=np.float64), 4).tolist(),
+        }
+        if extra:
+            record.update(extra)
+        self._index_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+        self.frame_count += 1
+        return self.frame_count - 1
+
+    def close(self):
+        """结束当前分段，可重复调用"""
+        self._close_segment()
+
+    def stats(self) -> dict:
+        """返回写入统计信息"""
+        return {
+            'frames': self.frame_count,
+            'segments': self.segment_count,
+            'segment_frames': self.segment_frames,
+            'codec': self.codec,
+            'fps': self.fps,
+        }
+
+    def format_stats(self) -> str:
+        """返回写入统计的说明文本"""
+        return (f"写入 {self.frame_count} 帧，{self.segment_count} 个视频分段"
+                f"（{self.codec}，{self.fps:g} FPS，每段最多 {self.segment_frames} 帧）")
+
+    def __enter__(self) -> 'SegmentWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def list_segments(output_dir: str, prefix: str = 'segment') -> List[tuple]:
+    """返回按起始帧号排序的 (起始帧号, 视频路径, 索引路径) 列表"""
+    pattern = re.compile(rf"^{re.escape(prefix)}_(\d{{8}})\.jsonl$")
+    segments = []
+    for index_path in Path(output_dir).iterdir():
+        match = pattern.match(index_path.name)
+        if not match:
+            continue
+        videos = [p for p in index_path.parent.glob(f"{index_path.stem}.*") if p.suffix != '.jsonl']
+        if videos:
+            segments.append((int(match.group(1)), str(videos[0]), str(index_path)))
+    return sorted(segments)
+
+def read_index(index_path: str) -> List[dict]:
+    """读取分段索引"""
+    with open(index_path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def extract_frame(output_dir: str, frame_number: int, prefix: str = 'segment') -> tuple:
+    """
+    取出指定帧号的图像
+
+    Returns:
+        (BGR图像, 索引记录 {frame, offset, timestamp, detections})
+    """
+    segments = list_segments(output_dir, prefix)
+    starts = [start for start, _, _ in segments]
+    position = bisect.bisect_right(starts, frame_number) - 1
+    if position < 0:
+        raise ValueError(f"帧号 {frame_number} 不在输出范围内")
+    _, video_path, index_path = segments[position]
+
+    records = read_index(index_path)
+    offset = frame_number - starts[position]
+    if offset >= len(records):
+        raise ValueError(f"帧号 {frame_number} 不在输出范围内")
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        # 分段较短，逐帧跳过比按时间定位更可靠
+        for _ in range(offset):
+            if not cap.grab():
+                raise RuntimeError(f"读取分段失败: {video_path}")
+        ret, image = cap.read()
+    finally:
+        cap.release()
+    if not ret:
+        raise RuntimeError(f"读取分段失败: {video_path}")
+    return image, records[offset]
+
+def main():
+    """从视频分段中取出单帧"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='从视频分段输出中取出指定帧')
+    parser.add_argument('--dir', type=str, required=True, help='视频分段所在目录')
+    parser.add_argument('--frame', type=int, required=True, help='全局帧号')
+    parser.add_argument('--prefix', type=str, default='segment', help='分段文件名前缀')
+    parser.add_argument('--save', type=str, default=None, help='保存图像的路径，默认为 frame_{帧号}.jpg')
+    args = parser.parse_args()
+
+    try:
+        image, record = extract_frame(args.dir, args.frame, args.prefix)
+    except (ValueError, RuntimeError) as e:
+        print(f"错误: {e}")
+        raise SystemExit(1)
+    save_path = args.save or f"frame_{args.frame:08d}.jpg"
+    cv2.imwrite(save_path, image)
+    print(f"帧 {record['frame']}（时间戳 {record['timestamp']}）检测到 {len(record['detections'])} 个目标，"
+          f"已保存到: {save_path}")
+
+if __name__ == '__main__':
+    main()
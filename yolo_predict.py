@@ -7,6 +7,7 @@ YOLO预测脚本 - 参数化版本
 """
 
 import argparse
+import math
 import os
 import sys
 import cv2
@@ -14,18 +15,171 @@ import numpy as np
 import torch
 from pathlib import Path
 import io
-from typing import Union, List, Optional
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Union, List, Optional
 
 # 添加yolov5路径到系统路径
 sys.path.append(str(Path(__file__).parent / 'yolov5'))
 
-from yolov5.models.common import DetectMultiBackend
-from yolov5.utils.general import non_max_suppression, scale_coords
+try:
+    from yolov5.utils.general import non_max_suppression
+except ImportError:
+    # 没有克隆yolov5代码时（如只使用离线替身模型）使用结果一致的本地实现
+    from detection_nms import non_max_suppression
+from inference_engines import ENGINES, STUB_ENGINE, resolve_engine_weights, weights_hash
+from stream_capture import BLOCK, DROP_OLDEST, DROP_POLICIES, FrameGrabber
+from multi_stream import MultiStreamDetector, load_stream_list
+from detection_renderer import DetectionRenderer, class_color
+from input_buffers import InputBufferPool, letterbox_geometry, letterbox_into
+from output_encoder import FORMATS, OutputEncoder
+from result_writer import ResultWriter
+from video_segments import SegmentWriter
+from detection_sink import DetectionSink
+from result_cache import ResultCache
+from stub_backend import StubBackend
+from pipeline_metrics import PipelineMetrics
+from pipeline_trace import PipelineTracer, trace_frame
+from raw_predictions import RawPredictionCache
+
+class Detections:
+    """
+    检测结果容器，底层为单个 [N, 6] 数组 (x1, y1, x2, y2, 置信度, 类别)
+    
+    迭代或下标访问时返回与旧版兼容的字典 {'bbox', 'confidence', 'class'}，
+    需要批量处理时可直接使用 data / boxes / confidences / classes。
+    """
+    
+    __slots__ = ('data',)
+    
+    def __init__(self, data: Optional[np.ndarray] = None):
+        self.data = np.zeros((0, 6), dtype=np.float32) if data is None else data
+    
+    @classmethod
+    def concat(cls, items: List['Detections']) -> 'Detections':
+        """合并多个检测结果"""
+        if not items:
+            return cls()
+        if len(items) == 1:
+            return items[0]
+        return cls(np.concatenate([item.data for item in items], axis=0))
+    
+    @property
+    def boxes(self) -> np.ndarray:
+        """[N, 4] 整数边界框 (x1, y1, x2, y2)"""
+        return self.data[:, :4].astype(np.int32)
+    
+    @property
+    def confidences(self) -> np.ndarray:
+        """[N] 置信度"""
+        return self.data[:, 4]
+    
+    @property
+    def classes(self) -> np.ndarray:
+        """[N] 整数类别"""
+        return self.data[:, 5].astype(np.int32)
+    
+    def __len__(self) -> int:
+        return len(self.data)
+    
+    def __getitem__(self, index: int) -> dict:
+        row = self.data[index]
+        return {
+            'bbox': [int(x) for x in row[:4]],  # [x1, y1, x2, y2]
+            'confidence': float(row[4]),
+            'class': int(row[5])
+        }
+    
+    def __iter__(self):
+        for index in range(len(self.data)):
+            yield self[index]
+    
+    def __repr__(self) -> str:
+        return f"Detections(n={len(self)})"
+    
+    def to_list(self) -> List[dict]:
+        """转换为字典列表"""
+        return list(self)
+
+class PredictionResult:
+    """
+    单张图像的预测结果，标注后的图像在首次访问 jpeg 时才绘制和编码（格式由预测器的encoder决定，默认JPEG）
+    
+    可以像旧版的 (JPEG二进制流, 检测结果) 元组一样解包或下标访问，
+    此时会立即编码；不需要图像时只访问 detections 即可跳过绘制和编码，
+    需要未编码的标注图像（如写入视频）时访问 annotated。
+    render=False 预测得到的结果 jpeg 和 annotated 恒为 None。
+    shape 为原图尺寸 (高, 宽)，inference_ms 为预处理+推理+NMS耗时（批量推理时按图像数平摊）。
+    """
+    
+    __slots__ = ('detections', 'shape', 'inference_ms', '_image', '_predictor', '_annotated', '_jpeg')
+    
+    def __init__(self, detections: Detections, image: Optional[np.ndarray] = None, predictor=None,
+                 shape: Optional[tuple] = None, inference_ms: Optional[float] = None):
+        self.detections = detections
+        self.shape = shape
+        self.inference_ms = inference_ms
+        self._image = image
+        self._predictor = predictor
+        self._annotated = None
+        self._jpeg = None
+    
+    @property
+    def annotated(self) -> Optional[np.ndarray]:
+        """绘制好检测框的BGR图像，首次访问时绘制"""
+        if self._annotated is None and self._predictor is not None:
+            self._annotated = self._predictor._annotate(self._image, self.detections)
+        return self._annotated
+    
+    @property
+    def jpeg(self) -> Optional[bytes]:
+        """标注后的JPEG二进制流，首次访问时生成"""
+        if self._jpeg is None and self._predictor is not None:
+            if self._annotated is not None:
+                self._jpeg = self._predictor._encode(self._annotated)
+            else:
+                self._jpeg = self._predictor._encode_result(self._image, self.detections)
+        return self._jpeg
+    
+    @property
+    def encoded(self) -> bool:
+        """是否已经生成JPEG"""
+        return self._jpeg is not None
+    
+    def __len__(self) -> int:
+        return 2
+    
+    def __getitem__(self, index: int):
+        return (self.jpeg, self.detections)[index]
+    
+    def __iter__(self):
+        yield self.jpeg
+        yield self.detections
+    
+    def __repr__(self) -> str:
+        return f"PredictionResult(n={len(self.detections)}, encoded={self.encoded})"
 
 class YOLOPredictor:
     """YOLO预测器类"""
     
-    def __init__(self, model_path: str, conf_thres: float = 0.5, iou_thres: float = 0.5):
+    # 支持的图片格式
+    IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'}
+    
+    # letterbox填充颜色（与YOLOv5训练时一致）
+    LETTERBOX_COLOR = (114, 114, 114)
+    # 缓存的原图分辨率数量上限
+    LETTERBOX_CACHE_SIZE = 64
+    
+    # 支持的推理精度
+    PRECISIONS = {'fp32': torch.float32, 'fp16': torch.float16, 'bf16': torch.bfloat16}
+    
+    def __init__(self, model_path: str, conf_thres: float = 0.5, iou_thres: float = 0.5,
+                 imgsz: Union[int, tuple] = 640, precision: str = 'fp32', channels_last: bool = False,
+                 warmup_iters: int = 3, engine: str = 'torch', engine_cache_dir: Optional[str] = None,
+                 encoder: Optional[OutputEncoder] = None):
         """
         初始化YOLO预测器
         
@@ -33,6 +187,14 @@ class YOLOPredictor:
             model_path: 模型权重文件路径
             conf_thres: 置信度阈值
             iou_thres: NMS阈值
+            imgsz: 模型输入尺寸，整数表示正方形，或 (高, 宽)，会向上对齐到模型步长
+            precision: 推理精度，'fp32'、'fp16'（仅CUDA）或 'bf16'（CPU或支持bf16的GPU）
+            channels_last: 是否使用channels-last内存格式推理
+            warmup_iters: 加载后自动预热的推理次数，0表示不预热
+            engine: 推理引擎，'torch'、'onnxruntime'、'openvino'、'torchscript'，
+                    或 'stub'（离线替身模型，model_path为配置，见stub_backend）
+            engine_cache_dir: 引擎转换产物缓存目录，默认 ~/.cache/yolo_detection_gui/engines
+            encoder: 结果图像编码配置，默认JPEG质量95（与cv2.imencode默认一致），可随时替换
         """
         self.model_path = model_path
         self.conf_thres = conf_thres
@@ -40,159 +202,423 @@ class YOLOPredictor:
         self.device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
         self.model = None
         self.class_names = None  # 存储类别名称
+        self.renderer = DetectionRenderer()  # 检测框绘制器，模型加载后按类别名称重建
+        self.encoder = encoder or OutputEncoder()
+        self.writer = None  # 设置为ResultWriter后结果文件改为后台异步写入
+        self.sink = None  # 设置为DetectionSink后逐张/逐帧导出检测结果
+        self.cache = None  # 设置为ResultCache后文件夹模式跳过内容未变的图片
+        self.raw_cache = None  # 设置为RawPredictionCache后保留图片的NMS前输出，调整阈值时不必重新推理
+        self._weights_digest = None
+        self.metrics = PipelineMetrics()  # 分阶段耗时、帧数/丢帧/错误计数，设置tracer后同时记录执行追踪
+        self.imgsz = (imgsz, imgsz) if isinstance(imgsz, int) else tuple(imgsz)
+        self._letterbox_cache = {}  # 原图(高, 宽) -> letterbox几何参数
+        if engine not in ENGINES:
+            raise ValueError(f"不支持的推理引擎: {engine}，可选: {', '.join(ENGINES)}")
+        self.engine = engine
+        self.engine_cache_dir = engine_cache_dir
+        self.precision = self._resolve_precision(precision)
+        self.dtype = self.PRECISIONS[self.precision]
+        # 导出的引擎使用标准NCHW连续内存输入
+        self.channels_last = channels_last and engine == 'torch'
+        self.memory_format = torch.channels_last if self.channels_last else torch.contiguous_format
+        # 预处理缓冲区按输入形状复用，避免每帧重新分配
+        self._input_buffers = InputBufferPool(self.device, self.dtype, self.memory_format)
+        # 加载与预热耗时统计（毫秒）
+        self.load_stats = {'load_ms': None, 'warmup_ms': None, 'first_ms': None, 'steady_ms': None}
+        
+        start = time.perf_counter()
         self._load_model()
+        self.load_stats['load_ms'] = (time.perf_counter() - start) * 1000
+        self.imgsz = self._align_imgsz(self.imgsz)
+        
+        if warmup_iters > 0:
+            self.warmup(warmup_iters)
+        print(self.load_summary())
+    
+    def _align_imgsz(self, imgsz: tuple) -> tuple:
+        """将输入尺寸向上对齐到模型步长的整数倍"""
+        stride = int(getattr(self.model, 'stride', 32))
+        aligned = tuple(int(math.ceil(x / stride) * stride) for x in imgsz)
+        if aligned != tuple(imgsz):
+            print(f"输入尺寸 {tuple(imgsz)} 已对齐到步长 {stride}: {aligned}")
+        return aligned
+    
+    def _resolve_precision(self, precision: str) -> str:
+        """检查推理精度在当前设备上是否可用，不可用时回退到fp32"""
+        if precision not in self.PRECISIONS:
+            raise ValueError(f"不支持的推理精度: {precision}，可选: {', '.join(self.PRECISIONS)}")
+        
+        if precision == 'fp16' and self.device.type != 'cuda':
+            print("fp16仅支持CUDA设备，已回退到fp32")
+            return 'fp32'
+        if precision == 'bf16' and self.engine != 'torch':
+            print(f"{self.engine}引擎不支持bf16，已回退到fp32")
+            return 'fp32'
+        if precision == 'bf16' and self.device.type == 'cuda' and not torch.cuda.is_bf16_supported():
+            print("当前GPU不支持bf16，已回退到fp32")
+            return 'fp32'
+        return precision
     
     def _load_model(self):
         """加载YOLO模型"""
         try:
-            self.model = DetectMultiBackend(self.model_path, device=self.device)
+            if self.engine == STUB_ENGINE:
+                # 替身模型不读取权重，按配置输出确定的原始预测
+                self.model = StubBackend.from_spec(self.model_path, device=self.device,
+                                                   fp16=self.dtype == torch.float16)
+                print(self.model.describe())
+            else:
+                # 真实模型才需要yolov5代码，替身模型无需克隆yolov5
+                from yolov5.models.common import DetectMultiBackend
+                
+                # 非torch引擎首次使用时导出并缓存，之后直接加载缓存产物
+                weights = resolve_engine_weights(self.model_path, self.engine, self.imgsz,
+                                                 half=self.dtype == torch.float16,
+                                                 cache_dir=self.engine_cache_dir)
+                self.model = DetectMultiBackend(weights, device=self.device,
+                                               fp16=self.dtype == torch.float16)
+            
+            # bf16与channels-last只对PyTorch后端生效
+            if getattr(self.model, 'pt', False):
+                if self.dtype == torch.bfloat16:
+                    self.model.model.to(torch.bfloat16)
+                if self.channels_last:
+                    self.model.model.to(memory_format=torch.channels_last)
+            
             # 获取类别名称
             self.class_names = self.model.names if hasattr(self.model, 'names') else None
-            print(f"模型加载成功，使用设备: {self.device}")
+            self.renderer = DetectionRenderer(self.class_names)
+            print(f"模型加载成功，引擎: {self.engine}，使用设备: {self.device}，精度: {self.precision}"
+                  f"{'，channels-last' if self.channels_last else ''}")
             if self.class_names:
                 print(f"检测到 {len(self.class_names)} 个类别")
         except Exception as e:
             raise RuntimeError(f"模型加载失败: {str(e)}")
     
+    def _synchronize(self):
+        """CUDA上等待所有内核完成，保证计时准确"""
+        if self.device.type == 'cuda':
+            torch.cuda.synchronize(self.device)
+    
+    def warmup(self, n_iters: int = 3, imgsz: Optional[tuple] = None) -> dict:
+        """
+        用空白输入预热模型，完成内核选择和显存分配
+        
+        Args:
+            n_iters: 预热推理次数
+            imgsz: 预热输入尺寸 (高, 宽)，默认使用模型输入尺寸
+            
+        Returns:
+            更新后的 load_stats
+        """
+        if self.model is None:
+            raise RuntimeError("模型未加载")
+        
+        height, width = imgsz or self.imgsz
+        dummy = torch.zeros((1, 3, height, width), dtype=self.dtype, device=self.device)
+        dummy = dummy.contiguous(memory_format=self.memory_format)
+        
+        latencies = []
+        start = time.perf_counter()
+        with torch.no_grad():
+            for _ in range(max(1, n_iters)):
+                iter_start = time.perf_counter()
+                self._non_max_suppression(self.model(dummy))
+                self._synchronize()
+                latencies.append((time.perf_counter() - iter_start) * 1000)
+        
+        self.load_stats['warmup_ms'] = (time.perf_counter() - start) * 1000
+        self.load_stats['first_ms'] = latencies[0]
+        # 第一次之后的中位数作为稳态延迟
+        steady = sorted(latencies[1:]) or latencies
+        self.load_stats['steady_ms'] = steady[len(steady) // 2]
+        # 预热耗时不计入流水线统计
+        self.metrics.reset()
+        return self.load_stats
+    
+    def load_summary(self) -> str:
+        """返回模型加载与预热耗时的说明文本"""
+        stats = self.load_stats
+        parts = [f"模型加载耗时: {stats['load_ms']:.1f} ms"]
+        if stats['warmup_ms'] is None:
+            parts.append("未预热")
+        else:
+            parts.append(f"预热耗时: {stats['warmup_ms']:.1f} ms")
+            parts.append(f"首次推理: {stats['first_ms']:.1f} ms")
+            parts.append(f"稳态推理: {stats['steady_ms']:.1f} ms")
+        return "，".join(parts)
+    
+    def cache_params(self) -> str:
+        """影响检测结果的模型参数，与图片内容哈希一起组成结果缓存的键"""
+        if self._weights_digest is None:
+            # 替身模型的model_path是配置字符串，直接作为模型标识
+            if self.engine == STUB_ENGINE and not os.path.isfile(self.model_path):
+                self._weights_digest = f"stub:{self.model_path}"
+            else:
+                self._weights_digest = weights_hash(self.model_path)
+        return (f"{self._weights_digest}|conf={self.conf_thres:g}|iou={self.iou_thres:g}|"
+                f"imgsz={self.imgsz[0]}x{self.imgsz[1]}|{self.engine}|{self.precision}")
+    
+    @property
+    def tracer(self) -> Optional[PipelineTracer]:
+        """执行追踪器，设置为PipelineTracer后各阶段计时同时按线程、按帧记录追踪事件"""
+        return self.metrics.tracer
+    
+    @tracer.setter
+    def tracer(self, tracer: Optional[PipelineTracer]):
+        self.metrics.tracer = tracer
+        if self.writer is not None:
+            self.writer.tracer = tracer
+    
+    def _trace_frame(self, frame):
+        """启用追踪时为当前线程设置帧标识（帧号、文件名或批次中各帧标识的列表）"""
+        return trace_frame(self.metrics.tracer, frame)
+    
     def _get_class_color(self, class_id: int) -> tuple:
         """为不同类别生成对比度高的颜色"""
-        # 预定义一些对比度高的颜色 (BGR格式)
-        colors = [
-            (0, 255, 0),     # 绿色
-            (255, 0, 0),     # 蓝色  
-            (0, 0, 255),     # 红色
-            (255, 255, 0),   # 青色
-            (255, 0, 255),   # 品红色
-            (0, 255, 255),   # 黄色
-            (128, 0, 128),   # 紫色
-            (255, 165, 0),   # 橙色
-            (0, 128, 255),   # 橙红色
-            (255, 20, 147),  # 深粉红色
-            (0, 255, 127),   # 春绿色
-            (255, 105, 180), # 热粉红色
-            (64, 224, 208),  # 青绿色
-            (255, 69, 0),    # 红橙色
-            (50, 205, 50),   # 绿黄色
-            (138, 43, 226),  # 蓝紫色
-            (255, 140, 0),   # 深橙色
-            (72, 61, 139),   # 深板岩蓝
-            (220, 20, 60),   # 深红色
-            (0, 206, 209),   # 深青绿色
-        ]
-        
-        # 如果类别数超过预定义颜色数，使用算法生成颜色
-        if class_id < len(colors):
-            return colors[class_id]
-        else:
-            # 使用HSV色彩空间生成颜色，确保高饱和度和亮度
-            import colorsys
-            hue = (class_id * 137.508) % 360  # 使用黄金角度确保颜色分布均匀
-            rgb = colorsys.hsv_to_rgb(hue / 360, 0.9, 0.9)  # 高饱和度和亮度
-            return (int(rgb[2] * 255), int(rgb[1] * 255), int(rgb[0] * 255))  # 转换为BGR
+        return class_color(class_id)
     
-    def _preprocess_image(self, image: np.ndarray) -> torch.Tensor:
-        """预处理图像"""
-        # 调整图像大小
-        img = cv2.resize(image, (640, 480))
-        # 转换为tensor并归一化
-        img_tensor = torch.from_numpy(img).permute(2, 0, 1).contiguous().float() / 255.0
-        if img_tensor.ndimension() == 3:
-            img_tensor = img_tensor.unsqueeze(0)
-        return img_tensor.to(self.device)
-    
-    def _postprocess_detections(self, pred, img_tensor_shape, original_shape):
-        """后处理检测结果"""
-        detections = non_max_suppression(pred, conf_thres=self.conf_thres, iou_thres=self.iou_thres)
+    def _letterbox_geometry(self, shape: tuple) -> tuple:
+        """
+        计算letterbox缩放几何参数，按原图分辨率缓存
         
-        results = []
-        for det in detections:
-            if len(det):
-                # 将坐标缩放回原始图像尺寸
-                det[:, :4] = torch.from_numpy(
-                    scale_coords(img_tensor_shape[2:], det[:, :4].cpu().numpy(), original_shape)
-                ).to(det.device).type(det.dtype).round()
-                
-                # 转换为numpy数组
-                det_np = det.cpu().numpy()
-                for *xyxy, conf, cls in det_np:
-                    results.append({
-                        'bbox': [int(x) for x in xyxy],  # [x1, y1, x2, y2]
-                        'confidence': float(conf),
-                        'class': int(cls)
-                    })
+        Args:
+            shape: 原图尺寸 (高, 宽, ...)
+            
+        Returns:
+            (缩放后尺寸(宽, 高), 边框(上, 下, 左, 右), ratio_pad ((gain, gain), (pad_w, pad_h)))
+        """
+        key = (shape[0], shape[1])
+        geometry = self._letterbox_cache.get(key)
+        if geometry is not None:
+            return geometry
         
-        return results
+        geometry = letterbox_geometry(key, self.imgsz)
+        
+        # 分辨率种类过多时清空缓存，避免无限增长
+        if len(self._letterbox_cache) >= self.LETTERBOX_CACHE_SIZE:
+            self._letterbox_cache.clear()
+        self._letterbox_cache[key] = geometry
+        return geometry
     
-    def _draw_detections(self, image: np.ndarray, detections: List[dict]) -> np.ndarray:
-        """在图像上绘制检测结果"""
-        annotated_image = image.copy()
+    def _letterbox(self, image: np.ndarray) -> np.ndarray:
+        """保持长宽比缩放并填充到模型输入尺寸，返回新的uint8图像"""
+        (unpad_w, unpad_h), (top, bottom, left, right), _ = self._letterbox_geometry(image.shape)
         
-        for det in detections:
-            x1, y1, x2, y2 = det['bbox']
-            conf = det['confidence']
-            cls = det['class']
-            
-            # 根据类别获取颜色
-            color = self._get_class_color(cls)
-            
-            # 绘制边界框 - 使用类别特定颜色
-            cv2.rectangle(annotated_image, (x1, y1), (x2, y2), color, 3)
+        img = image
+        if (image.shape[1], image.shape[0]) != (unpad_w, unpad_h):
+            img = cv2.resize(image, (unpad_w, unpad_h), interpolation=cv2.INTER_LINEAR)
+        if top or bottom or left or right:
+            img = cv2.copyMakeBorder(img, top, bottom, left, right,
+                                     cv2.BORDER_CONSTANT, value=self.LETTERBOX_COLOR)
+        return img
+    
+    def _preprocess_batch(self, images: List[np.ndarray], letterboxed: bool = False) -> torch.Tensor:
+        """
+        预处理一批图像，结果写入按形状复用的缓冲区
+        
+        Args:
+            images: BGR图像列表
+            letterboxed: 图像是否已经过 _letterbox 处理
             
-            # 绘制中心点 - 使用更深的颜色
-            center_x = (x1 + x2) // 2
-            center_y = (y1 + y2) // 2
-            # 将颜色调暗作为中心点颜色
-            dark_color = tuple(int(c * 0.7) for c in color)
-            cv2.circle(annotated_image, (center_x, center_y), 4, dark_color, -1)
-
-            # 添加标签 - 使用类别名称而不是序号
-            if self.class_names and cls < len(self.class_names):
-                class_name = self.class_names[cls]
-                label = f"{class_name} {conf:.2f}"
-            else:
-                label = f"cls:{cls} conf:{conf:.2f}"
+        Returns:
+            [B, 3, H, W] 模型输入张量；该张量会被同一线程的下一次预处理覆盖
+        """
+        with self.metrics.timer('preprocess'):
+            height, width = self.imgsz
+            buffers = self._input_buffers.get(len(images), height, width)
+            buffers.wait_host()
             
-            # 计算标签背景尺寸
-            font = cv2.FONT_HERSHEY_SIMPLEX
-            font_scale = 0.8
-            thickness = 2
-            (text_width, text_height), baseline = cv2.getTextSize(label, font, font_scale, thickness)
+            for i, image in enumerate(images):
+                if letterboxed:
+                    buffers.host[i] = image
+                    buffers.geometry[i] = None
+                else:
+                    geometry = self._letterbox_geometry(image.shape)
+                    letterbox_into(image, geometry, buffers.host[i], self.LETTERBOX_COLOR,
+                                   previous=buffers.geometry[i])
+                    buffers.geometry[i] = geometry
             
-            # 绘制标签背景矩形 - 使用类别特定颜色
-            padding = 5
-            label_y = max(y1 - 10, text_height + padding)  # 确保标签不会超出图像顶部
-            cv2.rectangle(annotated_image, 
-                         (x1, label_y - text_height - padding),
-                         (x1 + text_width + padding * 2, label_y + baseline),
-                         color, -1)
+            # uint8以异步方式传输到设备后原地转换为目标精度和内存格式
+            return buffers.upload()
+    
+    def _preprocess_image(self, image: np.ndarray) -> torch.Tensor:
+        """预处理图像：保持长宽比缩放并填充到模型输入尺寸"""
+        return self._preprocess_batch([image])
+    
+    def _forward(self, img_tensor: torch.Tensor):
+        """模型前向推理"""
+        with self.metrics.timer('inference'), torch.no_grad():
+            return self.model(img_tensor)
+    
+    def _non_max_suppression(self, pred) -> list:
+        """执行NMS，低精度输出先转换为float32以兼容NMS实现"""
+        with self.metrics.timer('nms'):
+            if isinstance(pred, (list, tuple)):
+                pred = pred[0]
+            if pred.dtype == torch.bfloat16:
+                pred = pred.float()
+            return non_max_suppression(pred, conf_thres=self.conf_thres, iou_thres=self.iou_thres)
+    
+    def _postprocess_detections(self, pred, img_tensor_shape, original_shape) -> Detections:
+        """后处理检测结果"""
+        detections = self._non_max_suppression(pred)
+        
+        return Detections.concat([self._scale_detections(det, img_tensor_shape, original_shape)
+                                  for det in detections])
+    
+    def _scale_detections(self, det: torch.Tensor, img_tensor_shape, original_shape) -> Detections:
+        """
+        将单张图像NMS后的检测框缩放回原始尺寸
+        
+        缩放在检测张量所在设备上完成，最后只做一次 [N, 6] 的设备到主机拷贝。
+        """
+        if not len(det):
+            return Detections()
+        
+        with self.metrics.timer('postprocess'):
+            (gain, _), (pad_w, pad_h) = self._letterbox_geometry(original_shape)[2]
+            height, width = original_shape[:2]
             
-            # 绘制标签文字 - 使用白色或黑色，根据背景颜色自动选择
-            # 计算颜色亮度来决定文字颜色
-            brightness = sum(color) / 3
-            text_color = (0, 0, 0) if brightness > 127 else (255, 255, 255)
+            # 去除填充、按缩放比例还原并裁剪到原图边界
+            boxes = det[:, :4]
+            boxes[:, [0, 2]] -= pad_w
+            boxes[:, [1, 3]] -= pad_h
+            boxes /= gain
+            boxes[:, [0, 2]] = boxes[:, [0, 2]].clamp(0, width)
+            boxes[:, [1, 3]] = boxes[:, [1, 3]].clamp(0, height)
+            boxes.round_()
             
-            cv2.putText(annotated_image, label, (x1 + padding, label_y - padding), 
-                       font, font_scale, text_color, thickness)
-        
-        return annotated_image
+            return Detections(det[:, :6].float().cpu().numpy())
     
-    def predict_image(self, image: np.ndarray) -> tuple:
-        """预测单张图像并返回JPEG二进制流和检测结果"""
+    def _draw_detections(self, image: np.ndarray, detections: Detections,
+                         out: Optional[np.ndarray] = None) -> np.ndarray:
+        """在图像上绘制检测结果，out见DetectionRenderer.draw"""
+        return self.renderer.draw(image, detections.boxes, detections.confidences,
+                                  detections.classes, out=out)
+    
+    def predict_image(self, image: np.ndarray, render: bool = True,
+                      raw_key: Optional[str] = None) -> PredictionResult:
+        """
+        预测单张图像
+        
+        Args:
+            image: BGR图像
+            render: False时只返回检测结果，不绘制也不编码JPEG
+            raw_key: 设置了raw_cache时以该键保存NMS前输出
+            
+        Returns:
+            PredictionResult，可解包为 (JPEG二进制流, 检测结果)；JPEG在首次访问时才编码
+        """
         if self.model is None:
             raise RuntimeError("模型未加载")
         
+        start = time.perf_counter()
+        
         # 预处理
         img_tensor = self._preprocess_image(image)
         
         # 推理
-        with torch.no_grad():
-            pred = self.model(img_tensor)
+        pred = self._forward(img_tensor)
+        if raw_key is not None:
+            self._keep_raw([raw_key], pred, img_tensor.shape, [image])
         
         # 后处理
         detections = self._postprocess_detections(pred, img_tensor.shape, image.shape)
+        inference_ms = (time.perf_counter() - start) * 1000
+        
+        return self._make_result(image, detections, render, inference_ms)
+    
+    def _keep_raw(self, keys: List[Optional[str]], pred, input_shape, images: List[np.ndarray]):
+        """设置了raw_cache时保存一批图像的NMS前输出，键为None的图像不保存"""
+        if self.raw_cache is None:
+            return
+        if isinstance(pred, (list, tuple)):
+            pred = pred[0]
+        for key, image_pred, image in zip(keys, pred, images):
+            if key is not None:
+                self.raw_cache.put(key, image_pred, input_shape, image.shape)
+    
+    def raw_key(self, image_path: str) -> Optional[str]:
+        """设置了raw_cache时返回图片文件的NMS前输出缓存键"""
+        if self.raw_cache is None:
+            return None
+        return self.raw_cache.file_key(image_path)
+    
+    def rethreshold(self, image_path: str, image: Optional[np.ndarray] = None,
+                    render: bool = True) -> Optional[PredictionResult]:
+        """
+        用缓存的NMS前输出按当前 conf_thres / iou_thres 重新执行NMS，不重新推理
         
-        # 绘制检测结果
-        annotated_image = self._draw_detections(image, detections)
+        Args:
+            image_path: 图片文件路径
+            image: 已解码的图片，为None且需要绘制时读取image_path
+            render: False时只返回检测结果
+            
+        Returns:
+            PredictionResult；未缓存、文件已修改或置信度阈值低于缓存下限时返回None
+        """
+        if self.raw_cache is None:
+            return None
+        entry = self.raw_cache.get(self.raw_cache.file_key(image_path))
+        if entry is None or self.conf_thres < entry.min_conf:
+            return None
+        
+        start = time.perf_counter()
+        det = self._non_max_suppression(entry.candidates.unsqueeze(0))[0]
+        detections = self._scale_detections(det, entry.input_shape, entry.image_shape)
+        inference_ms = (time.perf_counter() - start) * 1000
+        # 没有推理新的帧，不计入帧数统计；文件夹模式由调用方按产出的图片计数
+        if not render:
+            return PredictionResult(detections, shape=entry.image_shape[:2], inference_ms=inference_ms)
+        if image is None:
+            image = self._read_image(image_path)
+            if image is None:
+                raise ValueError(f"无法读取图片: {image_path}")
+        return self._make_result(image, detections, render, inference_ms, count_frame=False)
+    
+    def _make_result(self, image: np.ndarray, detections: Detections, render: bool,
+                     inference_ms: Optional[float] = None, count_frame: bool = True) -> PredictionResult:
+        """包装预测结果，render为False时不保留原图；count_frame为False时不计入帧数统计"""
+        if count_frame:
+            self.metrics.frame_done()
+        shape = image.shape[:2]
+        if not render:
+            return PredictionResult(detections, shape=shape, inference_ms=inference_ms)
+        return PredictionResult(detections, image, self, shape=shape, inference_ms=inference_ms)
+    
+    def _record_detections(self, source: str, detections: Detections, shape: tuple,
+                           inference_ms: Optional[float] = None, frame: Optional[int] = None):
+        """设置了sink时导出一条检测记录"""
+        if self.sink is not None:
+            self.sink.add(source, detections, frame=frame, inference_ms=inference_ms, shape=shape)
+    
+    def _render_result(self, image: np.ndarray, detections: Detections) -> tuple:
+        """立即绘制并编码，返回 (JPEG二进制流, 检测结果)"""
+        return self._encode_result(image, detections), detections
+    
+    def _encode_result(self, image: np.ndarray, detections: Detections) -> bytes:
+        """绘制检测结果并按encoder配置编码"""
+        # 画布使用当前线程复用的缓冲区，编码后即可再次使用
+        annotated_image = self._annotate(image, detections, out=self.renderer.output_buffer(image))
+        
+        # 按输出配置编码（格式、质量、缩放）
+        return self._encode(annotated_image)
+    
+    def _encode(self, image: np.ndarray) -> bytes:
+        """按encoder配置编码图像"""
+        with self.metrics.timer('encode'):
+            return self.encoder.encode(image)
+    
+    def _annotate(self, image: np.ndarray, detections: Detections,
+                  out: Optional[np.ndarray] = None) -> np.ndarray:
+        """绘制检测框，没有检测结果时在图像中央添加"non-detected"标签"""
+        with self.metrics.timer('draw'):
+            return self._annotate_image(image, detections, out)
+    
+    def _annotate_image(self, image: np.ndarray, detections: Detections,
+                        out: Optional[np.ndarray] = None) -> np.ndarray:
+        annotated_image = self._draw_detections(image, detections, out=out)
         
         # 如果没有检测到任何对象，在图像中央添加"non-detected"标签
         if not detections:
@@ -223,141 +649,926 @@ class YOLOPredictor:
             cv2.putText(annotated_image, text, (text_x, text_y), 
                        font, font_scale, (255, 255, 255), thickness)
         
-        # 转换为JPEG二进制流
-        _, buffer = cv2.imencode('.jpg', annotated_image)
-        return buffer.tobytes(), detections
+        return annotated_image
+    
+    def predict_batch(self, images: List[np.ndarray], batch_size: int = 8,
+                      render: bool = True, raw_keys: Optional[List[Optional[str]]] = None) -> List[PredictionResult]:
+        """
+        批量预测多张图像
+        
+        Args:
+            images: BGR图像列表
+            batch_size: 每次送入模型的图像数量
+            render: False时只返回检测结果，不绘制也不编码JPEG
+            raw_keys: 与images对应的NMS前输出缓存键，见predict_image
+            
+        Returns:
+            与输入顺序一致的PredictionResult列表，每项可解包为 (JPEG二进制流, 检测结果)
+        """
+        if self.model is None:
+            raise RuntimeError("模型未加载")
+        if batch_size < 1:
+            raise ValueError(f"batch_size必须大于0: {batch_size}")
+        
+        results = []
+        for start in range(0, len(images), batch_size):
+            chunk = images[start:start + batch_size]
+            chunk_start = time.perf_counter()
+            
+            # 整批直接预处理到复用的批次缓冲区，只调用一次模型
+            batch_tensor = self._preprocess_batch(chunk)
+            
+            pred = self._forward(batch_tensor)
+            if raw_keys is not None:
+                self._keep_raw(raw_keys[start:start + batch_size], pred, batch_tensor.shape, chunk)
+            
+            # NMS按图像分别返回结果，逐张缩放坐标并绘制
+            detections_per_image = self._non_max_suppression(pred)
+            chunk_detections = [self._scale_detections(det, batch_tensor.shape, image.shape)
+                                for image, det in zip(chunk, detections_per_image)]
+            inference_ms = (time.perf_counter() - chunk_start) * 1000 / len(chunk)
+            for image, detections in zip(chunk, chunk_detections):
+                results.append(self._make_result(image, detections, render, inference_ms))
+        
+        return results
     
-    def predict_single_image(self, image_path: str) -> tuple:
-        """预测单张图片文件"""
+    def predict_single_image(self, image_path: str, render: bool = True) -> PredictionResult:
+        """预测单张图片文件，参数同predict_image"""
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"图片文件不存在: {image_path}")
         
-        image = cv2.imread(image_path)
+        image = self._read_image(image_path)
         if image is None:
             raise ValueError(f"无法读取图片: {image_path}")
         
-        return self.predict_image(image)
+        return self.predict_image(image, render=render, raw_key=self.raw_key(image_path))
+    
+    def _read_image(self, image_path: str) -> Optional[np.ndarray]:
+        """读取并解码图片，失败返回None"""
+        frame = os.path.basename(image_path) if self.metrics.tracer is not None else None
+        with self.metrics.timer('decode', frame):
+            return cv2.imread(image_path)
+    
+    def predict_images_folder(self, folder_path: str, batch_size: int = 1, num_workers: int = 0,
+                              decode_queue_size: int = 16, render_queue_size: int = 16,
+                              output_dir: Optional[str] = None, output_prefix: str = 'predicted_',
+                              render: bool = True) -> List[tuple]:
+        """预测文件夹中的所有图片，参数同iter_images_folder，结果全部保存在列表中返回"""
+        return list(self.iter_images_folder(folder_path, batch_size, num_workers,
+                                            decode_queue_size, render_queue_size,
+                                            output_dir, output_prefix, render))
     
-    def predict_images_folder(self, folder_path: str) -> List[tuple]:
-        """预测文件夹中的所有图片"""
+    def iter_images_folder(self, folder_path: str, batch_size: int = 1, num_workers: int = 0,
+                           decode_queue_size: int = 16, render_queue_size: int = 16,
+                           output_dir: Optional[str] = None, output_prefix: str = 'predicted_',
+                           render: bool = True) -> Iterator[tuple]:
+        """
+        逐张产出文件夹中图片的预测结果，内存占用与图片数量无关
+        
+        Args:
+            folder_path: 图片文件夹路径
+            batch_size: 每批推理的图片数量
+            num_workers: 解码/绘制线程池大小，0表示在当前线程中顺序处理
+            decode_queue_size: 解码阶段预取队列深度（流水线模式）
+            render_queue_size: 绘制/编码阶段待完成任务上限（流水线模式）
+            output_dir: 结果保存目录，为None时不写文件；设置了writer时产出结果后文件可能仍在写入，
+                        调用 writer.flush() 等待写完
+            output_prefix: 结果文件名前缀
+            render: False时只产出检测结果，不绘制、不编码也不写文件
+            
+        Yields:
+            (文件名, JPEG二进制流, 检测结果)，render为False时JPEG二进制流为None；
+            设置了cache时缓存命中的图片先产出，其结果图片已是最新的则JPEG二进制流为None
+        """
         if not os.path.exists(folder_path):
             raise FileNotFoundError(f"文件夹不存在: {folder_path}")
         
-        # 支持的图片格式
-        image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'}
-        
-        results = []
         folder = Path(folder_path)
+        image_files = [f for f in folder.iterdir() if f.suffix.lower() in self.IMAGE_EXTENSIONS]
+        
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
         
-        for image_file in folder.iterdir():
-            if image_file.suffix.lower() in image_extensions:
+        # 缓存命中的图片不再推理，只处理新增或修改过的图片
+        cache_keys = None
+        if self.cache is not None:
+            image_files, cache_keys = yield from self._iter_cached(image_files, output_dir,
+                                                                   output_prefix, render)
+        
+        # 保留了NMS前输出的图片（通常只是阈值变了）只重新执行NMS和绘制
+        if self.raw_cache is not None:
+            image_files = yield from self._iter_rethresholded(image_files, output_dir, output_prefix,
+                                                              render, cache_keys)
+        
+        if num_workers > 0:
+            yield from self._iter_files_pipelined(image_files, batch_size, num_workers,
+                                                  decode_queue_size, render_queue_size,
+                                                  output_dir, output_prefix, render, cache_keys)
+            return
+        
+        if batch_size <= 1:
+            for image_file in image_files:
                 try:
-                    jpeg_data, detections = self.predict_single_image(str(image_file))
-                    results.append((image_file.name, jpeg_data, detections))
-                    print(f"已处理: {image_file.name}")
+                    with self._trace_frame(image_file.name):
+                        result = self.predict_single_image(str(image_file), render=render)
+                        jpeg_data, detections = result
+                        cache_key = self._cache_detections(cache_keys, image_file.name, detections)
+                        self._save_result(output_dir, output_prefix, image_file.name, jpeg_data, cache_key)
+                    self._record_detections(image_file.name, detections, result.shape, result.inference_ms)
                 except Exception as e:
                     print(f"处理 {image_file.name} 时出错: {e}")
+                    self.metrics.incr('errors')
+                    continue
+                print(f"已处理: {image_file.name}")
+                yield image_file.name, jpeg_data, detections
+            return
         
-        return results
+        # 批量模式：先读取一批图片，再一次性推理
+        batch_names, batch_images, batch_keys = [], [], []
+        for image_file in image_files:
+            image = self._read_image(str(image_file))
+            if image is None:
+                print(f"处理 {image_file.name} 时出错: 无法读取图片")
+                self.metrics.incr('errors')
+                continue
+            batch_names.append(image_file.name)
+            batch_images.append(image)
+            batch_keys.append(self.raw_key(str(image_file)))
+            if len(batch_images) >= batch_size:
+                yield from self._iter_named_batch(batch_names, batch_images, batch_size,
+                                                  output_dir, output_prefix, render, cache_keys, batch_keys)
+                batch_names, batch_images, batch_keys = [], [], []
+        
+        if batch_images:
+            yield from self._iter_named_batch(batch_names, batch_images, batch_size,
+                                              output_dir, output_prefix, render, cache_keys, batch_keys)
     
-    def predict_video_stream(self, stream_url: str, max_frames: int = 100) -> List[tuple]:
-        """预测网络视频流"""
-        cap = cv2.VideoCapture(stream_url)
+    def _iter_cached(self, image_files: List[Path], output_dir: Optional[str], output_prefix: str,
+                     render: bool) -> Iterator[tuple]:
+        """
+        产出缓存命中图片的结果，返回 (未命中的图片文件列表, 文件名 -> 结果键)
         
-        if not cap.isOpened():
-            raise RuntimeError(f"无法打开视频流: {stream_url}")
+        命中时不再推理；需要结果图片时，只有输出目录中没有由同一结果生成的图片才重新绘制和编码。
+        """
+        params = self.cache_params()
+        encoder = repr(self.encoder)
+        misses, cache_keys = [], {}
+        for image_file in image_files:
+            try:
+                key = self.cache.make_key(self.cache.file_digest(str(image_file)), params)
+                data = self.cache.get(key)
+            except Exception as e:
+                print(f"读取 {image_file.name} 的缓存时出错: {e}")
+                misses.append(image_file)
+                continue
+            if data is None:
+                misses.append(image_file)
+                cache_keys[image_file.name] = key
+                continue
+            
+            detections = Detections(data)
+            jpeg_data, shape = None, None
+            try:
+                output_path = None
+                if output_dir:
+                    output_path = os.path.join(output_dir, self.output_filename(image_file.name, output_prefix))
+                if render and not (output_path and self.cache.output_current(output_path, key, encoder)):
+                    with self._trace_frame(image_file.name):
+                        image = self._read_image(str(image_file))
+                        if image is None:
+                            raise ValueError(f"无法读取图片: {image_file}")
+                        shape = image.shape
+                        jpeg_data, _ = self._render_result(image, detections)
+                        self._save_result(output_dir, output_prefix, image_file.name, jpeg_data, key)
+                self._record_detections(image_file.name, detections, shape)
+            except Exception as e:
+                print(f"处理 {image_file.name} 时出错: {e}")
+                self.metrics.incr('errors')
+                continue
+            self.metrics.frame_done()
+            print(f"已处理(缓存): {image_file.name}")
+            yield image_file.name, jpeg_data, detections
+        
+        print(f"缓存命中 {len(image_files) - len(misses)} 张，需要推理 {len(misses)} 张")
+        return misses, cache_keys
+    
+    def _iter_rethresholded(self, image_files: List[Path], output_dir: Optional[str], output_prefix: str,
+                            render: bool, cache_keys: Optional[dict] = None) -> Iterator[tuple]:
+        """产出保留了NMS前输出的图片按当前阈值重新NMS的结果，返回仍需推理的图片文件列表"""
+        misses = []
+        for image_file in image_files:
+            try:
+                with self._trace_frame(image_file.name):
+                    result = self.rethreshold(str(image_file), render=render)
+                    if result is None:
+                        misses.append(image_file)
+                        continue
+                    jpeg_data, detections = result
+                    cache_key = self._cache_detections(cache_keys, image_file.name, detections)
+                    self._save_result(output_dir, output_prefix, image_file.name, jpeg_data, cache_key)
+                self._record_detections(image_file.name, detections, result.shape, result.inference_ms)
+            except Exception as e:
+                print(f"处理 {image_file.name} 时出错: {e}")
+                self.metrics.incr('errors')
+                continue
+            self.metrics.frame_done()
+            print(f"已处理(重新NMS): {image_file.name}")
+            yield image_file.name, jpeg_data, detections
+        
+        if len(misses) < len(image_files):
+            print(f"重新NMS {len(image_files) - len(misses)} 张，需要推理 {len(misses)} 张")
+        return misses
+    
+    def _cache_detections(self, cache_keys: Optional[dict], name: str, detections: Detections) -> Optional[str]:
+        """将未命中图片的检测结果写入缓存，返回结果键"""
+        key = cache_keys.get(name) if cache_keys else None
+        if key is not None and self.cache is not None:
+            self.cache.put(key, detections.data)
+        return key
+    
+    def output_filename(self, name: str, output_prefix: str = 'predicted_') -> str:
+        """输入图片对应的结果文件名，后缀与当前输出格式一致"""
+        return f'{output_prefix}{self.encoder.output_name(name)}'
+    
+    def _save_result(self, output_dir: Optional[str], output_prefix: str, name: str, jpeg_data: Optional[bytes],
+                     cache_key: Optional[str] = None):
+        """将编码后的结果写入输出目录，设置了writer时交给后台线程写入"""
+        if not output_dir or jpeg_data is None:
+            return
+        output_path = os.path.join(output_dir, self.output_filename(name, output_prefix))
+        if cache_key is not None and self.cache is not None:
+            self.cache.put_output(output_path, cache_key, repr(self.encoder), len(jpeg_data))
+        # 异步写入时为提交（含队列满时的等待）耗时
+        with self.metrics.timer('write'):
+            if self.writer is not None:
+                self.writer.submit(output_path, jpeg_data)
+                return
+            with open(output_path, 'wb') as f:
+                f.write(jpeg_data)
+    
+    def _decode_stage(self, image_file: Path) -> tuple:
+        """流水线解码阶段：读取文件、解码并letterbox缩放，设备传输留给推理阶段"""
+        image = self._read_image(str(image_file))
+        if image is None:
+            raise ValueError(f"无法读取图片: {image_file}")
+        return image_file.name, image, self._letterbox(image), self.raw_key(str(image_file))
+    
+    def _render_stage(self, name: str, image: np.ndarray, detections: Detections,
+                      output_dir: Optional[str], output_prefix: str, cache_key: Optional[str] = None) -> tuple:
+        """流水线绘制阶段：绘制检测框、JPEG编码并写文件"""
+        with self._trace_frame(name):
+            jpeg_data, detections = self._render_result(image, detections)
+            self._save_result(output_dir, output_prefix, name, jpeg_data, cache_key)
+        return name, jpeg_data, detections
+    
+    def _iter_files_pipelined(self, image_files: List[Path], batch_size: int, num_workers: int,
+                              decode_queue_size: int, render_queue_size: int,
+                              output_dir: Optional[str], output_prefix: str,
+                              render: bool = True, cache_keys: Optional[dict] = None) -> Iterator[tuple]:
+        """
+        三段式流水线：解码线程池 -> 推理(当前线程) -> 绘制/编码线程池
+        
+        解码任务通过有界队列按文件顺序交给推理阶段，绘制任务的未完成数量
+        受render_queue_size限制，结果按输入顺序产出。render为False时跳过绘制阶段。
+        """
+        batch_size = max(1, batch_size)
+        decoded_queue = queue.Queue(maxsize=max(1, decode_queue_size))
+        stop_event = threading.Event()
+        
+        with ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix='yolo-decode') as decode_pool, \
+             ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix='yolo-render') as render_pool:
+            
+            def put(item) -> bool:
+                # 队列满时等待，消费方提前停止时放弃，返回是否放入
+                while not stop_event.is_set():
+                    try:
+                        decoded_queue.put(item, timeout=0.1)
+                        return True
+                    except queue.Full:
+                        continue
+                return False
+            
+            def feed():
+                # 按顺序提交解码任务，队列满时阻塞，从而限制预取数量
+                for image_file in image_files:
+                    future = decode_pool.submit(self._decode_stage, image_file)
+                    if not put((image_file.name, future)):
+                        return
+                # 结束标记同样不能在消费方停止后阻塞，否则finally中的join无法返回
+                put(None)
+            
+            feeder = threading.Thread(target=feed, name='yolo-feeder', daemon=True)
+            feeder.start()
+            
+            pending_renders = deque()
+            
+            def collect(block_until: int):
+                # 按提交顺序取回绘制结果，直到未完成数量不超过block_until
+                while len(pending_renders) > block_until:
+                    name, future = pending_renders.popleft()
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"处理 {name} 时出错: {e}")
+                        self.metrics.incr('errors')
+                        continue
+                    # 结果不经过_make_result，在此计数
+                    self.metrics.frame_done()
+                    print(f"已处理: {name}")
+                    yield result
+            
+            def infer(batch: List[tuple]):
+                try:
+                    batch_start = time.perf_counter()
+                    with self._trace_frame([name for name, _, _, _ in batch]):
+                        batch_tensor = self._preprocess_batch([canvas for _, _, canvas, _ in batch],
+                                                              letterboxed=True)
+                        pred = self._forward(batch_tensor)
+                        self._keep_raw([key for _, _, _, key in batch], pred, batch_tensor.shape,
+                                       [image for _, image, _, _ in batch])
+                        detections_per_image = self._non_max_suppression(pred)
+                except Exception as e:
+                    print(f"处理批次 {batch[0][0]} ~ {batch[-1][0]} 时出错: {e}")
+                    self.metrics.incr('errors', len(batch))
+                    return
+                inference_ms = (time.perf_counter() - batch_start) * 1000 / len(batch)
+                for (name, image, _, _), det in zip(batch, detections_per_image):
+                    with self._trace_frame(name):
+                        detections = self._scale_detections(det, batch_tensor.shape, image.shape)
+                    cache_key = self._cache_detections(cache_keys, name, detections)
+                    self._record_detections(name, detections, image.shape, inference_ms)
+                    if not render:
+                        self.metrics.frame_done()
+                        print(f"已处理: {name}")
+                        yield name, None, detections
+                        continue
+                    future = render_pool.submit(self._render_stage, name, image, detections,
+                                                output_dir, output_prefix, cache_key)
+                    pending_renders.append((name, future))
+                    yield from collect(max(1, render_queue_size))
+            
+            try:
+                batch = []
+                while True:
+                    item = decoded_queue.get()
+                    if item is None:
+                        break
+                    name, future = item
+                    try:
+                        batch.append(future.result())
+                    except Exception as e:
+                        print(f"处理 {name} 时出错: {e}")
+                        self.metrics.incr('errors')
+                        continue
+                    
+                    if len(batch) >= batch_size:
+                        yield from infer(batch)
+                        batch = []
+                
+                if batch:
+                    yield from infer(batch)
+                
+                yield from collect(0)
+            finally:
+                stop_event.set()
+                feeder.join()
+    
+    def _iter_named_batch(self, names: List[str], images: List[np.ndarray], batch_size: int,
+                          output_dir: Optional[str], output_prefix: str,
+                          render: bool = True, cache_keys: Optional[dict] = None,
+                          raw_keys: Optional[List[Optional[str]]] = None) -> Iterator[tuple]:
+        """批量预测并为结果附加文件名，出错时整批跳过"""
+        try:
+            with self._trace_frame(names):
+                batch_results = self.predict_batch(images, batch_size=batch_size, render=render,
+                                                   raw_keys=raw_keys)
+        except Exception as e:
+            print(f"处理批次 {names[0]} ~ {names[-1]} 时出错: {e}")
+            self.metrics.incr('errors', len(names))
+            return
+        
+        for name, result in zip(names, batch_results):
+            with self._trace_frame(name):
+                jpeg_data, detections = result
+                cache_key = self._cache_detections(cache_keys, name, detections)
+                self._save_result(output_dir, output_prefix, name, jpeg_data, cache_key)
+            self._record_detections(name, detections, result.shape, result.inference_ms)
+            print(f"已处理: {name}")
+            yield name, jpeg_data, detections
+    
+    def predict_video_stream(self, stream_url: str, max_frames: int = 100, batch_size: int = 1,
+                             render: bool = True) -> List[tuple]:
+        """预测网络视频流，参数同iter_video_stream，结果全部保存在列表中返回"""
+        return list(self.iter_video_stream(stream_url, max_frames, batch_size, render=render))
+    
+    def iter_video_stream(self, stream_url: str, max_frames: int = 100, batch_size: int = 1,
+                          reconnect: bool = False, stall_timeout: float = 10.0,
+                          max_reconnects: Optional[int] = None, render: bool = True,
+                          encode: bool = True, timestamps: bool = False) -> Iterator[tuple]:
+        """
+        逐帧产出网络视频流的预测结果
+        
+        Args:
+            stream_url: 视频流URL或视频文件路径
+            max_frames: 最大处理帧数
+            batch_size: 大于1时累积多帧后批量推理
+            reconnect: 读取失败或卡顿时自动重连（由抓帧线程读取，不丢帧）
+            stall_timeout: 超过该秒数没有新帧视为卡顿
+            max_reconnects: 连续重连失败的最大次数，None表示不限
+            render: False时只产出检测结果，不绘制也不编码JPEG
+            encode: False时产出绘制好的BGR图像（numpy数组）而不是编码后的二进制流，供写入视频等场景使用
+            timestamps: True时额外产出该帧的抓帧时间（Unix时间，秒），不受推理和批量等待的延迟影响
+            
+        Yields:
+            (JPEG二进制流, 检测结果)，render为False时JPEG二进制流为None；
+            timestamps为True时为 (JPEG二进制流, 检测结果, 抓帧时间)
+        """
+        if reconnect:
+            grabber = FrameGrabber(stream_url, drop_policy=BLOCK, capacity=max(2, batch_size * 2),
+                                   reconnect=True, stall_timeout=stall_timeout,
+                                   max_reconnects=max_reconnects, metrics=self.metrics).start()
+            
+            def read_frame():
+                captured = None
+                while captured is None and not grabber.finished:
+                    captured = grabber.read(timeout=0.5)
+                if captured is None:
+                    return None, None
+                return captured.image, captured.wall_time
+            
+            release = grabber.stop
+        else:
+            cap = cv2.VideoCapture(stream_url)
+            
+            if not cap.isOpened():
+                raise RuntimeError(f"无法打开视频流: {stream_url}")
+            
+            def read_frame():
+                with self.metrics.timer('capture', frame_count + len(pending_frames)):
+                    ret, frame = cap.read()
+                return (frame, time.time()) if ret else (None, None)
+            
+            release = cap.release
         
-        results = []
         frame_count = 0
+        pending_frames = []
+        pending_times = []
+        
+        def with_times(batch_results: List[tuple], capture_times: List[float]) -> List[tuple]:
+            if not timestamps:
+                return batch_results
+            return [(*result, capture_time) for result, capture_time in zip(batch_results, capture_times)]
         
         try:
-            while frame_count < max_frames:
-                ret, frame = cap.read()
-                if not ret:
+            while frame_count + len(pending_frames) < max_frames:
+                frame, capture_time = read_frame()
+                if frame is None:
                     print("视频流结束或读取失败")
                     break
                 
-                try:
-                    jpeg_data, detections = self.predict_image(frame)
-                    results.append((jpeg_data, detections))
+                if batch_size <= 1:
+                    try:
+                        with self._trace_frame(frame_count):
+                            result = self.predict_image(frame, render=render)
+                            self._record_detections(stream_url, result.detections, result.shape,
+                                                    result.inference_ms, frame=frame_count)
+                            jpeg_data, detections = self._result_output(result, encode)
+                    except Exception as e:
+                        print(f"处理第 {frame_count} 帧时出错: {e}")
+                        self.metrics.incr('errors')
+                        continue
                     frame_count += 1
                     print(f"已处理帧: {frame_count}")
-                except Exception as e:
-                    print(f"处理第 {frame_count} 帧时出错: {e}")
+                    yield (jpeg_data, detections, capture_time) if timestamps else (jpeg_data, detections)
+                    continue
+                
+                pending_frames.append(frame)
+                pending_times.append(capture_time)
+                if len(pending_frames) >= batch_size:
+                    batch_results = self._predict_frame_batch(pending_frames, frame_count, render, encode, stream_url)
+                    frame_count += len(batch_results)
+                    yield from with_times(batch_results, pending_times)
+                    pending_frames, pending_times = [], []
+            
+            # 处理剩余不足一批的帧
+            if pending_frames:
+                batch_results = self._predict_frame_batch(pending_frames, frame_count, render, encode, stream_url)
+                yield from with_times(batch_results, pending_times)
         
         finally:
-            cap.release()
+            release()
+            if reconnect:
+                stats = grabber.stats()
+                print(f"重连 {stats['reconnects']} 次，卡顿 {stats['stalls']} 次，"
+                      f"累计中断 {stats['downtime_seconds']:.1f} 秒")
+    
+    def _predict_frame_batch(self, frames: List[np.ndarray], frame_count: int,
+                             render: bool = True, encode: bool = True, source: str = '') -> List[tuple]:
+        """批量预测视频帧，出错时整批跳过"""
+        try:
+            frame_ids = list(range(frame_count, frame_count + len(frames)))
+            with self._trace_frame(frame_ids):
+                results = self.predict_batch(frames, batch_size=len(frames), render=render)
+            batch_results = []
+            for frame_id, result in zip(frame_ids, results):
+                self._record_detections(source, result.detections, result.shape,
+                                        result.inference_ms, frame=frame_id)
+                with self._trace_frame(frame_id):
+                    batch_results.append(self._result_output(result, encode))
+        except Exception as e:
+            print(f"处理第 {frame_count} ~ {frame_count + len(frames) - 1} 帧时出错: {e}")
+            self.metrics.incr('errors', len(frames))
+            return []
         
-        return results
+        print(f"已处理帧: {frame_count + len(batch_results)}")
+        return batch_results
+
+    @staticmethod
+    def _result_output(result: PredictionResult, encode: bool) -> tuple:
+        """返回 (编码后的二进制流或绘制好的图像, 检测结果)"""
+        return (result.jpeg if encode else result.annotated), result.detections
+    
+    def iter_live_stream(self, stream_url: Union[str, FrameGrabber], drop_policy: str = DROP_OLDEST,
+                         stop_event: Optional[threading.Event] = None,
+                         stats_interval: float = 5.0, buffer_size: int = 1, reconnect: bool = False,
+                         stall_timeout: float = 10.0, max_reconnects: Optional[int] = None,
+                         render: bool = True, encode: bool = True) -> Iterator[tuple]:
+        """
+        实时模式预测视频流：后台线程持续抓帧，推理总是使用最新的帧
+        
+        推理慢于视频源帧率时按drop_policy丢帧，一直运行到stop_event被设置或视频源结束。
+        
+        Args:
+            stream_url: 视频流URL、视频文件路径，或已配置好的FrameGrabber
+            drop_policy: 缓冲区满时的策略，'drop_oldest'、'drop_newest' 或 'block'
+            stop_event: 设置后停止检测
+            stats_interval: 打印统计信息的间隔秒数，0表示不打印
+            buffer_size: 帧缓冲区容量，传入FrameGrabber时忽略
+            reconnect: 读取失败或卡顿时按指数退避自动重连，模型无需重新加载
+            stall_timeout: 超过该秒数没有新帧视为卡顿
+            max_reconnects: 连续重连失败的最大次数，None表示不限
+            render: False时只产出检测结果，不绘制也不编码JPEG（JPEG二进制流为None）
+            encode: False时产出绘制好的BGR图像（numpy数组）而不是编码后的二进制流
+            
+        Yields:
+            (JPEG二进制流, 检测结果, 帧信息)，帧信息包含 frame_id、timestamp（抓帧时间，Unix时间）、
+            latency_ms（抓帧到结果产出的端到端延迟）以及 captured / dropped / depth / processed /
+            reconnects / downtime_seconds 计数
+        """
+        if isinstance(stream_url, FrameGrabber):
+            grabber = stream_url
+        else:
+            grabber = FrameGrabber(stream_url, drop_policy=drop_policy, capacity=buffer_size,
+                                   reconnect=reconnect, stall_timeout=stall_timeout,
+                                   max_reconnects=max_reconnects, metrics=self.metrics)
+        source_name = str(grabber.source)
+        
+        stop_event = stop_event or threading.Event()
+        processed = 0
+        latency_sum = 0.0
+        report_processed, report_latency = 0, 0.0
+        last_report = time.monotonic()
+        
+        with grabber:
+            while not stop_event.is_set():
+                frame = grabber.read(timeout=0.5)
+                if frame is None:
+                    if grabber.finished:
+                        print("视频流结束或读取失败")
+                        break
+                    continue
+                
+                try:
+                    # 解包时完成编码，延迟统计包含绘制与编码
+                    with self._trace_frame(frame.frame_id):
+                        result = self.predict_image(frame.image, render=render)
+                        self._record_detections(source_name, result.detections, result.shape,
+                                                result.inference_ms, frame=frame.frame_id)
+                        jpeg_data, detections = self._result_output(result, encode)
+                except Exception as e:
+                    print(f"处理第 {frame.frame_id} 帧时出错: {e}")
+                    self.metrics.incr('errors')
+                    continue
+                
+                latency_ms = (time.monotonic() - frame.timestamp) * 1000
+                processed += 1
+                latency_sum += latency_ms
+                grabber_stats = grabber.stats()
+                
+                now = time.monotonic()
+                if stats_interval and now - last_report >= stats_interval:
+                    window = processed - report_processed
+                    print(f"实时检测: {window / (now - last_report):.1f} FPS，"
+                          f"平均延迟 {(latency_sum - report_latency) / max(1, window):.1f} ms，"
+                          f"已抓取 {grabber_stats['captured']} 帧，已丢弃 {grabber_stats['dropped']} 帧，"
+                          f"缓冲 {grabber_stats['depth']}/{grabber_stats['capacity']}，"
+                          f"重连 {grabber_stats['reconnects']} 次")
+                    last_report, report_processed, report_latency = now, processed, latency_sum
+                
+                yield jpeg_data, detections, {
+                    'frame_id': frame.frame_id,
+                    'timestamp': frame.wall_time,
+                    'latency_ms': latency_ms,
+                    'mean_latency_ms': latency_sum / processed,
+                    'captured': grabber_stats['captured'],
+                    'dropped': grabber_stats['dropped'],
+                    'depth': grabber_stats['depth'],
+                    'processed': processed,
+                    'reconnects': grabber_stats['reconnects'],
+                    'downtime_seconds': grabber_stats['downtime_seconds'],
+                }
 
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='YOLO预测脚本')
-    parser.add_argument('--model', type=str, required=True, help='模型权重文件路径(.pt)')
+    parser.add_argument('--model', type=str, required=True,
+                        help="模型权重文件路径(.pt)；--engine stub 时为替身模型配置，如 'boxes=20,latency_ms=8'")
     parser.add_argument('--conf-thres', type=float, default=0.5, help='置信度阈值')
     parser.add_argument('--iou-thres', type=float, default=0.5, help='NMS阈值')
+    parser.add_argument('--imgsz', type=int, nargs='+', default=[640], help='模型输入尺寸，单个值为正方形，两个值为 高 宽')
+    parser.add_argument('--precision', type=str, default='fp32', choices=list(YOLOPredictor.PRECISIONS),
+                        help='推理精度：fp32 / fp16(CUDA) / bf16')
+    parser.add_argument('--channels-last', action='store_true', help='使用channels-last内存格式推理')
+    parser.add_argument('--warmup-iters', type=int, default=3, help='模型加载后的预热推理次数')
+    parser.add_argument('--engine', type=str, default='torch', choices=list(ENGINES),
+                        help='推理引擎，非torch引擎首次使用时自动导出并缓存')
+    parser.add_argument('--engine-cache', type=str, default=None, help='引擎转换产物缓存目录')
+    parser.add_argument('--no-warmup', action='store_true', help='跳过模型预热')
     
     # 输入源参数（互斥）
     input_group = parser.add_mutually_exclusive_group(required=True)
     input_group.add_argument('--image', type=str, help='单张图片路径')
     input_group.add_argument('--folder', type=str, help='图片文件夹路径')
     input_group.add_argument('--stream', type=str, help='网络视频流URL')
+    input_group.add_argument('--streams', type=str, help='多路视频流列表文件，每行一个URL，共享同一个模型')
     
     # 输出参数
     parser.add_argument('--output', type=str, default='./output', help='输出目录')
     parser.add_argument('--max-frames', type=int, default=100, help='视频流最大处理帧数')
+    parser.add_argument('--live', action='store_true', help='视频流实时模式：后台抓帧并丢弃来不及处理的帧，直到Ctrl+C停止')
+    parser.add_argument('--drop-policy', type=str, default=DROP_OLDEST, choices=DROP_POLICIES,
+                        help='实时模式帧缓冲区满时的策略')
+    parser.add_argument('--buffer-size', type=int, default=1, help='实时模式帧缓冲区容量')
+    parser.add_argument('--reconnect', action='store_true', help='视频流读取失败或卡顿时按指数退避自动重连')
+    parser.add_argument('--stall-timeout', type=float, default=10.0, help='超过该秒数没有新帧视为卡顿并重连')
+    parser.add_argument('--max-reconnects', type=int, default=None, help='连续重连失败的最大次数，默认不限')
+    parser.add_argument('--batch-size', type=int, default=1, help='文件夹/视频流模式下每批推理的图像数量，多路模式默认为视频流数量')
+    parser.add_argument('--workers', type=int, default=0, help='文件夹模式下解码/绘制线程数，0表示顺序处理')
+    parser.add_argument('--decode-queue', type=int, default=16, help='文件夹流水线模式下解码预取队列深度')
+    parser.add_argument('--render-queue', type=int, default=16, help='文件夹流水线模式下绘制/编码待完成任务上限')
+    parser.add_argument('--no-render', action='store_true', help='只输出检测结果，不绘制、不编码也不保存结果图片')
+    
+    # 结果图像编码参数
+    parser.add_argument('--format', type=str, default='jpg', choices=list(FORMATS), help='结果图像格式，bmp不压缩')
+    parser.add_argument('--quality', type=int, default=None,
+                        help='jpg/webp质量(jpg 0-100，webp 1-100，101为无损)或png压缩级别(0-9)，默认使用各格式默认值')
+    parser.add_argument('--jpeg-optimize', action='store_true', help='JPEG优化霍夫曼表，体积更小但编码稍慢')
+    parser.add_argument('--jpeg-progressive', action='store_true', help='JPEG渐进式编码')
+    parser.add_argument('--output-scale', type=float, default=1.0, help='编码前缩小结果图像的比例，(0, 1]')
+    
+    # 结果写入参数
+    parser.add_argument('--write-workers', type=int, default=2, help='后台写结果文件的线程数，0表示同步写入')
+    parser.add_argument('--write-queue', type=int, default=64, help='等待写入的结果文件数上限，超过时推理暂停等待')
+    parser.add_argument('--fsync', action='store_true', help='每个结果文件写完后fsync落盘')
+    parser.add_argument('--atomic-write', action='store_true', help='先写临时文件再重命名，避免出现写了一半的结果文件')
+    
+    # 视频分段输出参数
+    parser.add_argument('--video-output', action='store_true',
+                        help='视频流模式下将结果写入滚动视频分段（附JSONL帧索引），代替逐帧保存图片')
+    parser.add_argument('--video-codec', type=str, default='mp4v', help='视频分段的四字符编码器，如 mp4v / avc1 / XVID / MJPG')
+    parser.add_argument('--video-fps', type=float, default=25.0, help='视频分段的帧率')
+    parser.add_argument('--segment-seconds', type=float, default=60.0, help='单个视频分段的时长（秒）')
+    
+    # 检测结果导出参数
+    parser.add_argument('--detections-out', type=str, default=None,
+                        help='将每张图片/每帧的检测结果导出到该文件，后缀 .jsonl 或 .parquet（需要pyarrow）')
+    parser.add_argument('--detections-format', type=str, default=None, choices=['jsonl', 'parquet'],
+                        help='检测结果导出格式，默认根据文件后缀判断')
+    parser.add_argument('--detections-buffer', type=int, default=256, help='检测结果缓冲的记录数，攒够后批量写入')
+    
+    # 结果缓存参数
+    parser.add_argument('--no-cache', action='store_true', help='文件夹模式下不使用检测结果缓存，所有图片重新推理')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='检测结果缓存目录，默认 ~/.cache/yolo_detection_gui/results')
+    parser.add_argument('--cache-size', type=int, default=512, help='检测结果缓存容量上限(MB)，超过时淘汰最久未使用的结果')
+    
+    # 流水线统计参数
+    parser.add_argument('--metrics-interval', type=float, default=0,
+                        help='每隔该秒数输出一行FPS与分阶段耗时统计，0表示只在结束时输出')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='在本机该端口提供Prometheus格式的统计 (http://127.0.0.1:端口/metrics)')
+    parser.add_argument('--trace', type=str, default=None,
+                        help='记录各线程、各帧的阶段起止时间，结束时保存为Chrome trace JSON（可用 ui.perfetto.dev 打开）')
+    parser.add_argument('--trace-buffer', type=int, default=1 << 18, help='执行追踪保留的最近事件数')
     
     args = parser.parse_args()
+    render = not args.no_render
+    video_output = render and args.video_output
     
     # 创建输出目录
     os.makedirs(args.output, exist_ok=True)
     
+    # 结果文件由后台线程写入，推理不等待磁盘/网络IO
+    writer = ResultWriter(args.write_workers, args.write_queue, fsync=args.fsync, atomic=args.atomic_write)
+    segment_writers = []
+    sink = None
+    cache = None
+    metrics = None
+    tracer = None
+    
+    def open_segment_writer(output_dir: str) -> SegmentWriter:
+        segment_writer = SegmentWriter(output_dir, fps=args.video_fps, codec=args.video_codec,
+                                       segment_seconds=args.segment_seconds)
+        segment_writers.append(segment_writer)
+        return segment_writer
+    
     try:
         # 初始化预测器
         predictor = YOLOPredictor(
             model_path=args.model,
             conf_thres=args.conf_thres,
-            iou_thres=args.iou_thres
+            iou_thres=args.iou_thres,
+            imgsz=args.imgsz[0] if len(args.imgsz) == 1 else tuple(args.imgsz[:2]),
+            precision=args.precision,
+            channels_last=args.channels_last,
+            warmup_iters=0 if args.no_warmup else args.warmup_iters,
+            engine=args.engine,
+            engine_cache_dir=args.engine_cache,
+            encoder=OutputEncoder(args.format, quality=args.quality, optimize=args.jpeg_optimize,
+                                  progressive=args.jpeg_progressive, scale=args.output_scale)
         )
+        suffix = predictor.encoder.suffix
+        predictor.writer = writer
+        metrics = predictor.metrics
+        if args.metrics_interval > 0:
+            metrics.start_logging(args.metrics_interval)
+        if args.metrics_port:
+            metrics.serve(args.metrics_port)
+            print(f"统计接口: http://127.0.0.1:{args.metrics_port}/metrics")
+        if args.trace:
+            # 在预热之后开始追踪，只记录实际处理的帧
+            tracer = PipelineTracer(args.trace_buffer)
+            predictor.tracer = tracer
+        if args.detections_out:
+            sink = DetectionSink(args.detections_out, args.detections_format, args.detections_buffer,
+                                 class_names=predictor.class_names)
+            predictor.sink = sink
         
         if args.image:
             # 单张图片预测
             print(f"预测单张图片: {args.image}")
-            jpeg_data, detections = predictor.predict_single_image(args.image)
+            result = predictor.predict_single_image(args.image, render=render)
+            predictor._record_detections(args.image, result.detections, result.shape, result.inference_ms)
+            
+            print(f"检测到 {len(result.detections)} 个目标")
+            for det in result.detections:
+                cls = det['class']
+                if predictor.class_names and cls < len(predictor.class_names):
+                    name = predictor.class_names[cls]
+                else:
+                    name = f"cls:{cls}"
+                print(f"  {name} {det['confidence']:.2f} {det['bbox']}")
             
             # 保存结果
-            output_path = os.path.join(args.output, 'predicted_image.jpg')
-            with open(output_path, 'wb') as f:
-                f.write(jpeg_data)
-            print(f"结果已保存到: {output_path}")
+            if render:
+                output_path = os.path.join(args.output, f'predicted_image{suffix}')
+                writer.submit(output_path, result.jpeg)
+                print(f"结果已保存到: {output_path}")
         
         elif args.folder:
-            # 文件夹图片预测
+            # 文件夹图片预测，内容未变的图片直接使用缓存的检测结果
             print(f"预测文件夹图片: {args.folder}")
-            results = predictor.predict_images_folder(args.folder)
-            
-            # 保存结果
-            for filename, jpeg_data, detections in results:
-                output_path = os.path.join(args.output, f'predicted_{filename}')
-                with open(output_path, 'wb') as f:
-                    f.write(jpeg_data)
-            print(f"共处理 {len(results)} 张图片，结果已保存到: {args.output}")
+            if not args.no_cache:
+                cache = ResultCache(args.cache_dir, max_bytes=args.cache_size << 20)
+                predictor.cache = cache
+            processed, total_detections = 0, 0
+            for _, _, detections in predictor.iter_images_folder(
+                args.folder,
+                batch_size=args.batch_size,
+                num_workers=args.workers,
+                decode_queue_size=args.decode_queue,
+                render_queue_size=args.render_queue,
+                output_dir=args.output,
+                output_prefix='predicted_',
+                render=render
+            ):
+                processed += 1
+                total_detections += len(detections)
+            print(f"共处理 {processed} 张图片，检测到 {total_detections} 个目标"
+                  f"{f'，结果已保存到: {args.output}' if render else ''}")
         
         elif args.stream:
             # 视频流预测
             print(f"预测视频流: {args.stream}")
-            results = predictor.predict_video_stream(args.stream, args.max_frames)
+            processed = 0
             
-            # 保存结果
-            for i, (jpeg_data, detections) in enumerate(results):
-                output_path = os.path.join(args.output, f'frame_{i:04d}.jpg')
-                with open(output_path, 'wb') as f:
-                    f.write(jpeg_data)
-            print(f"共处理 {len(results)} 帧，结果已保存到: {args.output}")
+            if args.live:
+                # 实时模式：一直运行到视频源结束或Ctrl+C
+                print("实时模式，按 Ctrl+C 停止")
+                stream = predictor.iter_live_stream(args.stream, drop_policy=args.drop_policy,
+                                                    buffer_size=args.buffer_size,
+                                                    reconnect=args.reconnect,
+                                                    stall_timeout=args.stall_timeout,
+                                                    max_reconnects=args.max_reconnects,
+                                                    render=render, encode=not video_output)
+                segment_writer = open_segment_writer(args.output) if video_output else None
+                info = None
+                try:
+                    for jpeg_data, detections, info in stream:
+                        if segment_writer:
+                            segment_writer.write(jpeg_data, detections, timestamp=info['timestamp'],
+                                                 extra={'source_frame': info['frame_id']})
+                        elif render:
+                            output_path = os.path.join(args.output, f'frame_{info["frame_id"]:06d}{suffix}')
+                            writer.submit(output_path, jpeg_data)
+                        processed += 1
+                except KeyboardInterrupt:
+                    print("收到中断信号，停止实时检测")
+                finally:
+                    stream.close()
+                if info:
+                    print(f"共抓取 {info['captured']} 帧，丢弃 {info['dropped']} 帧，"
+                          f"平均端到端延迟 {info['mean_latency_ms']:.1f} ms，"
+                          f"重连 {info['reconnects']} 次，累计中断 {info['downtime_seconds']:.1f} 秒")
+            else:
+                # 逐帧保存结果，不在内存中累积
+                segment_writer = open_segment_writer(args.output) if video_output else None
+                for i, (jpeg_data, detections, capture_time) in enumerate(
+                    predictor.iter_video_stream(args.stream, args.max_frames, batch_size=args.batch_size,
+                                                reconnect=args.reconnect, stall_timeout=args.stall_timeout,
+                                                max_reconnects=args.max_reconnects, render=render,
+                                                encode=not video_output, timestamps=True)
+                ):
+                    if segment_writer:
+                        segment_writer.write(jpeg_data, detections, timestamp=capture_time)
+                    elif render:
+                        output_path = os.path.join(args.output, f'frame_{i:04d}{suffix}')
+                        writer.submit(output_path, jpeg_data)
+                    processed += 1
+            print(f"共处理 {processed} 帧{f'，结果已保存到: {args.output}' if render else ''}")
+        
+        elif args.streams:
+            # 多路视频流预测，各路结果分别保存到 stream_XX 子目录
+            urls = load_stream_list(args.streams)
+            print(f"预测 {len(urls)} 路视频流，按 Ctrl+C 停止")
+            detector = MultiStreamDetector(
+                predictor, urls,
+                batch_size=args.batch_size if args.batch_size > 1 else None,
+                drop_policy=args.drop_policy,
+                buffer_size=args.buffer_size,
+                reconnect=args.reconnect,
+                stall_timeout=args.stall_timeout,
+                max_reconnects=args.max_reconnects,
+                render=render,
+                encode=not video_output
+            )
+            stream_dirs = [os.path.join(args.output, f'stream_{i:02d}') for i in range(len(urls))]
+            for stream_dir in stream_dirs:
+                os.makedirs(stream_dir, exist_ok=True)
+            stream_segments = [open_segment_writer(stream_dir) for stream_dir in stream_dirs] if video_output else None
+            
+            processed = 0
+            results = detector.run()
+            try:
+                for index, jpeg_data, detections, info in results:
+                    if stream_segments:
+                        stream_segments[index].write(jpeg_data, detections, timestamp=info['timestamp'],
+                                                     extra={'source_frame': info['frame_id']})
+                    elif render:
+                        output_path = os.path.join(stream_dirs[index], f'frame_{info["frame_id"]:06d}{suffix}')
+                        writer.submit(output_path, jpeg_data)
+                    processed += 1
+            except KeyboardInterrupt:
+                print("收到中断信号，停止多路检测")
+            finally:
+                results.close()
+            for line in detector.format_stats():
+                print(line)
+            print(f"共处理 {processed} 帧{f'，结果已保存到: {args.output}' if render else ''}")
     
     except Exception as e:
         print(f"错误: {e}")
         sys.exit(1)
+    finally:
+        # 退出前等待所有结果写完
+        writer.close()
+        if writer.stats()['files']:
+            print(writer.format_stats())
+        for segment_writer in segment_writers:
+            segment_writer.close()
+            print(f"{segment_writer.output_dir}: {segment_writer.format_stats()}")
+        if cache is not None:
+            cache.close()
+            print(cache.format_stats())
+        if sink is not None:
+            sink.close()
+            print(f"已导出 {sink.records} 条检测记录到: {sink.path}")
+        if metrics is not None:
+            metrics.close()
+            print(f"流水线统计: {metrics.format_summary()}")
+        if tracer is not None:
+            tracer.dump(args.trace)
+            print(f"{tracer.format_stats()}，已保存到: {args.trace}")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file